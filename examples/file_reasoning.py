@@ -5,6 +5,7 @@ File-based reasoning example using the LLMResearch package.
 import os
 import sys
 import argparse
+import threading
 from dotenv import load_dotenv
 
 # Add the parent directory to the path
@@ -25,6 +26,7 @@ def main():
     parser.add_argument("--question", "-q", required=True, help="Question to answer about the file")
     parser.add_argument("--steps", "-s", type=int, default=3, help="Number of reasoning steps")
     parser.add_argument("--provider", "-p", help="The LLM provider to use")
+    parser.add_argument("--max-context-tokens", type=int, default=8000, help="Maximum number of file tokens to include in the prompt")
     args = parser.parse_args()
     
     # Load environment variables from .env file
@@ -54,13 +56,18 @@ def main():
         print(f"Error: {e}")
         return
     
+    # Open the connection to the LLM endpoint in the background so the DNS
+    # lookup and TLS handshake overlap with reading the file
+    warmup_thread = threading.Thread(target=llm.warmup, daemon=True)
+    warmup_thread.start()
+    
     # Create a file handler
     file_handler = FileHandler()
     
-    # Read the file
+    # Read only as much of the file as fits the token budget (~4 bytes per token)
     try:
-        file_content = file_handler.read_file(args.file)
-        print(f"Read file: {args.file} ({len(file_content)} characters)")
+        file_content, file_size = file_handler.read_file_window(args.file, args.max_context_tokens * 4)
+        print(f"Read file: {args.file} ({file_size} bytes, using {len(file_content)} characters)")
     except Exception as e:
         print(f"Error reading file: {e}")
         return
@@ -6,8 +6,14 @@ and extract content from relevant URLs.
 """
 
 import os
+import re
 import sys
+import asyncio
 import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from urllib.parse import urlsplit
+from typing import Any, Dict, List, Optional, Union
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
@@ -16,9 +22,274 @@ from rich.markdown import Markdown
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from llm_research.config import Config
+from llm_research.http_client import get_http_client
 from llm_research.web_search import get_web_search_tool
 from llm_research.url_extractor import get_url_extractor
+from llm_research.file_handler import FileHandler
+from llm_research.llm.base import BaseLLM
 from llm_research.llm.openai import OpenAILLM
+from llm_research.llm.cache import CachingLLM
+
+# Use uvloop's faster event loop when it is installed
+try:
+    import uvloop
+    run_async = uvloop.run
+except ImportError:
+    run_async = asyncio.run
+
+# Matches the URL numbers in the LLM's selection response
+_NUM_RE = re.compile(r"\d+")
+
+# Maximum number of tokens of extracted content kept per URL
+MAX_CONTENT_TOKENS = 1000
+
+# Maximum number of URLs extracted at the same time
+MAX_CONCURRENT_EXTRACTIONS = 4
+
+# Number of top-ranked search results extracted while the LLM is still selecting
+PREFETCH_COUNT = 3
+
+# Hosts whose pages rarely yield useful extracted content
+BLOCKED_HOSTS = {
+    "facebook.com",
+    "twitter.com",
+    "x.com",
+    "instagram.com",
+    "tiktok.com",
+    "pinterest.com",
+    "linkedin.com",
+}
+
+# Search results with shorter summaries are unlikely to be worth extracting
+MIN_SUMMARY_LENGTH = 40
+
+# Matches runs of characters that aren't safe in output file names
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+@lru_cache(maxsize=1024)
+def is_blocked_host(host: str) -> bool:
+    """
+    Check whether a host (or one of its parent domains) is blocked.
+    
+    Args:
+        host: The lowercase host name
+        
+    Returns:
+        True if the host is blocked, False otherwise
+    """
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in BLOCKED_HOSTS for i in range(len(parts) - 1))
+
+
+def filter_search_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop duplicate, blocked and low-information search results.
+    
+    Args:
+        results: The search results
+        
+    Returns:
+        The remaining search results, in their original order
+    """
+    seen = set()
+    filtered = []
+    
+    for result in results:
+        parts = urlsplit(result["url"])
+        host = parts.netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        
+        # Treat URLs differing only in scheme, "www." or a trailing slash as duplicates
+        canonical_url = (host, parts.path.rstrip("/"), parts.query)
+        if canonical_url in seen:
+            continue
+        seen.add(canonical_url)
+        
+        if is_blocked_host(host) or len(result.get("summary") or "") < MIN_SUMMARY_LENGTH:
+            continue
+        
+        filtered.append(result)
+    
+    return filtered
+
+
+def output_path(output_dir: str, index: int, url: str) -> str:
+    """
+    Get the path of the file the extracted content of a URL is saved to.
+    
+    Args:
+        output_dir: The output directory
+        index: The 1-based number of the URL
+        url: The URL
+        
+    Returns:
+        The path of the markdown file
+    """
+    slug = _SLUG_RE.sub("_", url.split("://", 1)[-1]).strip("_")[:80]
+    return os.path.join(output_dir, f"{index}_{slug}.md")
+
+
+async def extract_all(
+    url_extractor,
+    urls: List[str],
+    prefetched: Optional[Dict[str, Future]] = None,
+    output_dir: Optional[str] = None
+) -> List[Union[str, Exception]]:
+    """
+    Extract content from several URLs concurrently.
+    
+    Args:
+        url_extractor: The URL extractor to use
+        urls: The URLs to extract content from
+        prefetched: Extractions already started in the background, keyed by URL (optional)
+        output_dir: Directory to save each extracted content to as soon as it is ready (optional)
+        
+    Returns:
+        A list with the extracted content (or the raised exception) for each URL,
+        in the same order as the input URLs
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_EXTRACTIONS)
+    
+    prefetched = prefetched or {}
+    
+    file_handler = FileHandler()
+    
+    async def extract(url: str) -> str:
+        # Reuse a background extraction unless it was cancelled before starting
+        future = prefetched.get(url)
+        if future is not None and not future.cancelled():
+            return await asyncio.wrap_future(future)
+        
+        async with semaphore:
+            return await loop.run_in_executor(
+                None,
+                partial(url_extractor.extract_content, url, output_format="markdown")
+            )
+    
+    async def extract_and_save(index: int, url: str) -> str:
+        content = await extract(url)
+        # Write while the remaining extractions are still running
+        if output_dir:
+            await file_handler.write_file_async(output_path(output_dir, index, url), content)
+        return content
+    
+    return await asyncio.gather(
+        *(extract_and_save(i, url) for i, url in enumerate(urls, start=1)),
+        return_exceptions=True
+    )
+
+
+def trim_summary(llm: BaseLLM, summary: str, max_tokens: int) -> str:
+    """
+    Shorten a search result summary for the URL selection prompt.
+    
+    Args:
+        llm: The LLM whose tokenizer is used
+        summary: The full summary
+        max_tokens: Maximum number of tokens to keep
+        
+    Returns:
+        The summary, truncated and marked with an ellipsis if it was too long
+    """
+    trimmed = llm.truncate_to_tokens(summary, max_tokens)
+    if len(trimmed) < len(summary):
+        return trimmed.rstrip() + "…"
+    return summary
+
+
+def stream_url_selection(llm: BaseLLM, prompt: str) -> str:
+    """
+    Stream the LLM's URL selection, stopping once three numbers have arrived.
+    
+    Args:
+        llm: The LLM to ask
+        prompt: The URL selection prompt
+        
+    Returns:
+        The (possibly partial) selection response
+    """
+    selection_text = ""
+    url_selection_stream = llm.generate_stream(
+        prompt=prompt,
+        max_tokens=20,
+        temperature=0.3
+    )
+    try:
+        for chunk in url_selection_stream:
+            selection_text += chunk
+            # A trailing digit may be the start of a longer number, and
+            # nothing after the third number is used
+            if len(_NUM_RE.findall(selection_text)) >= 3 and not selection_text[-1].isdigit():
+                break
+    finally:
+        # Release the underlying HTTP connection if we stopped early
+        url_selection_stream.close()
+    
+    return selection_text
+
+
+def select_urls(
+    selector_llm: BaseLLM,
+    llm: BaseLLM,
+    query: str,
+    url_summaries: List[Dict[str, str]],
+    console: Console,
+    max_summary_tokens: int = 60
+) -> List[int]:
+    """
+    Ask an LLM which search results are worth extracting.
+    
+    Args:
+        selector_llm: The (cheaper) LLM used for the selection
+        llm: The primary LLM, used if the selector fails
+        query: The search query
+        url_summaries: The url, title and summary of each search result
+        console: The console to print progress to
+        max_summary_tokens: Maximum number of tokens of each summary included in the prompt
+        
+    Returns:
+        The 0-based indices of at most 3 selected search results
+    """
+    # Create a prompt to ask the LLM which URLs to extract content from
+    console.print("\n🤔 Asking LLM to select the most relevant URLs...")
+    parts = [f"Based on the following search results for the query '{query}', which URLs would be most relevant to extract full content from? Select up to 3 URLs that seem most promising based on their summaries.\n\n"]
+    
+    # Add formatted summaries for the LLM to evaluate (joined once at the end
+    # rather than growing the prompt string in the loop)
+    parts.extend(
+        f"{i}. {summary['title']}\n   URL: {summary['url']}\n   Summary: {trim_summary(llm, summary['summary'], max_summary_tokens)}\n\n"
+        for i, summary in enumerate(url_summaries, start=1)
+    )
+    
+    parts.append("List the numbers of the most relevant URLs (e.g., '1, 3, 5'). Reply ONLY with comma-separated numbers:")
+    url_selection_prompt = "".join(parts)
+    
+    try:
+        selection_text = stream_url_selection(selector_llm, url_selection_prompt)
+    except Exception as e:
+        if selector_llm is llm:
+            raise
+        console.print(f"[bold yellow]Selector model failed ({str(e)}), falling back to the primary LLM[/]")
+        selection_text = stream_url_selection(llm, url_selection_prompt)
+    
+    # Parse the response to get the selected URL indices
+    selected_indices = []
+    selection_text = selection_text.strip()
+    console.print(f"LLM response: [italic]{selection_text}[/]")
+    
+    for num in _NUM_RE.findall(selection_text):
+        try:
+            idx = int(num) - 1  # Convert to 0-based index
+            if 0 <= idx < len(url_summaries):
+                selected_indices.append(idx)
+        except ValueError:
+            continue
+    
+    # Limit to at most 3 URLs
+    return selected_indices[:3]
 
 
 def main():
@@ -28,6 +299,8 @@ def main():
     parser.add_argument('--query', '-q', required=True, help='The search query')
     parser.add_argument('--provider', '-p', help='The LLM provider to use')
     parser.add_argument('--bocha-api-key', help='Bocha API key for web search')
+    parser.add_argument('--output-dir', '-o', help='Directory to save the full extracted content of each URL to (optional)')
+    parser.add_argument('--max-summary-tokens', type=int, default=60, help='Maximum number of tokens of each search result summary sent to the LLM for URL selection')
     args = parser.parse_args()
     
     console = Console()
@@ -35,6 +308,10 @@ def main():
     # Load the configuration
     config = Config()
     
+    # Share one HTTP/2 client (if available) between the web search and URL
+    # fetching so concurrent requests are multiplexed over one connection
+    http_client = get_http_client()
+    
     # Get the API key from the parameter, environment variable, or config
     api_key = args.bocha_api_key or os.environ.get("BOCHA_API_KEY")
     
@@ -48,22 +325,33 @@ def main():
         console.print("[bold red]Error: Bocha API key is required.[/]")
         sys.exit(1)
     
-    web_search = get_web_search_tool(api_key=api_key)
+    web_search = get_web_search_tool(api_key=api_key, session=http_client)
     console.print("[bold green]Web search initialized[/]")
     
     # Initialize URL extractor
-    url_extractor = get_url_extractor()
+    url_extractor = get_url_extractor(use_cache=True, client=http_client)
     console.print("[bold green]URL extractor initialized[/]")
     
     # Get the LLM provider
     provider_config = config.get_provider_config(args.provider)
-    llm = OpenAILLM(
+    llm = CachingLLM(OpenAILLM(
         model=provider_config.get("model", "gpt-3.5-turbo"),
         base_url=provider_config.get("base_url", "https://api.openai.com/v1"),
         api_key=provider_config["api_key"]
-    )
+    ))
     console.print("[bold green]LLM initialized[/]")
     
+    # Optionally use a cheaper model just for picking which URLs to extract
+    selector_llm = None
+    selector_model = os.environ.get("SELECTOR_MODEL")
+    if selector_model:
+        selector_llm = CachingLLM(OpenAILLM(
+            model=selector_model,
+            base_url=provider_config.get("base_url", "https://api.openai.com/v1"),
+            api_key=provider_config["api_key"]
+        ))
+        console.print(f"[bold green]URL selector model:[/] {selector_model}")
+    
     # Display query information
     console.print(Panel(
         f"[bold]Query:[/] {args.query}",
@@ -88,11 +376,20 @@ def main():
         console.print("[bold yellow]No results found[/]")
         sys.exit(0)
     
+    # Drop duplicate and unpromising results before they reach the selection prompt
+    results = filter_search_results(search_results["results"])
+    if not results:
+        console.print("[bold yellow]No usable results after filtering[/]")
+        sys.exit(0)
+    
+    if len(results) < len(search_results["results"]):
+        console.print(f"Filtered out [bold]{len(search_results['results']) - len(results)}[/] duplicate or low-quality results")
+    
     urls = []
     url_summaries = []
     
     # Collect URLs and their summaries
-    for result in search_results["results"]:
+    for result in results:
         urls.append(result["url"])
         url_summaries.append({
             "url": result["url"],
@@ -107,40 +404,34 @@ def main():
         console.print(f"   URL: {summary['url']}")
         console.print(f"   Summary: {summary['summary'][:100]}...")
     
-    # Create a prompt to ask the LLM which URLs to extract content from
-    console.print("\n🤔 Asking LLM to select the most relevant URLs...")
-    url_selection_prompt = f"Based on the following search results for the query '{args.query}', which URLs would be most relevant to extract full content from? Select up to 3 URLs that seem most promising based on their summaries.\n\n"
-    
-    # Add formatted summaries for the LLM to evaluate
-    for i, summary in enumerate(url_summaries, start=1):
-        url_selection_prompt += f"{i}. {summary['title']}\n   URL: {summary['url']}\n   Summary: {summary['summary']}\n\n"
-    
-    url_selection_prompt += "List the numbers of the most relevant URLs (e.g., '1, 3, 5'):"
-    
-    # Get the LLM's recommendation on which URLs to extract
-    url_selection_response = llm.generate(
-        prompt=url_selection_prompt,
-        max_tokens=50,
-        temperature=0.3
-    )
+    # Start extracting the top-ranked results while the LLM is deciding, since
+    # they are the most likely to be selected
+    prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_COUNT)
+    prefetched = {
+        url: prefetch_executor.submit(url_extractor.extract_content, url, output_format="markdown")
+        for url in urls[:PREFETCH_COUNT]
+    }
     
-    # Parse the response to get the selected URL indices
-    selected_indices = []
-    selection_text = url_selection_response["text"].strip()
-    console.print(f"LLM response: [italic]{selection_text}[/]")
+    if len(urls) <= 3:
+        # With only a few results there is nothing to choose, so skip the LLM
+        selected_indices = list(range(len(urls)))
+    else:
+        selected_indices = select_urls(
+            selector_llm or llm,
+            llm,
+            args.query,
+            url_summaries,
+            console,
+            max_summary_tokens=args.max_summary_tokens
+        )
     
-    # Try to parse numbers from the response
-    import re
-    for num in re.findall(r'\d+', selection_text):
-        try:
-            idx = int(num) - 1  # Convert to 0-based index
-            if 0 <= idx < len(urls):
-                selected_indices.append(idx)
-        except ValueError:
-            continue
-    
-    # Limit to at most 3 URLs
-    selected_indices = selected_indices[:3]
+    # Drop background extractions of URLs that weren't selected (ones that are
+    # already running finish on their own)
+    selected_urls = {urls[url_idx] for url_idx in selected_indices}
+    for url, future in prefetched.items():
+        if url not in selected_urls:
+            future.cancel()
+    prefetch_executor.shutdown(wait=False)
     
     if not selected_indices:
         console.print("[bold yellow]No URLs selected for extraction[/]")
@@ -149,31 +440,43 @@ def main():
     # Extract content from the selected URLs
     console.print(f"\n📄 Extracting content from [bold]{len(selected_indices)}[/] selected URLs...")
     
-    extracted_contents = []
     for url_idx in selected_indices:
+        console.print(f"\n[bold]Extracting from:[/] {url_summaries[url_idx]['title']}")
+        console.print(f"URL: {urls[url_idx]}")
+    
+    # Extract all selected URLs concurrently (docling is synchronous, so each
+    # extraction runs in the default thread pool)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    
+    results = run_async(extract_all(
+        url_extractor,
+        [urls[url_idx] for url_idx in selected_indices],
+        prefetched=prefetched,
+        output_dir=args.output_dir
+    ))
+    
+    extracted_contents = []
+    for url_idx, content in zip(selected_indices, results):
         url = urls[url_idx]
         title = url_summaries[url_idx]["title"]
         
-        console.print(f"\n[bold]Extracting from:[/] {title}")
-        console.print(f"URL: {url}")
+        if isinstance(content, Exception):
+            console.print(f"❌ Extraction failed for {url}: {str(content)}")
+            continue
         
-        try:
-            content = url_extractor.extract_content(url, output_format="markdown")
-            
-            # Truncate content if it's too long (to avoid token limits)
-            max_content_length = 4000
-            if len(content) > max_content_length:
-                content = content[:max_content_length] + "...\n[Content truncated due to length]"
-            
-            extracted_contents.append({
-                "url": url,
-                "title": title,
-                "content": content
-            })
-            
-            console.print(f"✅ Successfully extracted [bold]{len(content)}[/] characters")
-        except Exception as e:
-            console.print(f"❌ Extraction failed: {str(e)}")
+        # Truncate content if it's too long (to avoid token limits)
+        truncated_content = llm.truncate_to_tokens(content, MAX_CONTENT_TOKENS)
+        if len(truncated_content) < len(content):
+            content = truncated_content + "...\n[Content truncated due to length]"
+        
+        extracted_contents.append({
+            "url": url,
+            "title": title,
+            "content": content
+        })
+        
+        console.print(f"✅ Successfully extracted [bold]{len(content)}[/] characters from {title}")
     
     # Display the extracted content
     if extracted_contents:
@@ -187,6 +490,9 @@ def main():
                 title=f"Content {i}/{len(extracted_contents)}",
                 border_style="green"
             ))
+        
+        if args.output_dir:
+            console.print(f"\n[bold green]Full content saved to:[/] {args.output_dir}")
     else:
         console.print("[bold yellow]No content was successfully extracted[/]")
 
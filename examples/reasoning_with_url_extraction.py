@@ -7,7 +7,9 @@ to solve complex tasks that require retrieving and analyzing information from th
 
 import os
 import sys
+import asyncio
 import argparse
+import requests
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
@@ -20,6 +22,13 @@ from llm_research.reasoning import Reasoning
 from llm_research.llm.openai import OpenAILLM
 from llm_research.web_search import get_web_search_tool
 
+# Use uvloop's faster event loop when it is installed
+try:
+    import uvloop
+    run_async = uvloop.run
+except ImportError:
+    run_async = asyncio.run
+
 
 def main():
     """Main entry point for the example script."""
@@ -39,6 +48,9 @@ def main():
     # Load the configuration
     config = Config()
     
+    # Share one keep-alive HTTP session between the web search and the LLM
+    session = requests.Session()
+    
     # Get the API key from the parameter, environment variable, or config
     api_key = args.bocha_api_key or os.environ.get("BOCHA_API_KEY")
     
@@ -51,7 +63,7 @@ def main():
     web_search_tool = None
     if not args.no_web_search and api_key:
         try:
-            web_search_tool = get_web_search_tool(api_key=api_key)
+            web_search_tool = get_web_search_tool(api_key=api_key, session=session)
             console.print("[bold green]Web search enabled using Bocha API[/]")
         except Exception as e:
             console.print(f"[bold red]Error initializing web search:[/] {e}", style="red")
@@ -65,16 +77,31 @@ def main():
     llm = OpenAILLM(
         model=provider_config.get("model", "gpt-3.5-turbo"),
         base_url=provider_config.get("base_url", "https://api.openai.com/v1"),
-        api_key=provider_config["api_key"]
+        api_key=provider_config["api_key"],
+        session=session
     )
     
+    # Optionally use a cheaper model just for picking which URLs to extract
+    selector_llm = None
+    selector_model = os.environ.get("SELECTOR_MODEL")
+    if selector_model:
+        selector_llm = OpenAILLM(
+            model=selector_model,
+            base_url=provider_config.get("base_url", "https://api.openai.com/v1"),
+            api_key=provider_config["api_key"],
+            session=session
+        )
+        console.print(f"[bold green]URL selector model:[/] {selector_model}")
+    
     # Create the reasoning manager
     reasoning = Reasoning(
         llm=llm,
         max_steps=args.steps,
         temperature=0.7,
         web_search=web_search_tool,
-        extract_url_content=not args.no_url_extraction
+        extract_url_content=not args.no_url_extraction,
+        cache_url_content=True,
+        selector_llm=selector_llm
     )
     
     # Display URL extraction status
@@ -94,14 +121,14 @@ def main():
         border_style="blue"
     ))
     
-    # Solve the task
+    # Solve the task, running independent subtasks concurrently
     try:
-        result = reasoning.solve_task(
+        result = run_async(reasoning.solve_task_async(
             task=args.task,
             max_retries=args.retries,
             web_search_enabled=not args.no_web_search,
             extract_url_content=not args.no_url_extraction
-        )
+        ))
         
         # Display the result
         console.print("\n[bold green]Result:[/]")
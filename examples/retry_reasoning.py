@@ -51,7 +51,8 @@ def main():
         return
     
     # Create a reasoning manager
-    reasoning = Reasoning(llm, max_steps=args.steps)
+    # Only the three most recent subtask results are sent with each subtask
+    reasoning = Reasoning(llm, max_steps=args.steps, previous_results_window=3)
     
     print("\nSolving task with multi-step reasoning and retry mechanism...")
     print(f"Task: {args.task}")
@@ -4,6 +4,7 @@ Simple chat example using the LLMResearch package.
 
 import os
 import sys
+import time
 from dotenv import load_dotenv
 
 # Add the parent directory to the path
@@ -12,6 +13,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from llm_research.config import Config
 from llm_research.conversation import Conversation
 
+# Minimum interval between flushes of streamed output (in seconds)
+FLUSH_INTERVAL = 0.032
+
 
 def main():
     """
@@ -58,6 +62,10 @@ def main():
     print("Type 'exit' or 'quit' to end the conversation.")
     print()
     
+    # Write streamed chunks straight to the binary stdout buffer
+    out = sys.stdout.buffer
+    encoding = sys.stdout.encoding or "utf-8"
+    
     # Start the chat loop
     while True:
         # Get user input
@@ -74,11 +82,19 @@ def main():
         print("Assistant: ", end="", flush=True)
         
         try:
-            # Use streaming for a more interactive experience
+            # Use streaming for a more interactive experience, flushing at most
+            # once per FLUSH_INTERVAL to keep the number of writes down
+            last_flush = time.monotonic()
             for chunk in conversation.generate_response_stream(temperature=0.7):
-                print(chunk, end="", flush=True)
-            print()
+                out.write(chunk.encode(encoding, errors="replace"))
+                now = time.monotonic()
+                if now - last_flush >= FLUSH_INTERVAL:
+                    out.flush()
+                    last_flush = now
+            out.write(b"\n")
+            out.flush()
         except Exception as e:
+            out.flush()
             print(f"Error: {e}")
     
     print("\nThank you for chatting!")
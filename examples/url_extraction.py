@@ -6,7 +6,9 @@ This script shows how to use the URL extraction functionality programmatically.
 
 import os
 import sys
+import asyncio
 import argparse
+from functools import partial
 from rich.console import Console
 from rich.markdown import Markdown
 
@@ -14,9 +16,11 @@ from rich.markdown import Markdown
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from llm_research.url_extractor import get_url_extractor
+from llm_research.file_handler import FileHandler
 from llm_research.llm.base import BaseLLM
 from llm_research.config import Config
 from llm_research.llm.openai import OpenAILLM
+from llm_research.llm.cache import CachingLLM
 
 
 def get_llm_provider(config, provider_name=None):
@@ -40,6 +44,72 @@ def get_llm_provider(config, provider_name=None):
         )
 
 
+async def run(args, console: Console) -> None:
+    """
+    Extract, save and analyze the content of a URL.
+    
+    Args:
+        args: The parsed command line arguments
+        console: The console to print to
+    """
+    loop = asyncio.get_running_loop()
+    
+    # Get the URL extractor
+    url_extractor = get_url_extractor(use_cache=True)
+    
+    # Extract the content
+    console.print(f"[bold blue]Extracting content from URL:[/] {args.url}")
+    content = await loop.run_in_executor(
+        None,
+        partial(url_extractor.extract_content, args.url, output_format=args.format)
+    )
+    
+    # Save to file if requested, in the background so the write overlaps
+    # with displaying and analyzing the content
+    save_task = None
+    if args.output:
+        save_task = asyncio.ensure_future(FileHandler().write_file_async(args.output, content))
+    
+    # Display the content
+    if not args.analyze:
+        console.print("\n[bold]Extracted content:[/]")
+        if args.format == 'markdown':
+            console.print(Markdown(content))
+        else:
+            console.print(content)
+    
+    # Analyze the content if requested
+    if args.analyze:
+        console.print("\n[bold yellow]Analyzing content...[/]")
+        
+        # Get the LLM provider
+        config = Config()
+        llm = CachingLLM(get_llm_provider(config, args.provider))
+        
+        # Generate a prompt for analysis
+        prompt = f"""
+        Please analyze the following content extracted from {args.url}:
+        
+        {llm.truncate_to_tokens(content, 1000)}  # Limit content to avoid token limits
+        
+        Provide a summary of the key points, main topics, and any important insights.
+        """
+        
+        # Generate the analysis
+        response = await loop.run_in_executor(
+            None,
+            partial(llm.generate, prompt=prompt, temperature=0.7)
+        )
+        
+        # Display the analysis
+        console.print("\n[bold green]Analysis:[/]")
+        console.print(response["text"])
+    
+    if save_task is not None:
+        await save_task
+        console.print(f"[bold green]Content saved to:[/] {args.output}")
+
+
 def main():
     """Main entry point for the example script."""
     # Parse command line arguments
@@ -55,51 +125,7 @@ def main():
     console = Console()
     
     try:
-        # Get the URL extractor
-        url_extractor = get_url_extractor()
-        
-        # Extract the content
-        console.print(f"[bold blue]Extracting content from URL:[/] {args.url}")
-        content = url_extractor.extract_content(args.url, output_format=args.format)
-        
-        # Save to file if requested
-        if args.output:
-            with open(args.output, "w", encoding="utf-8") as f:
-                f.write(content)
-            console.print(f"[bold green]Content saved to:[/] {args.output}")
-        
-        # Display the content
-        if not args.analyze:
-            console.print("\n[bold]Extracted content:[/]")
-            if args.format == 'markdown':
-                console.print(Markdown(content))
-            else:
-                console.print(content)
-        
-        # Analyze the content if requested
-        if args.analyze:
-            console.print("\n[bold yellow]Analyzing content...[/]")
-            
-            # Get the LLM provider
-            config = Config()
-            llm = get_llm_provider(config, args.provider)
-            
-            # Generate a prompt for analysis
-            prompt = f"""
-            Please analyze the following content extracted from {args.url}:
-            
-            {content[:4000]}  # Limit content to avoid token limits
-            
-            Provide a summary of the key points, main topics, and any important insights.
-            """
-            
-            # Generate the analysis
-            response = llm.generate(prompt=prompt, temperature=0.7)
-            
-            # Display the analysis
-            console.print("\n[bold green]Analysis:[/]")
-            console.print(response["text"])
-            
+        asyncio.run(run(args, console))
     except Exception as e:
         console.print(f"[bold red]Error:[/] {str(e)}", style="red")
         sys.exit(1)
@@ -7,6 +7,7 @@ This example demonstrates how to use the web search feature in the reasoning pro
 import os
 import sys
 import argparse
+import asyncio
 import getpass
 from dotenv import load_dotenv
 
@@ -16,6 +17,15 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from llm_research.config import Config
 from llm_research.reasoning import Reasoning
 from llm_research.web_search import get_web_search_tool
+from llm_research.llm.cache import CachingLLM
+from llm_research.http_client import get_http_client
+
+# Use uvloop's faster event loop when it is installed
+try:
+    import uvloop
+    run_async = uvloop.run
+except ImportError:
+    run_async = asyncio.run
 
 
 def main():
@@ -29,6 +39,10 @@ def main():
     parser.add_argument("--retries", "-r", type=int, default=3, help="Maximum number of retry attempts per subtask")
     parser.add_argument("--provider", "-p", help="The LLM provider to use")
     parser.add_argument("--bocha-api-key", "-k", help="Bocha API key for web search")
+    parser.add_argument("--parallel", action="store_true", help="Solve independent subtasks concurrently")
+    parser.add_argument("--batch-size", type=int, default=1, help="Number of independent subtasks answered in one LLM call")
+    parser.add_argument("--no-cache", action="store_true", help="Don't cache LLM completions and search results on disk")
+    parser.add_argument("--cache-all", action="store_true", help="Also cache LLM completions sampled at temperature 0.3 or above")
     args = parser.parse_args()
     
     # Load environment variables from .env file
@@ -41,6 +55,10 @@ def main():
     # Create a configuration manager
     config = Config()
     
+    # Share one keep-alive session between the LLM provider and the web search
+    # tool, so connections are reused across the whole reasoning loop
+    session = get_http_client(http2=False)
+    
     # Get the LLM provider
     try:
         # This will automatically use the configuration from the .env file
@@ -48,7 +66,12 @@ def main():
         
         # Get the LLM provider from the configuration
         from llm_research.main import get_llm_provider
-        llm = get_llm_provider(config, provider_name)
+        llm = get_llm_provider(config, provider_name, session=session)
+        
+        # Cache completions so retries on identical prompts return immediately;
+        # sampled (higher temperature) completions are only cached with --cache-all
+        if not args.no_cache:
+            llm = CachingLLM(llm, max_temperature=float("inf") if args.cache_all else 0.2)
     except ValueError as e:
         print(f"Error: {e}")
         return
@@ -78,7 +101,7 @@ def main():
                 config.set_provider_config("bocha", bocha_config)
         
         if api_key:
-            web_search_tool = get_web_search_tool(api_key=api_key)
+            web_search_tool = get_web_search_tool(api_key=api_key, session=session, use_cache=not args.no_cache)
             print("Web search enabled using Bocha API")
         else:
             print("Web search disabled: No API key provided")
@@ -86,23 +109,34 @@ def main():
         print(f"Error initializing web search: {e}")
     
     # Create a reasoning manager with web search
-    reasoning = Reasoning(llm, max_steps=args.steps, web_search=web_search_tool)
+    reasoning = Reasoning(llm, max_steps=args.steps, web_search=web_search_tool, batch_size=args.batch_size)
     
     print("\nSolving task with multi-step reasoning and web search...")
     print(f"Task: {args.task}")
     print(f"Using {args.steps} reasoning steps")
     print(f"Maximum retries per subtask: {args.retries}")
+    if args.parallel:
+        print("Solving independent subtasks concurrently")
     print("\nThinking...\n")
     
     # Solve the task with web search
     try:
-        result = reasoning.solve_task(
-            task=args.task,
-            max_tokens=1000,
-            temperature=0.7,
-            max_retries=args.retries,
-            web_search_enabled=True
-        )
+        if args.parallel:
+            result = run_async(reasoning.solve_task_async(
+                task=args.task,
+                max_tokens=1000,
+                temperature=0.7,
+                max_retries=args.retries,
+                web_search_enabled=True
+            ))
+        else:
+            result = reasoning.solve_task(
+                task=args.task,
+                max_tokens=1000,
+                temperature=0.7,
+                max_retries=args.retries,
+                web_search_enabled=True
+            )
         
         print("\nFinal Result:")
         print(result)
@@ -118,6 +152,8 @@ def main():
         
     except Exception as e:
         print(f"Error during reasoning: {e}")
+    finally:
+        session.close()
 
 
 if __name__ == "__main__":
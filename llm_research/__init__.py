@@ -8,7 +8,7 @@ from llm_research.config import Config
 from llm_research.file_handler import FileHandler
 from llm_research.conversation import Conversation, Message
 from llm_research.reasoning import Reasoning, ReasoningStep
-from llm_research.llm import BaseLLM, OpenAILLM, CustomLLM
+from llm_research.llm import BaseLLM, OpenAILLM, CustomLLM, CachingLLM
 
 __all__ = [
     "Config",
@@ -20,4 +20,5 @@ __all__ = [
     "BaseLLM",
     "OpenAILLM",
     "CustomLLM",
+    "CachingLLM",
 ]
\ No newline at end of file
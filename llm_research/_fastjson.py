@@ -0,0 +1,73 @@
+"""
+JSON encoding and decoding, using orjson when it is installed.
+
+Both implementations encode to bytes, which can be written to files or fed to
+hash functions without another encoding step.
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Raised for invalid input by both implementations (orjson.JSONDecodeError
+# subclasses json.JSONDecodeError)
+JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(
+    obj: Any,
+    sort_keys: bool = False,
+    indent: bool = False,
+    default: Optional[Callable[[Any], Any]] = None
+) -> bytes:
+    """
+    Serialize an object to JSON.
+
+    Args:
+        obj: The object to serialize
+        sort_keys: Whether to sort dictionary keys, e.g. for stable cache keys (default: False)
+        indent: Whether to indent the output by two spaces (default: False)
+        default: Function that converts otherwise unsupported objects (optional)
+
+    Returns:
+        The UTF-8 encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        option = 0
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    return json.dumps(
+        obj,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        default=default
+    ).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize JSON.
+
+    Args:
+        data: The JSON, as bytes or a string
+
+    Returns:
+        The deserialized object
+
+    Raises:
+        JSONDecodeError: If the data isn't valid JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+
+    return json.loads(data)
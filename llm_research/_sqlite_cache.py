@@ -0,0 +1,93 @@
+"""
+Persistent key-value store in SQLite, shared by the on-disk caches.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, Union
+
+
+class SQLiteCache:
+    """
+    Thread-safe key-value store backed by an SQLite database.
+    
+    Every entry records when it was written, so lookups can skip entries older
+    than a time-to-live and expired entries can be deleted.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the cache database.
+        
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        
+        # Create the cache directory if it doesn't exist
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        
+        # The connection may be shared by worker threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, ts INTEGER, body BLOB)"
+        )
+    
+    def get(self, key: str, ttl: Optional[int] = None) -> Optional[Union[str, bytes]]:
+        """
+        Get the body of an entry.
+        
+        Args:
+            key: The cache key
+            ttl: Time-to-live for entries (in seconds), or None if entries don't expire
+        
+        Returns:
+            The stored body, or None if there is no fresh entry
+        """
+        with self._lock:
+            if ttl is None:
+                row = self._conn.execute("SELECT body FROM cache WHERE key = ?", (key,)).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT body FROM cache WHERE key = ? AND ts > ?", (key, int(time.time()) - ttl)
+                ).fetchone()
+        
+        return row[0] if row else None
+    
+    def set(self, key: str, body: Union[str, bytes]) -> None:
+        """
+        Store the body of an entry, replacing any previous entry.
+        
+        Args:
+            key: The cache key
+            body: The body to store
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, ts, body) VALUES (?, ?, ?)",
+                (key, int(time.time()), body)
+            )
+    
+    def prune(self, ttl: int) -> None:
+        """
+        Delete expired entries, so the database doesn't grow without bound.
+        
+        Args:
+            ttl: Time-to-live for entries (in seconds)
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE ts <= ?", (int(time.time()) - ttl,))
+    
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
@@ -4,10 +4,12 @@ Configuration management for LLM providers.
 
 import os
 import json
-import yaml
-from typing import Dict, Any, Optional, List
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Tuple, Iterator
 from pathlib import Path
-from dotenv import load_dotenv
+
+from llm_research import _fastjson
 
 
 class Config:
@@ -17,6 +19,11 @@ class Config:
     This class handles loading, saving, and managing LLM configurations.
     """
     
+    # YAML loader and dumper, resolved on first use so importing the package
+    # doesn't pay for importing PyYAML
+    _yaml_loader: Any = None
+    _yaml_dumper: Any = None
+    
     def __init__(self, config_path: Optional[str] = None, env_file: Optional[str] = None):
         """
         Initialize the configuration manager.
@@ -25,13 +32,16 @@ class Config:
             config_path: Path to the configuration file (optional)
             env_file: Path to the .env file (optional)
         """
-        # Load environment variables from .env file
+        # Load environment variables from .env file (python-dotenv is only
+        # imported when there is a file to load)
         if env_file and os.path.exists(env_file):
+            from dotenv import load_dotenv
             load_dotenv(env_file)
         else:
             # Try to load from default locations
             for env_path in ['.env', os.path.join(os.path.dirname(__file__), '..', '.env')]:
                 if os.path.exists(env_path):
+                    from dotenv import load_dotenv
                     load_dotenv(env_path)
                     break
         
@@ -42,11 +52,18 @@ class Config:
         else:
             self.config_path = config_path
         
+        # JSON copy of a YAML config file, used to skip YAML parsing on startup
+        self.cache_path = self.config_path + ".cache.json"
+        
         # Create the config directory if it doesn't exist
         config_dir = os.path.dirname(self.config_path)
         if config_dir:  # Only create directory if path is not empty
             os.makedirs(config_dir, exist_ok=True)
         
+        # Writes are deferred while inside batch_update()
+        self._save_suspended = 0
+        self._dirty = False
+        
         # Load the configuration
         self.config = self._load_config()
         
@@ -57,52 +74,49 @@ class Config:
         """
         Update the configuration with environment variables.
         """
+        env = os.environ
+        
         # Ensure the llm_providers section exists
-        if "llm_providers" not in self.config:
-            self.config["llm_providers"] = {}
+        providers = self.config.setdefault("llm_providers", {})
         
         # Update OpenAI configuration
-        openai_api_key = os.environ.get("OPENAI_API_KEY")
-        openai_base_url = os.environ.get("OPENAI_BASE_URL")
-        openai_model = os.environ.get("OPENAI_MODEL")
+        openai_api_key = env.get("OPENAI_API_KEY")
+        openai_base_url = env.get("OPENAI_BASE_URL")
+        openai_model = env.get("OPENAI_MODEL")
         
-        if any([openai_api_key, openai_base_url, openai_model]):
-            if "openai" not in self.config["llm_providers"]:
-                self.config["llm_providers"]["openai"] = {}
+        if openai_api_key or openai_base_url or openai_model:
+            openai_config = providers.setdefault("openai", {})
             
             if openai_api_key:
-                self.config["llm_providers"]["openai"]["api_key"] = openai_api_key
+                openai_config["api_key"] = openai_api_key
             
             if openai_base_url:
-                self.config["llm_providers"]["openai"]["base_url"] = openai_base_url
+                openai_config["base_url"] = openai_base_url
             
             if openai_model:
-                self.config["llm_providers"]["openai"]["model"] = openai_model
+                openai_config["model"] = openai_model
         
         # Update custom LLM configuration
-        custom_llm_name = os.environ.get("CUSTOM_LLM_NAME")
-        custom_llm_api_key = os.environ.get("CUSTOM_LLM_API_KEY")
-        custom_llm_base_url = os.environ.get("CUSTOM_LLM_BASE_URL")
-        custom_llm_model = os.environ.get("CUSTOM_LLM_MODEL")
-        
-        if custom_llm_name and any([custom_llm_api_key, custom_llm_base_url, custom_llm_model]):
-            if custom_llm_name not in self.config["llm_providers"]:
-                self.config["llm_providers"][custom_llm_name] = {
-                    "type": "custom"
-                }
+        custom_llm_name = env.get("CUSTOM_LLM_NAME")
+        custom_llm_api_key = env.get("CUSTOM_LLM_API_KEY")
+        custom_llm_base_url = env.get("CUSTOM_LLM_BASE_URL")
+        custom_llm_model = env.get("CUSTOM_LLM_MODEL")
+        
+        if custom_llm_name and (custom_llm_api_key or custom_llm_base_url or custom_llm_model):
+            custom_config = providers.setdefault(custom_llm_name, {"type": "custom"})
             
             if custom_llm_api_key:
-                self.config["llm_providers"][custom_llm_name]["api_key"] = custom_llm_api_key
+                custom_config["api_key"] = custom_llm_api_key
             
             if custom_llm_base_url:
-                self.config["llm_providers"][custom_llm_name]["base_url"] = custom_llm_base_url
+                custom_config["base_url"] = custom_llm_base_url
             
             if custom_llm_model:
-                self.config["llm_providers"][custom_llm_name]["model"] = custom_llm_model
+                custom_config["model"] = custom_llm_model
         
         # Update default provider
-        default_provider = os.environ.get("DEFAULT_LLM_PROVIDER")
-        if default_provider and default_provider in self.config["llm_providers"]:
+        default_provider = env.get("DEFAULT_LLM_PROVIDER")
+        if default_provider and default_provider in providers:
             self.config["default_provider"] = default_provider
     
     def _load_config(self) -> Dict[str, Any]:
@@ -131,12 +145,114 @@ class Config:
             
             return default_config
         
+        if not self._is_yaml():
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        
+        # Reuse the JSON copy of an unchanged YAML file, which is much faster to parse
+        config = self._load_cache()
+        if config is not None:
+            return config
+        
         # Load the configuration from the file
+        yaml, loader, _ = self._yaml()
         with open(self.config_path, "r", encoding="utf-8") as f:
-            if self.config_path.endswith(".yaml") or self.config_path.endswith(".yml"):
-                return yaml.safe_load(f) or {}
-            else:
-                return json.load(f)
+            config = yaml.load(f, Loader=loader) or {}
+        
+        self._write_cache(config)
+        return config
+    
+    @classmethod
+    def _yaml(cls) -> Tuple[Any, Any, Any]:
+        """
+        Import PyYAML and resolve the fastest available safe loader and dumper.
+        
+        Returns:
+            A tuple of the yaml module, the loader class and the dumper class
+        """
+        import yaml
+        
+        if cls._yaml_loader is None:
+            # Use the libyaml C bindings when PyYAML was built with them
+            cls._yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            cls._yaml_dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        
+        return yaml, cls._yaml_loader, cls._yaml_dumper
+    
+    def _is_yaml(self) -> bool:
+        """
+        Check whether the config file is a YAML file.
+        
+        Returns:
+            True if the config file is a YAML file, False for JSON
+        """
+        return self.config_path.endswith(".yaml") or self.config_path.endswith(".yml")
+    
+    def _load_cache(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the JSON copy of the YAML config file if it is up to date.
+        
+        Returns:
+            The cached configuration, or None if there is no fresh cache
+        """
+        try:
+            stat = os.stat(self.config_path)
+            with open(self.cache_path, "rb") as f:
+                cache = _fastjson.loads(f.read())
+            
+            # The cache is only valid for the exact YAML file it was made from
+            if cache["mtime_ns"] == stat.st_mtime_ns and cache["size"] == stat.st_size:
+                return cache["config"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # A missing or corrupt cache falls back to parsing the YAML
+            pass
+        
+        return None
+    
+    def _write_cache(self, config: Dict[str, Any]) -> None:
+        """
+        Write a JSON copy of the YAML config file.
+        
+        Args:
+            config: The configuration dictionary
+        """
+        try:
+            stat = os.stat(self.config_path)
+            data = _fastjson.dumps({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "config": config})
+            self._write_atomic(self.cache_path, data, sync=False)
+        except (OSError, TypeError, ValueError):
+            # The cache is only an optimization
+            pass
+    
+    @staticmethod
+    def _write_atomic(path: str, data: bytes, sync: bool = True) -> None:
+        """
+        Replace a file's contents atomically.
+        
+        The data is written to a temporary file in the same directory which is
+        then renamed over the target, so a crash never leaves a truncated file.
+        
+        Args:
+            path: Path to the file
+            data: The new file contents
+            sync: Whether to flush the data to disk before renaming (default: True)
+        """
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".",
+            prefix=os.path.basename(path) + ".",
+            suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     def _save_config(self, config: Dict[str, Any]) -> None:
         """
@@ -145,11 +261,43 @@ class Config:
         Args:
             config: The configuration dictionary
         """
-        with open(self.config_path, "w", encoding="utf-8") as f:
-            if self.config_path.endswith(".yaml") or self.config_path.endswith(".yml"):
-                yaml.dump(config, f, default_flow_style=False)
-            else:
-                json.dump(config, f, indent=2)
+        # Inside batch_update() the configuration is written once on exit
+        if self._save_suspended:
+            self._dirty = True
+            return
+        
+        # Serialize in memory first so the file is written with a single call
+        if self._is_yaml():
+            yaml, _, dumper = self._yaml()
+            data = yaml.dump(config, Dumper=dumper, default_flow_style=False)
+        else:
+            data = json.dumps(config, indent=2)
+        
+        self._write_atomic(self.config_path, data.encode("utf-8"))
+        
+        # Keep the JSON copy in sync with the new YAML file
+        if self._is_yaml():
+            self._write_cache(config)
+    
+    @contextmanager
+    def batch_update(self) -> Iterator["Config"]:
+        """
+        Group several changes into a single write of the config file.
+        
+        Changes made inside the block are saved once when the outermost block
+        exits, instead of after each change.
+        
+        Yields:
+            The configuration manager
+        """
+        self._save_suspended += 1
+        try:
+            yield self
+        finally:
+            self._save_suspended -= 1
+            if not self._save_suspended and self._dirty:
+                self._dirty = False
+                self._save_config(self.config)
     
     def get_provider_config(self, provider_name: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -2,15 +2,30 @@
 Conversation management for LLM interactions.
 """
 
-import json
+import sys
 import time
-from typing import List, Dict, Any, Optional, Union
-from dataclasses import dataclass, field, asdict
+from collections import deque
+from typing import List, Dict, Any, Optional, Union, Deque
+from dataclasses import dataclass, field
 
 from llm_research.llm.base import BaseLLM
+from llm_research import _fastjson
 
 
-@dataclass
+# Prefix of each message in prompts built for providers without a chat API
+_ROLE_PREFIXES = {
+    "system": "System: ",
+    "user": "User: ",
+    "assistant": "Assistant: ",
+    "function": "Function: ",
+}
+
+# Messages are created for every turn, so they use __slots__ instead of a
+# per-instance __dict__ where dataclasses support it (Python 3.10+)
+_MESSAGE_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_MESSAGE_DATACLASS_OPTIONS)
 class Message:
     """
     A message in a conversation.
@@ -18,7 +33,15 @@ class Message:
     role: str  # "system", "user", "assistant", or "function"
     content: str
     timestamp: float = field(default_factory=time.time)
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)  # JSON-serializable values only
+    # Number of tokens in the content, counted once by the conversation's LLM
+    token_count: Optional[int] = field(default=None, compare=False, repr=False)
+    # The message in the LLM API format, built once since messages aren't
+    # modified after they are created
+    _formatted: Dict[str, str] = field(init=False, compare=False, repr=False)
+    
+    def __post_init__(self):
+        self._formatted = {"role": self.role, "content": self.content}
 
 
 class Conversation:
@@ -48,7 +71,12 @@ class Conversation:
         self.llm = llm
         self.max_history = max_history
         self.token_limit = token_limit
-        self.messages: List[Message] = []
+        # The oldest messages are dropped automatically once max_history is reached
+        self.messages: Deque[Message] = deque(maxlen=max_history)
+        
+        # The first system message, kept so clearing the conversation doesn't
+        # have to search for it
+        self._system_message: Optional[Message] = None
         
         # Add the system message if provided
         if system_message:
@@ -61,17 +89,21 @@ class Conversation:
         Args:
             role: The role of the message sender ("system", "user", "assistant", or "function")
             content: The message content
-            metadata: Additional metadata for the message (optional)
+            metadata: Additional metadata for the message (optional, must be
+                JSON-serializable since it is saved with the conversation)
         """
-        self.messages.append(Message(
+        # The system message is counted once up front, since it is part of every
+        # prompt; other messages are counted when a prompt is first built
+        message = Message(
             role=role,
             content=content,
-            metadata=metadata or {}
-        ))
+            metadata=metadata or {},
+            token_count=self.llm.count_tokens(content) if role == "system" else None
+        )
+        self.messages.append(message)
         
-        # Trim the history if it exceeds the maximum
-        if len(self.messages) > self.max_history:
-            self.messages = self.messages[-self.max_history:]
+        if role == "system" and self._system_message is None:
+            self._system_message = message
     
     def get_messages(self) -> List[Message]:
         """
@@ -80,7 +112,7 @@ class Conversation:
         Returns:
             A list of messages
         """
-        return self.messages
+        return list(self.messages)
     
     def get_formatted_messages(self) -> List[Dict[str, str]]:
         """
@@ -89,7 +121,7 @@ class Conversation:
         Returns:
             A list of message dictionaries
         """
-        return [{"role": msg.role, "content": msg.content} for msg in self.messages]
+        return [msg._formatted for msg in self.messages]
     
     def get_prompt(self) -> str:
         """
@@ -98,38 +130,58 @@ class Conversation:
         Returns:
             The formatted prompt
         """
-        prompt = ""
+        parts = []
+        append = parts.append
         
         for msg in self.messages:
-            if msg.role == "system":
-                prompt += f"System: {msg.content}\n\n"
-            elif msg.role == "user":
-                prompt += f"User: {msg.content}\n\n"
-            elif msg.role == "assistant":
-                prompt += f"Assistant: {msg.content}\n\n"
-            elif msg.role == "function":
-                prompt += f"Function: {msg.content}\n\n"
-        
-        prompt += "Assistant: "
-        
-        return prompt
+            # Messages with other roles are left out of the prompt
+            prefix = _ROLE_PREFIXES.get(msg.role)
+            if prefix is not None:
+                append(prefix)
+                append(msg.content)
+                append("\n\n")
+        
+        append("Assistant: ")
+        
+        return "".join(parts)
     
-    def _trim_messages_to_token_limit(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    def _get_token_counts(self) -> List[int]:
+        """
+        Get the number of tokens in each message, counting each message only once.
+        
+        Returns:
+            A list of token counts, one per message
+        """
+        # Count the messages that haven't been counted yet in one batch
+        uncounted = [msg for msg in self.messages if msg.token_count is None]
+        if uncounted:
+            counts = self.llm.count_tokens_batch([msg.content for msg in uncounted])
+            for msg, count in zip(uncounted, counts):
+                msg.token_count = count
+        
+        return [msg.token_count for msg in self.messages]
+    
+    def _trim_messages_to_token_limit(
+        self,
+        messages: List[Dict[str, str]],
+        token_counts: Optional[List[int]] = None
+    ) -> List[Dict[str, str]]:
         """
         Trim messages to fit within the token limit.
         
         Args:
             messages: The messages to trim
+            token_counts: The number of tokens in each message's content (optional,
+                counted here if not provided)
             
         Returns:
             The trimmed messages
         """
-        # Count tokens in the messages
-        total_tokens = 0
-        for msg in messages:
-            total_tokens += self.llm.count_tokens(msg["content"])
-            # Add some overhead for the message format
-            total_tokens += 4  # Approximate overhead per message
+        if token_counts is None:
+            token_counts = self.llm.count_tokens_batch([msg["content"] for msg in messages])
+        
+        # Count tokens in the messages, adding some overhead for the message format
+        total_tokens = sum(token_counts) + 4 * len(messages)  # Approximate overhead per message
         
         # If we're within the limit, return the messages as is
         if total_tokens <= self.token_limit:
@@ -141,39 +193,77 @@ class Conversation:
         
         # Always keep the system message if present
         if messages and messages[0]["role"] == "system":
-            system_msg = messages[0]
-            system_tokens = self.llm.count_tokens(system_msg["content"]) + 4
-            trimmed_messages.append(system_msg)
-            current_tokens += system_tokens
+            trimmed_messages.append(messages[0])
+            current_tokens += token_counts[0] + 4
             messages = messages[1:]
+            token_counts = token_counts[1:]
+        
+        # Earlier messages are inserted after the system message, if kept
+        first_index = len(trimmed_messages)
         
         # Add messages from the end (most recent first)
-        for msg in reversed(messages):
-            msg_tokens = self.llm.count_tokens(msg["content"]) + 4
+        for msg, content_tokens in zip(reversed(messages), reversed(token_counts)):
+            msg_tokens = content_tokens + 4
             
             if current_tokens + msg_tokens <= self.token_limit:
-                trimmed_messages.insert(0, msg)
+                trimmed_messages.insert(first_index, msg)
                 current_tokens += msg_tokens
             else:
                 # If we can't add the full message, try to add a truncated version
                 available_tokens = self.token_limit - current_tokens - 4
                 if available_tokens > 20:  # Only add if we can include a meaningful amount
-                    # Truncate the message content
-                    truncated_content = msg["content"]
-                    while self.llm.count_tokens(truncated_content) > available_tokens:
-                        # Remove ~10% of the content at a time
-                        truncate_point = int(len(truncated_content) * 0.9)
-                        truncated_content = truncated_content[:truncate_point]
+                    # Truncate the message content (cut at exact token boundaries
+                    # when the provider has a tokenizer)
+                    truncated_content = self.llm.truncate_to_tokens(msg["content"], available_tokens)
                     
                     # Add the truncated message
                     truncated_msg = msg.copy()
                     truncated_msg["content"] = truncated_content + "..."
-                    trimmed_messages.insert(0, truncated_msg)
+                    trimmed_messages.insert(first_index, truncated_msg)
                 
                 break
         
         return trimmed_messages
     
+    def trim_to(self, max_tokens: Optional[int] = None) -> int:
+        """
+        Drop the oldest messages that no longer fit in the token budget.
+        
+        The system message is always kept, as is the oldest message that still
+        partly fits (it is truncated when the prompt is built). Dropping the rest
+        keeps the cost of building each prompt bounded however long the
+        conversation gets.
+        
+        Args:
+            max_tokens: The token budget (optional, defaults to the token limit)
+            
+        Returns:
+            The number of messages dropped
+        """
+        if max_tokens is None:
+            max_tokens = self.token_limit
+        
+        messages = list(self.messages)
+        token_counts = self._get_token_counts()
+        
+        # Always keep the system message if present
+        first_index = 1 if messages and messages[0].role == "system" else 0
+        current_tokens = token_counts[0] + 4 if first_index else 0
+        
+        # Walk back from the most recent message to the oldest one that fits
+        first_kept = len(messages)
+        for i in range(len(messages) - 1, first_index - 1, -1):
+            first_kept = i
+            current_tokens += token_counts[i] + 4
+            if current_tokens > max_tokens:
+                break
+        
+        dropped = first_kept - first_index
+        if dropped > 0:
+            self.messages = deque(messages[:first_index] + messages[first_kept:], maxlen=self.max_history)
+        
+        return dropped
+    
     def generate_response(
         self,
         max_tokens: Optional[int] = None,
@@ -195,7 +285,7 @@ class Conversation:
         messages = self.get_formatted_messages()
         
         # Trim the messages to fit within the token limit
-        messages = self._trim_messages_to_token_limit(messages)
+        messages = self._trim_messages_to_token_limit(messages, self._get_token_counts())
         
         # Generate the response
         if hasattr(self.llm, "chat") and callable(getattr(self.llm, "chat")):
@@ -244,7 +334,7 @@ class Conversation:
         messages = self.get_formatted_messages()
         
         # Trim the messages to fit within the token limit
-        messages = self._trim_messages_to_token_limit(messages)
+        messages = self._trim_messages_to_token_limit(messages, self._get_token_counts())
         
         # Generate the response
         if hasattr(self.llm, "chat_stream") and callable(getattr(self.llm, "chat_stream")):
@@ -265,16 +355,17 @@ class Conversation:
                 **kwargs
             )
         
-        # Collect the full response
-        full_response = ""
+        # Collect the chunks, joining them once at the end
+        chunks = []
+        append = chunks.append
         
         # Yield each chunk
         for chunk in response_stream:
-            full_response += chunk
+            append(chunk)
             yield chunk
         
         # Add the full response to the conversation
-        self.add_message("assistant", full_response)
+        self.add_message("assistant", "".join(chunks))
     
     def save_conversation(self, file_path: str) -> None:
         """
@@ -283,12 +374,22 @@ class Conversation:
         Args:
             file_path: Path to save the conversation to
         """
-        # Convert the messages to dictionaries
-        messages_dict = [asdict(msg) for msg in self.messages]
+        # Convert the messages to dictionaries (built directly rather than with
+        # asdict, which deep-copies every field; token counts depend on the LLM,
+        # so they aren't saved)
+        messages_dict = [
+            {
+                "role": msg.role,
+                "content": msg.content,
+                "timestamp": msg.timestamp,
+                "metadata": msg.metadata
+            }
+            for msg in self.messages
+        ]
         
         # Save the conversation to the file
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(messages_dict, f, indent=2)
+        with open(file_path, "wb") as f:
+            f.write(_fastjson.dumps(messages_dict, indent=True))
     
     def load_conversation(self, file_path: str) -> None:
         """
@@ -298,20 +399,21 @@ class Conversation:
             file_path: Path to load the conversation from
         """
         # Load the conversation from the file
-        with open(file_path, "r", encoding="utf-8") as f:
-            messages_dict = json.load(f)
+        with open(file_path, "rb") as f:
+            data = f.read()
+        
+        messages_dict = _fastjson.loads(data)
         
         # Convert the dictionaries to Message objects
-        self.messages = [Message(**msg) for msg in messages_dict]
+        self.messages = deque((Message(**msg) for msg in messages_dict), maxlen=self.max_history)
+        self._system_message = next((msg for msg in self.messages if msg.role == "system"), None)
     
     def clear_conversation(self) -> None:
         """
         Clear the conversation history.
         """
-        # Keep the system message if present
-        system_message = next((msg for msg in self.messages if msg.role == "system"), None)
-        
-        self.messages = []
+        self.messages.clear()
         
-        if system_message:
-            self.messages.append(system_message)
\ No newline at end of file
+        # Keep the system message if present
+        if self._system_message is not None:
+            self.messages.append(self._system_message)
\ No newline at end of file
@@ -3,10 +3,140 @@ File handling utilities for reading and processing local files.
 """
 
 import os
+import io
 import re
-from typing import List, Dict, Any, Optional, Union, Tuple
+import hashlib
+import logging
+import threading
+import mmap
+import asyncio
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Dict, Any, Optional, Union, Tuple, Callable, Iterator
 from pathlib import Path
 
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
+# Errors of batch reads are logged (without a configured handler they are
+# still written to stderr)
+_logger = logging.getLogger(__name__)
+
+# File extensions that are read as plain UTF-8 text
+TEXT_EXTENSIONS = [".txt", ".md", ".py", ".js", ".html", ".css", ".json", ".yaml", ".yml", ".xml", ".csv"]
+
+# Minimum number of pages for extracting the text of a PDF in parallel
+PARALLEL_PDF_PAGES = 16
+
+# Number of chunked texts whose chunks are kept by each file handler
+CHUNK_CACHE_SIZE = 32
+
+# Number of file contents kept in memory for files read again unchanged
+FILE_CACHE_SIZE = 32
+
+# Files larger than this (in bytes) are never kept in the file content cache,
+# so large PDFs and logs don't stay in memory after they are read
+MAX_CACHED_FILE_SIZE = 8 * 1024 * 1024
+
+# Matches the blank lines between paragraphs
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+
+# Matches the whitespace after the end of a sentence
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _advise_sequential(f: Any) -> None:
+    """
+    Tell the kernel a file will be read sequentially so it reads ahead more aggressively.
+    
+    Does nothing on platforms without posix_fadvise.
+    
+    Args:
+        f: The open file
+    """
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            # The hint is optional, e.g. unsupported on some file systems
+            pass
+
+
+@lru_cache(maxsize=FILE_CACHE_SIZE)
+def _read_file_cached(file_path: str, ext: str, mtime_ns: int, size: int) -> str:
+    """
+    Read the content of a supported file, caching it per file version.
+    
+    The modification time and size are only part of the cache key, so a
+    changed file is read again.
+    
+    Args:
+        file_path: Absolute path to the file
+        ext: The lower-case file extension
+        mtime_ns: The file's modification time (in nanoseconds)
+        size: The file's size (in bytes)
+        
+    Returns:
+        The file content as a string
+    """
+    return _read_file_content(file_path, ext)
+
+
+def _read_file_content(file_path: str, ext: str) -> str:
+    """
+    Read the content of a supported file.
+    
+    Args:
+        file_path: Path to the file
+        ext: The lower-case file extension
+        
+    Returns:
+        The file content as a string
+    """
+    # Read the file based on its extension
+    if ext in TEXT_EXTENSIONS:
+        # Text files (read() sizes its buffer from the file size and
+        # decodes the whole file at once)
+        with open(file_path, "r", encoding="utf-8") as f:
+            _advise_sequential(f)
+            return f.read()
+    
+    # PDF files
+    try:
+        import pypdf
+    except ImportError:
+        raise ImportError("pypdf is required for reading PDF files. Install it with 'pip install pypdf'.")
+    
+    with open(file_path, "rb") as f:
+        _advise_sequential(f)
+        data = f.read()
+    
+    pdf = pypdf.PdfReader(io.BytesIO(data))
+    page_count = len(pdf.pages)
+    
+    # Join the pages once rather than growing the text page by page
+    if page_count < PARALLEL_PDF_PAGES:
+        return "".join([(page.extract_text() or "") + "\n\n" for page in pdf.pages])
+    
+    # Extract the pages of long PDFs in a thread pool. A reader reads its objects
+    # lazily from one shared stream, so each worker thread opens its own reader.
+    local = threading.local()
+    
+    def extract_page(index: int) -> str:
+        reader = getattr(local, "reader", None)
+        if reader is None:
+            reader = local.reader = pypdf.PdfReader(io.BytesIO(data))
+        return (reader.pages[index].extract_text() or "") + "\n\n"
+    
+    with ThreadPoolExecutor(max_workers=min(8, page_count)) as executor:
+        return "".join(executor.map(extract_page, range(page_count)))
+
 
 class FileHandler:
     """
@@ -26,6 +156,10 @@ class FileHandler:
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        
+        # Chunks of recently chunked texts, keyed on a hash of the text and the chunk settings
+        self._chunk_cache: "OrderedDict[Tuple[bytes, int, int], Tuple[str, ...]]" = OrderedDict()
+        self._chunk_cache_lock = threading.Lock()
     
     def read_file(self, file_path: str) -> str:
         """
@@ -49,25 +183,57 @@ class FileHandler:
         _, ext = os.path.splitext(file_path)
         ext = ext.lower()
         
-        # Read the file based on its extension
-        if ext in [".txt", ".md", ".py", ".js", ".html", ".css", ".json", ".yaml", ".yml", ".xml", ".csv"]:
-            # Text files
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        elif ext == ".pdf":
-            # PDF files
-            try:
-                import pypdf
-                with open(file_path, "rb") as f:
-                    pdf = pypdf.PdfReader(f)
-                    text = ""
-                    for page in pdf.pages:
-                        text += page.extract_text() + "\n\n"
-                    return text
-            except ImportError:
-                raise ImportError("pypdf is required for reading PDF files. Install it with 'pip install pypdf'.")
-        else:
+        if ext not in TEXT_EXTENSIONS and ext != ".pdf":
             raise ValueError(f"Unsupported file format: {ext}")
+        
+        # Reuse the content of files that haven't changed since they were last
+        # read, unless they are too large to keep in memory
+        stat = os.stat(file_path)
+        if stat.st_size > MAX_CACHED_FILE_SIZE:
+            return _read_file_content(file_path, ext)
+        return _read_file_cached(os.path.abspath(file_path), ext, stat.st_mtime_ns, stat.st_size)
+    
+    def read_file_window(self, file_path: str, max_bytes: int) -> Tuple[str, int]:
+        """
+        Read at most the first max_bytes of a file without loading the rest.
+        
+        Text files are memory-mapped so only the requested window is decoded;
+        other formats fall back to read_file and are truncated afterwards.
+        
+        Args:
+            file_path: Path to the file
+            max_bytes: Maximum number of bytes to read
+            
+        Returns:
+            A tuple of the (possibly truncated) file content and the full file size
+            (in bytes)
+            
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the file format is not supported
+        """
+        # Check if the file exists
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        _, ext = os.path.splitext(file_path)
+        if ext.lower() not in TEXT_EXTENSIONS:
+            # Apply the budget to the UTF-8 encoded text (no character is shorter
+            # than a byte, so only the first max_bytes characters are encoded)
+            content = self.read_file(file_path)[:max_bytes]
+            content = content.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+            return content, os.path.getsize(file_path)
+        
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            
+            # Empty files can't be memory-mapped
+            if size == 0:
+                return "", 0
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Drop a multi-byte character cut off at the window boundary
+                return mm[:max_bytes].decode("utf-8", errors="ignore"), size
     
     def read_files(self, file_paths: List[str]) -> Dict[str, str]:
         """
@@ -80,14 +246,36 @@ class FileHandler:
             A dictionary mapping file paths to their content
         """
         result = {}
-        for file_path in file_paths:
-            try:
-                result[file_path] = self.read_file(file_path)
-            except Exception as e:
-                print(f"Error reading file {file_path}: {e}")
+        for file_path, content in self._map_files(self.read_file, file_paths):
+            if isinstance(content, Exception):
+                _logger.error("Error reading file %s: %s", file_path, content)
+            else:
+                result[file_path] = content
         
         return result
     
+    async def write_file_async(self, file_path: str, content: str) -> None:
+        """
+        Write text to a file without blocking the event loop.
+        
+        Uses aiofiles when it is installed, otherwise the write runs in the
+        default thread pool.
+        
+        Args:
+            file_path: Path to the file
+            content: The text to write
+        """
+        if AIOFILES_AVAILABLE:
+            async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
+                await f.write(content)
+            return
+        
+        def write() -> None:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        
+        await asyncio.get_running_loop().run_in_executor(None, write)
+    
     def chunk_text(self, text: str) -> List[str]:
         """
         Split text into chunks of approximately equal size.
@@ -102,83 +290,142 @@ class FileHandler:
         if len(text) <= self.chunk_size:
             return [text]
         
-        # Split the text into paragraphs
-        paragraphs = re.split(r'\n\s*\n', text)
-        
-        chunks = []
-        current_chunk = ""
-        
-        for paragraph in paragraphs:
-            # If adding this paragraph would exceed the chunk size,
-            # add the current chunk to the list and start a new one
-            if len(current_chunk) + len(paragraph) > self.chunk_size:
-                # If the current chunk is not empty, add it to the list
-                if current_chunk:
-                    chunks.append(current_chunk)
-                
-                # If the paragraph itself is longer than the chunk size,
-                # split it into smaller chunks
-                if len(paragraph) > self.chunk_size:
-                    # Split the paragraph into sentences
-                    sentences = re.split(r'(?<=[.!?])\s+', paragraph)
-                    
-                    current_chunk = ""
-                    for sentence in sentences:
-                        if len(current_chunk) + len(sentence) > self.chunk_size:
-                            if current_chunk:
-                                chunks.append(current_chunk)
-                            
-                            # If the sentence itself is longer than the chunk size,
-                            # split it into smaller chunks
-                            if len(sentence) > self.chunk_size:
-                                # Split the sentence into words
-                                words = sentence.split()
-                                
-                                current_chunk = ""
-                                for word in words:
-                                    if len(current_chunk) + len(word) + 1 > self.chunk_size:
-                                        chunks.append(current_chunk)
-                                        current_chunk = word
-                                    else:
-                                        if current_chunk:
-                                            current_chunk += " " + word
-                                        else:
-                                            current_chunk = word
-                            else:
-                                current_chunk = sentence
-                        else:
-                            if current_chunk:
-                                current_chunk += " " + sentence
-                            else:
-                                current_chunk = sentence
-                else:
-                    current_chunk = paragraph
-            else:
-                if current_chunk:
-                    current_chunk += "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
+        # Reuse the chunks of a text that was already chunked with the same settings
+        key = (
+            hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(),
+            self.chunk_size,
+            self.chunk_overlap
+        )
+        with self._chunk_cache_lock:
+            cached = self._chunk_cache.get(key)
+            if cached is not None:
+                self._chunk_cache.move_to_end(key)
+                return list(cached)
+        
+        chunks = self._chunk_text(text)
+        
+        with self._chunk_cache_lock:
+            self._chunk_cache[key] = tuple(chunks)
+            while len(self._chunk_cache) > CHUNK_CACHE_SIZE:
+                self._chunk_cache.popitem(last=False)
         
-        # Add the last chunk if it's not empty
-        if current_chunk:
-            chunks.append(current_chunk)
+        return chunks
+    
+    def _chunk_text(self, text: str) -> List[str]:
+        """
+        Split text that is longer than the chunk size into chunks.
         
-        # Add overlap between chunks
-        if self.chunk_overlap > 0 and len(chunks) > 1:
-            overlapped_chunks = []
+        Args:
+            text: The text to split
             
-            for i, chunk in enumerate(chunks):
-                if i > 0:
-                    # Add overlap from the previous chunk
-                    prev_chunk = chunks[i - 1]
-                    overlap = prev_chunk[-self.chunk_overlap:]
-                    chunk = overlap + "\n\n" + chunk
-                
-                overlapped_chunks.append(chunk)
+        Returns:
+            A list of text chunks
+        """
+        return list(self._iter_chunks(text))
+    
+    def _iter_chunks(self, text: str) -> Iterator[str]:
+        """
+        Split text into chunks lazily, yielding each chunk as soon as it is built.
+        
+        Args:
+            text: The text to split
             
-            return overlapped_chunks
+        Returns:
+            An iterator yielding text chunks
+        """
+        # Pack paragraphs into chunks, splitting paragraphs that are too long
+        # into sentences, and sentences that are too long into words
+        if text.count("\n") < 2:
+            # Without two newlines there are no paragraph breaks to split on
+            chunks = self._split_paragraph(text)
+        else:
+            paragraphs = _PARAGRAPH_RE.split(text)
+            chunks = self._pack(paragraphs, "\n\n", self._split_paragraph)
         
-        return chunks
+        if self.chunk_overlap <= 0:
+            yield from chunks
+            return
+        
+        # Add overlap between chunks, prefixing each chunk with the end of the
+        # previous one; only the previous chunk is kept, and each new chunk is
+        # built with a single join
+        overlap = self.chunk_overlap
+        prev_chunk = None
+        for chunk in chunks:
+            yield chunk if prev_chunk is None else "\n\n".join((prev_chunk[-overlap:], chunk))
+            prev_chunk = chunk
+    
+    def _split_paragraph(self, paragraph: str) -> Iterator[str]:
+        """
+        Split a paragraph that is longer than the chunk size into chunks of sentences.
+        
+        Args:
+            paragraph: The paragraph to split
+            
+        Returns:
+            An iterator yielding text chunks
+        """
+        sentences = _SENTENCE_RE.split(paragraph)
+        return self._pack(sentences, " ", self._split_sentence)
+    
+    def _split_sentence(self, sentence: str) -> Iterator[str]:
+        """
+        Split a sentence that is longer than the chunk size into chunks of words.
+        
+        Args:
+            sentence: The sentence to split
+            
+        Returns:
+            An iterator yielding text chunks
+        """
+        return self._pack(sentence.split(), " ", None)
+    
+    def _pack(
+        self,
+        units: List[str],
+        separator: str,
+        split: Optional[Callable[[str], Iterator[str]]]
+    ) -> Iterator[str]:
+        """
+        Pack consecutive units of text into chunks of at most chunk_size characters.
+        
+        Chunk boundaries are found by binary search over a prefix sum of the unit
+        lengths, and each chunk is joined once, instead of growing a string one
+        unit at a time.
+        
+        Args:
+            units: The units (paragraphs, sentences or words) to pack
+            separator: The separator placed between units in a chunk
+            split: Function splitting a unit longer than chunk_size into chunks
+                (None keeps such units whole)
+            
+        Returns:
+            An iterator yielding text chunks
+        """
+        units = [unit for unit in units if unit]
+        
+        # ends[i] is the length of units[:i] with a separator after each unit, so
+        # units[lo:hi] joined by the separator is ends[hi] - ends[lo] - len(separator) long
+        sep_len = len(separator)
+        ends = [0]
+        ends.extend(accumulate(len(unit) + sep_len for unit in units))
+        
+        lo = 0
+        while lo < len(units):
+            # Split units that don't fit in a chunk on their own
+            if ends[lo + 1] - ends[lo] - sep_len > self.chunk_size:
+                if split:
+                    yield from split(units[lo])
+                else:
+                    yield units[lo]
+                lo += 1
+                continue
+            
+            # Find the last unit that still fits after units[lo] (ends is sorted)
+            hi = bisect_right(ends, ends[lo] + self.chunk_size + sep_len, lo + 1) - 1
+            
+            yield separator.join(units[lo:hi])
+            lo = hi
     
     def process_file(self, file_path: str) -> List[str]:
         """
@@ -196,6 +443,29 @@ class FileHandler:
         # Chunk the text
         return self.chunk_text(text)
     
+    def iter_chunks(self, file_path: str) -> Iterator[str]:
+        """
+        Read a file and yield its chunks one at a time.
+        
+        Unlike process_file, the list of chunks (which is larger than the text
+        when chunks overlap) is never built, so callers can send each chunk to
+        an LLM as it is produced.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            An iterator yielding text chunks
+        """
+        text = self.read_file(file_path)
+        
+        # If the text is shorter than the chunk size, yield it as is
+        if len(text) <= self.chunk_size:
+            yield text
+            return
+        
+        yield from self._iter_chunks(text)
+    
     def process_files(self, file_paths: List[str]) -> Dict[str, List[str]]:
         """
         Read and process multiple files into chunks.
@@ -207,10 +477,41 @@ class FileHandler:
             A dictionary mapping file paths to lists of text chunks
         """
         result = {}
-        for file_path in file_paths:
+        for file_path, chunks in self._map_files(self.process_file, file_paths):
+            if isinstance(chunks, Exception):
+                _logger.error("Error processing file %s: %s", file_path, chunks)
+            else:
+                result[file_path] = chunks
+        
+        return result
+    
+    @staticmethod
+    def _map_files(
+        func: Callable[[str], Any],
+        file_paths: List[str]
+    ) -> List[Tuple[str, Any]]:
+        """
+        Apply a function to several files concurrently.
+        
+        Reading files (and extracting PDF text) mostly waits on the disk, so the
+        files are handled in a thread pool.
+        
+        Args:
+            func: The function to apply to each file path
+            file_paths: List of file paths
+            
+        Returns:
+            A list of (file path, result) tuples in the order of file_paths, where
+            the result is the exception raised for files that failed
+        """
+        def safe_call(file_path: str) -> Any:
             try:
-                result[file_path] = self.process_file(file_path)
+                return func(file_path)
             except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
+                return e
+        
+        if len(file_paths) <= 1:
+            return [(file_path, safe_call(file_path)) for file_path in file_paths]
         
-        return result
\ No newline at end of file
+        with ThreadPoolExecutor(max_workers=min(32, len(file_paths))) as executor:
+            return list(zip(file_paths, executor.map(safe_call, file_paths)))
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Shared HTTP client utilities.
+
+This module provides a connection-pooling HTTP client that can be shared by the
+web search and URL extraction tools, and the pooled sessions used by the LLM
+providers.
+"""
+
+import time
+import atexit
+import hashlib
+import threading
+from typing import Any, Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    import h2  # noqa: F401 (required by httpx for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Number of times a POST is resent after a rate limit (429) response
+RATE_LIMIT_RETRIES = 2
+
+# Longest wait before resending a rate-limited POST (in seconds)
+RATE_LIMIT_MAX_DELAY = 30.0
+
+# Sessions used by the LLM providers, keyed on the base URL and a hash of the API key
+_API_SESSIONS: Dict[Tuple[str, str], requests.Session] = {}
+_API_SESSIONS_LOCK = threading.Lock()
+
+
+def get_http_client(http2: bool = True, timeout: float = 30.0) -> Any:
+    """
+    Get an HTTP client for web search and URL fetching.
+
+    When httpx with HTTP/2 support is installed, concurrent requests to the same
+    host are multiplexed over a single connection. Otherwise a keep-alive
+    requests session is returned, with a connection pool large enough for
+    concurrent searches and LLM calls. Both clients expose compatible get/post
+    methods, but the LLM providers need a requests session (http2=False).
+
+    Args:
+        http2: Whether to use HTTP/2 if available (default: True)
+        timeout: Default request timeout in seconds (default: 30.0)
+
+    Returns:
+        An httpx.Client or requests.Session instance
+    """
+    if http2 and HTTP2_AVAILABLE:
+        return httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=8)
+        )
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_api_session(base_url: str, api_key: str) -> requests.Session:
+    """
+    Get the shared HTTP session for an LLM API, creating it on first use.
+
+    Sessions are shared by every provider instance for the same API and key, so
+    connections are kept alive between calls. Idempotent requests (HEAD, GET)
+    are retried briefly on rate limits and transient server errors; completion
+    POSTs are not, since the server may already have processed them (see
+    post_with_rate_limit for the one case where resending is safe).
+
+    Args:
+        base_url: The base URL for the API
+        api_key: The API key for authentication
+
+    Returns:
+        The session
+    """
+    key = (base_url, hashlib.blake2b(api_key.encode("utf-8"), digest_size=8).hexdigest())
+    with _API_SESSIONS_LOCK:
+        session = _API_SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=32,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.2,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=frozenset(["HEAD", "GET"]),
+                    raise_on_status=False
+                )
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            atexit.register(session.close)
+            _API_SESSIONS[key] = session
+    return session
+
+
+def _retry_after(response: Any, attempt: int) -> float:
+    """
+    Get how long to wait before resending a rate-limited request.
+
+    Args:
+        response: The 429 response
+        attempt: The number of the retry (starting at 0)
+
+    Returns:
+        The Retry-After delay if the server sent one in seconds, or an
+        exponential backoff otherwise, capped at RATE_LIMIT_MAX_DELAY
+    """
+    try:
+        delay = float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        delay = 0.5 * 2 ** attempt
+    return min(max(delay, 0.0), RATE_LIMIT_MAX_DELAY)
+
+
+def post_with_rate_limit(session: Any, url: str, retries: int = RATE_LIMIT_RETRIES, **kwargs) -> Any:
+    """
+    Send a POST request, resending it if the server rate-limits it.
+
+    A 429 response means the server rejected the request without processing
+    it, so it is the only error after which a completion request can be resent
+    without risking a duplicate (and billed) completion. Other errors are
+    returned to the caller as they are.
+
+    Args:
+        session: The session to send the request through
+        url: The URL to post to
+        retries: Maximum number of times to resend the request
+        **kwargs: Additional arguments for session.post
+
+    Returns:
+        The response (still a 429 if the rate limit outlasted the retries)
+    """
+    for attempt in range(retries + 1):
+        response = session.post(url, **kwargs)
+        if response.status_code != 429 or attempt == retries:
+            return response
+
+        delay = _retry_after(response, attempt)
+        response.close()
+        time.sleep(delay)
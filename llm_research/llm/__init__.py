@@ -7,15 +7,23 @@ from llm_research.config import Config
 from llm_research.llm.base import BaseLLM
 from llm_research.llm.openai import OpenAILLM
 from llm_research.llm.custom import CustomLLM
+from llm_research.llm.cache import CachingLLM
 import getpass
+import requests
 
-def get_llm_provider(config: Config, provider_name: Optional[str] = None) -> BaseLLM:
+def get_llm_provider(
+    config: Config,
+    provider_name: Optional[str] = None,
+    session: Optional[requests.Session] = None
+) -> BaseLLM:
     """
     Get an LLM provider instance based on the configuration.
     
     Args:
         config: The configuration manager
         provider_name: The name of the provider to use (optional)
+        session: HTTP session to send requests through, e.g. one shared with the
+            web search tool (optional, the provider creates its own if not provided)
         
     Returns:
         An LLM provider instance
@@ -39,14 +47,17 @@ def get_llm_provider(config: Config, provider_name: Optional[str] = None) -> Bas
         return OpenAILLM(
             model=provider_config.get("model", "gpt-3.5-turbo"),
             base_url=provider_config.get("base_url", "https://api.openai.com/v1"),
-            api_key=provider_config["api_key"]
+            api_key=provider_config["api_key"],
+            session=session,
+            json_mode=provider_config.get("json_mode", False)
         )
     else:
         return CustomLLM(
             model=provider_config.get("model", "default"),
             base_url=provider_config.get("base_url", ""),
             api_key=provider_config["api_key"],
+            session=session,
             **provider_config.get("options", {})
         )
 
-__all__ = ["BaseLLM", "OpenAILLM", "CustomLLM", "get_llm_provider"]
\ No newline at end of file
+__all__ = ["BaseLLM", "OpenAILLM", "CustomLLM", "CachingLLM", "get_llm_provider"]
\ No newline at end of file
@@ -2,10 +2,17 @@
 Base class for LLM providers.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, List, Optional, Union, Any
 
 
+# Maximum number of requests generate_batch sends at the same time
+MAX_BATCH_WORKERS = 8
+
+
 class BaseLLM(ABC):
     """
     Abstract base class for LLM providers.
@@ -64,6 +71,88 @@ class BaseLLM(ABC):
         """
         pass
     
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Generate text based on the provided prompt without blocking the event loop.
+        
+        This default implementation runs generate in the default executor;
+        providers with an async HTTP client can override it.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0-2.0)
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            A dictionary containing the generated text and metadata
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, partial(
+            self.generate,
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            **kwargs
+        ))
+    
+    def generate_batch(
+        self,
+        prompts: List[str],
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Generate text for several independent prompts.
+        
+        This default implementation sends the requests concurrently from a
+        thread pool, so the batch takes about as long as its slowest prompt;
+        providers with a batch endpoint can override it.
+        
+        Args:
+            prompts: The input prompts
+            max_tokens: Maximum number of tokens to generate for each prompt
+            temperature: Sampling temperature (0.0-2.0)
+            return_exceptions: Whether to return the error of a failed prompt in place of its
+                result instead of raising it (default: False)
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            The result (or error) of each prompt, in the order of the prompts
+        """
+        def generate(prompt: str) -> Union[Dict[str, Any], Exception]:
+            try:
+                return self.generate(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+        
+        if len(prompts) <= 1:
+            return [generate(prompt) for prompt in prompts]
+        
+        with ThreadPoolExecutor(max_workers=min(len(prompts), MAX_BATCH_WORKERS)) as executor:
+            return list(executor.map(generate, prompts))
+    
     @abstractmethod
     def generate_stream(
         self,
@@ -105,4 +194,54 @@ class BaseLLM(ABC):
         Returns:
             The number of tokens
         """
-        pass
\ No newline at end of file
+        pass
+    
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count the number of tokens in each of the provided texts.
+        
+        This default implementation calls count_tokens for each text; providers
+        with a batch tokenizer can override it.
+        
+        Args:
+            texts: The texts to count tokens for
+            
+        Returns:
+            The number of tokens in each text
+        """
+        return [self.count_tokens(text) for text in texts]
+    
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate text so that it fits within a token budget.
+        
+        This default implementation shrinks the text proportionally using
+        count_tokens; providers with a tokenizer can override it to cut at
+        exact token boundaries.
+        
+        Args:
+            text: The text to truncate
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            The truncated text (or the original text if it already fits)
+        """
+        num_tokens = self.count_tokens(text)
+        
+        while num_tokens > max_tokens and text:
+            # Cut proportionally to the overshoot, removing at least one character
+            cut = min(len(text) - 1, int(len(text) * max_tokens / num_tokens))
+            text = text[:max(cut, 0)]
+            num_tokens = self.count_tokens(text)
+        
+        return text
+    
+    def warmup(self) -> None:
+        """
+        Open a connection to the provider ahead of the first request.
+        
+        This is a no-op by default; providers that keep HTTP connections alive
+        can override it so the DNS lookup and TLS handshake overlap with other
+        work. It must never raise.
+        """
+        pass
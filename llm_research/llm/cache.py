@@ -0,0 +1,289 @@
+"""
+Caching wrapper for LLM providers.
+"""
+
+import os
+import copy
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union, Any, Iterator, Tuple
+
+from llm_research.llm.base import BaseLLM
+from llm_research import _fastjson
+from llm_research._sqlite_cache import SQLiteCache
+
+
+# Default location of the persistent LLM completion cache
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".llm_research", "llm_cache.db")
+
+# Default time-to-live for cached completions (in seconds)
+DEFAULT_CACHE_TTL = 86400
+
+
+class CachingLLM(BaseLLM):
+    """
+    LLM provider wrapper that caches completions.
+    
+    Completions are kept in an in-memory LRU and persisted to SQLite, keyed on
+    the model, endpoint, prompt and sampling parameters, and expire after a
+    configurable time-to-live. High-temperature calls are never cached so
+    sampling randomness is preserved.
+    """
+    
+    def __init__(
+        self,
+        llm: BaseLLM,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        max_temperature: float = 0.9,
+        max_memory_entries: int = 256,
+        ttl: int = DEFAULT_CACHE_TTL
+    ):
+        """
+        Initialize the caching wrapper.
+        
+        Args:
+            llm: The LLM provider to wrap
+            cache_path: Path to the SQLite database file
+            max_temperature: Calls with a higher temperature bypass the cache
+            max_memory_entries: Maximum number of completions kept in memory
+            ttl: Time-to-live for cached completions (in seconds)
+        """
+        super().__init__(llm.model, llm.base_url, llm.api_key)
+        self.llm = llm
+        self.cache_path = cache_path
+        self.max_temperature = max_temperature
+        self.max_memory_entries = max_memory_entries
+        self.ttl = ttl
+        
+        # In-memory entries are (time stored, completion) tuples
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = SQLiteCache(cache_path)
+        self._store.prune(ttl)
+    
+    def __getattr__(self, name: str) -> Any:
+        # Expose provider-specific attributes of the wrapped LLM
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+    
+    def _make_key(self, prompt: str, max_tokens: Optional[int], temperature: float, params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a completion request.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            params: The remaining request parameters
+        
+        Returns:
+            The cache key
+        """
+        key_data = [self.llm.model, self.llm.base_url, prompt, max_tokens, round(temperature, 2), params]
+        return hashlib.blake2b(
+            _fastjson.dumps(key_data, sort_keys=True, default=str), digest_size=16
+        ).hexdigest()
+    
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached completion.
+        
+        Args:
+            key: The cache key
+        
+        Returns:
+            A copy of the cached completion (so callers can't change the cached
+            one), or None if there is no fresh entry
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if time.time() - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    return copy.deepcopy(entry[1])
+                del self._memory[key]
+        
+        body = self._store.get(key, ttl=self.ttl)
+        if body is None:
+            return None
+        
+        result = _fastjson.loads(body)
+        self._remember(key, result)
+        return copy.deepcopy(result)
+    
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a completion in the in-memory LRU.
+        
+        Args:
+            key: The cache key
+            result: The completion
+        """
+        with self._lock:
+            self._memory[key] = (time.time(), result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+    
+    def _set(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a completion in the cache.
+        
+        Args:
+            key: The cache key
+            result: The completion
+        """
+        self._remember(key, copy.deepcopy(result))
+        self._store.set(key, _fastjson.dumps(result, default=str))
+    
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Generate text based on the provided prompt, using the cache when possible.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0-2.0)
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional provider-specific parameters
+        
+        Returns:
+            A dictionary containing the generated text and metadata
+        """
+        params = dict(
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            **kwargs
+        )
+        
+        # Never cache highly random output
+        if temperature > self.max_temperature:
+            return self.llm.generate(prompt=prompt, max_tokens=max_tokens, temperature=temperature, **params)
+        
+        # Timeouts don't affect the completion itself
+        key_params = {k: v for k, v in params.items() if k != "timeout"}
+        key = self._make_key(prompt, max_tokens, temperature, key_params)
+        
+        result = self._get(key)
+        if result is None:
+            result = self.llm.generate(prompt=prompt, max_tokens=max_tokens, temperature=temperature, **params)
+            self._set(key, result)
+        
+        return result
+    
+    def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Generate text in a streaming fashion, replaying cached completions.
+        
+        A streamed completion is only stored once it has been fully consumed.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0-2.0)
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional provider-specific parameters
+        
+        Returns:
+            An iterator yielding generated text chunks
+        """
+        params = dict(
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            **kwargs
+        )
+        
+        if temperature > self.max_temperature:
+            yield from self.llm.generate_stream(prompt=prompt, max_tokens=max_tokens, temperature=temperature, **params)
+            return
+        
+        key_params = {k: v for k, v in params.items() if k != "timeout"}
+        key = self._make_key(prompt, max_tokens, temperature, key_params)
+        
+        result = self._get(key)
+        if result is not None:
+            yield result["text"]
+            return
+        
+        chunks = []
+        for chunk in self.llm.generate_stream(prompt=prompt, max_tokens=max_tokens, temperature=temperature, **params):
+            chunks.append(chunk)
+            yield chunk
+        
+        self._set(key, {"text": "".join(chunks), "raw_response": {}})
+    
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the number of tokens in the provided text.
+        
+        Args:
+            text: The text to count tokens for
+        
+        Returns:
+            The number of tokens
+        """
+        return self.llm.count_tokens(text)
+    
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count the number of tokens in each of the provided texts.
+        
+        Args:
+            texts: The texts to count tokens for
+        
+        Returns:
+            The number of tokens in each text
+        """
+        return self.llm.count_tokens_batch(texts)
+    
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate text so that it fits within a token budget.
+        
+        Args:
+            text: The text to truncate
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            The truncated text (or the original text if it already fits)
+        """
+        return self.llm.truncate_to_tokens(text, max_tokens)
+    
+    def warmup(self) -> None:
+        """
+        Open a connection to the wrapped provider ahead of the first request.
+        """
+        self.llm.warmup()
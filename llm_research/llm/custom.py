@@ -2,11 +2,96 @@
 Custom LLM provider implementation for non-standard APIs.
 """
 
-import json
+import asyncio
 import requests
-from typing import Dict, List, Optional, Union, Any, Iterator, Callable
+from functools import lru_cache
+from types import MappingProxyType
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.request import ACCEPT_ENCODING
+from typing import Dict, List, Optional, Union, Any, Iterator, AsyncIterator, Callable
 
 from llm_research.llm.base import BaseLLM
+from llm_research import _fastjson
+from llm_research.http_client import HTTP2_AVAILABLE, get_api_session, post_with_rate_limit
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+
+# Connect and read timeouts for API requests (in seconds)
+REQUEST_TIMEOUT = (5, 120)
+
+# Default number of streamed text chunks joined into each chunk yielded to the caller
+STREAM_FLUSH_EVERY = 8
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> Any:
+    """
+    Get the tiktoken encoding for a model, importing tiktoken on first use.
+    
+    Args:
+        model: The model name
+        
+    Returns:
+        The encoding, or None if tiktoken isn't installed
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Fall back to cl100k_base for unknown models
+        return tiktoken.get_encoding("cl100k_base")
+
+
+# Text extractors for the response formats the default parsers understand, in
+# the order they are tried; each raises KeyError, IndexError or TypeError if the
+# data has a different shape
+_RESPONSE_EXTRACTORS = (
+    lambda data: data["choices"][0]["text"],  # OpenAI-like completion format
+    lambda data: data["choices"][0]["message"]["content"],  # OpenAI-like chat format
+    lambda data: data["output"],
+    lambda data: data["generated_text"],
+    lambda data: data["response"],
+)
+
+_STREAM_EXTRACTORS = (
+    lambda data: data["choices"][0]["text"],  # OpenAI-like completion format
+    lambda data: data["choices"][0]["delta"]["content"],  # OpenAI-like chat format
+    lambda data: data["output"],
+    lambda data: data["generated_text"],
+    lambda data: data["response"],
+)
+
+_EXTRACT_ERRORS = (KeyError, IndexError, TypeError)
+
+
+def _probe_extractors(data: Any, extractors: tuple) -> tuple:
+    """
+    Find the first extractor that matches the shape of the data.
+    
+    Args:
+        data: The decoded response data
+        extractors: The extractors to try, in order
+        
+    Returns:
+        A tuple of the matching extractor and the extracted text, or (None, None)
+        if no extractor matches
+    """
+    for extractor in extractors:
+        try:
+            return extractor, extractor(data)
+        except _EXTRACT_ERRORS:
+            continue
+    
+    return None, None
 
 
 class CustomLLM(BaseLLM):
@@ -26,6 +111,7 @@ class CustomLLM(BaseLLM):
         response_parser: Optional[Callable] = None,
         stream_parser: Optional[Callable] = None,
         token_counter: Optional[Callable] = None,
+        session: Optional[requests.Session] = None,
         **kwargs
     ):
         """
@@ -39,6 +125,7 @@ class CustomLLM(BaseLLM):
             response_parser: Function to parse the response
             stream_parser: Function to parse streaming responses
             token_counter: Function to count tokens
+            session: HTTP session to send requests through (optional, the shared session for the API is used if not provided)
             **kwargs: Additional provider-specific parameters
         """
         super().__init__(model, base_url, api_key, **kwargs)
@@ -50,20 +137,41 @@ class CustomLLM(BaseLLM):
         # Set up the API endpoint (can be overridden in kwargs)
         self.api_endpoint = kwargs.get("api_endpoint", f"{self.base_url}/generate")
         
-        # Set up the headers
-        self.headers = {
+        # Set up the headers, updated with any provided in kwargs (matching names
+        # case-insensitively, like HTTP). They are built once and read-only, since
+        # the same headers are sent with every request.
+        headers = CaseInsensitiveDict({
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+            "Authorization": f"Bearer {self.api_key}",
+            # Accept every compression urllib3 can decode (brotli and zstd when installed)
+            "Accept-Encoding": ACCEPT_ENCODING
+        })
+        headers.update(kwargs.get("headers", {}))
+        self.headers = MappingProxyType(headers)
         
-        # Update headers with any provided in kwargs
-        if "headers" in kwargs:
-            self.headers.update(kwargs["headers"])
+        # Reuse one HTTP session so connections are kept alive between calls
+        # (and shared with other instances for the same API and key)
+        if session is None:
+            session = get_api_session(self.base_url, self.api_key)
+        self.session = session
         
         # Set up custom formatters and parsers
         self.request_formatter = request_formatter or self._default_request_formatter
         self.response_parser = response_parser or self._default_response_parser
         self.stream_parser = stream_parser or self._default_stream_parser
+        
+        # The default stream parser reads raw bytes; custom parsers get decoded text
+        self._stream_parser_takes_bytes = stream_parser is None
+        
+        # The extractors that matched the API's response and stream formats,
+        # remembered so later responses don't probe every format again
+        self._response_extractor: Optional[Callable[[Any], Any]] = None
+        self._stream_extractor: Optional[Callable[[Any], Any]] = None
+        
+        # Async client for agenerate and agenerate_stream, created on first use
+        # in each event loop (and the loop it belongs to)
+        self._aclient = None
+        self._aclient_loop = None
         self.token_counter = token_counter or self._default_token_counter
     
     def _default_request_formatter(
@@ -125,76 +233,99 @@ class CustomLLM(BaseLLM):
         Returns:
             A dictionary containing the parsed response
         """
-        # Try to extract text from common response formats
-        text = ""
-        
-        if "choices" in response_data and len(response_data["choices"]) > 0:
-            # OpenAI-like format
-            choice = response_data["choices"][0]
-            if "text" in choice:
-                text = choice["text"]
-            elif "message" in choice and "content" in choice["message"]:
-                text = choice["message"]["content"]
-        elif "output" in response_data:
-            # Some APIs use an "output" field
-            text = response_data["output"]
-        elif "generated_text" in response_data:
-            # Some APIs use a "generated_text" field
-            text = response_data["generated_text"]
-        elif "response" in response_data:
-            # Some APIs use a "response" field
-            text = response_data["response"]
+        text = None
+        
+        # Use the format matched by earlier responses, probing again if it changed
+        if self._response_extractor is not None:
+            try:
+                text = self._response_extractor(response_data)
+            except _EXTRACT_ERRORS:
+                self._response_extractor = None
+        
+        if self._response_extractor is None:
+            self._response_extractor, text = _probe_extractors(response_data, _RESPONSE_EXTRACTORS)
+        
+        if text is None:
+            text = ""
         
         return {
             "text": text,
             "raw_response": response_data
         }
     
-    def _default_stream_parser(self, chunk: str) -> Optional[str]:
+    def _default_stream_parser(self, chunk: Union[str, bytes]) -> Optional[str]:
         """
         Default stream parser.
         
         Args:
-            chunk: A chunk of the streaming response
+            chunk: A chunk of the streaming response (raw bytes are parsed without decoding them first)
             
         Returns:
             The parsed text chunk, or None if no text was found
         """
         try:
-            data = json.loads(chunk)
-            
-            # Try to extract text from common streaming formats
-            if "choices" in data and len(data["choices"]) > 0:
-                # OpenAI-like format
-                choice = data["choices"][0]
-                if "text" in choice:
-                    return choice["text"]
-                elif "delta" in choice and "content" in choice["delta"]:
-                    return choice["delta"]["content"]
-            elif "output" in data:
-                return data["output"]
-            elif "generated_text" in data:
-                return data["generated_text"]
-            elif "response" in data:
-                return data["response"]
-            
-            return None
-        except json.JSONDecodeError:
+            data = _fastjson.loads(chunk)
+        except (_fastjson.JSONDecodeError, UnicodeDecodeError):
             return None
+        
+        # Use the format matched by earlier chunks; chunks without text (e.g. a
+        # first chunk with only the role) don't match it, so they are probed again
+        extractor = self._stream_extractor
+        if extractor is not None:
+            try:
+                return extractor(data)
+            except _EXTRACT_ERRORS:
+                pass
+        
+        extractor, text = _probe_extractors(data, _STREAM_EXTRACTORS)
+        if extractor is not None:
+            self._stream_extractor = extractor
+        
+        return text
     
     def _default_token_counter(self, text: str) -> int:
         """
         Default token counter.
         
+        Uses tiktoken's encoding for the model (cl100k_base for unknown models)
+        when tiktoken is installed.
+        
         Args:
             text: The text to count tokens for
             
         Returns:
-            The estimated number of tokens
+            The number of tokens, or an estimate without tiktoken
         """
+        encoding = _get_encoding(self.model)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        
         # Simple estimation: ~4 characters per token
         return len(text) // 4
     
+    def _raise_for_error(self, response: requests.Response) -> None:
+        """
+        Raise an error if the API request failed.
+        
+        Args:
+            response: The API response
+            
+        Raises:
+            RuntimeError: If the response status code isn't 200
+        """
+        if response.status_code == 200:
+            return
+        
+        # Read the error body once, keeping the message short for large bodies
+        body = response.content
+        message = body[:512].decode("utf-8", "replace")
+        try:
+            message = _fastjson.loads(body)["error"]["message"]
+        except Exception:
+            pass
+        
+        raise RuntimeError(f"API request failed with status code {response.status_code}: {message}")
+    
     def generate(
         self,
         prompt: str,
@@ -235,26 +366,19 @@ class CustomLLM(BaseLLM):
         )
         
         # Make the API request
-        response = requests.post(
+        response = post_with_rate_limit(
+            self.session,
             self.api_endpoint,
             headers=self.headers,
-            data=json.dumps(payload)
+            data=_fastjson.dumps(payload),
+            timeout=REQUEST_TIMEOUT
         )
         
         # Check for errors
-        if response.status_code != 200:
-            error_msg = f"API request failed with status code {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_msg += f": {error_data['error']['message']}"
-            except:
-                error_msg += f": {response.text}"
-            
-            raise Exception(error_msg)
+        self._raise_for_error(response)
         
-        # Parse the response
-        result = response.json()
+        # Parse the response straight from the raw bytes
+        result = _fastjson.loads(response.content)
         
         # Parse the response using the custom parser
         return self.response_parser(result)
@@ -281,11 +405,15 @@ class CustomLLM(BaseLLM):
             frequency_penalty: Penalty for token frequency
             presence_penalty: Penalty for token presence
             stop: Stop sequences to end generation
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters; stream_flush_every sets how many parsed
+                chunks are joined into each yielded chunk (default: 8)
             
         Returns:
             An iterator yielding generated text chunks
         """
+        # Yield the text in small batches rather than one token at a time
+        flush_every = kwargs.pop("stream_flush_every", STREAM_FLUSH_EVERY)
+        
         # Format the request payload
         payload = self.request_formatter(
             prompt=prompt,
@@ -300,42 +428,258 @@ class CustomLLM(BaseLLM):
         )
         
         # Make the API request
-        response = requests.post(
+        response = post_with_rate_limit(
+            self.session,
             self.api_endpoint,
             headers=self.headers,
-            data=json.dumps(payload),
-            stream=True
+            data=_fastjson.dumps(payload),
+            stream=True,
+            timeout=REQUEST_TIMEOUT
         )
         
         # Check for errors
-        if response.status_code != 200:
-            error_msg = f"API request failed with status code {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_msg += f": {error_data['error']['message']}"
-            except:
-                error_msg += f": {response.text}"
+        self._raise_for_error(response)
+        
+        # Process the streaming response (the connection is released even if
+        # the caller stops consuming the stream early)
+        try:
+            takes_bytes = self._stream_parser_takes_bytes
+            buffer = []
+            for line in response.iter_lines(decode_unicode=False):
+                # Skip empty lines and SSE comments (e.g. ": keepalive") before
+                # doing any other work on them
+                if not line or line[:1] == b":":
+                    continue
+                
+                # Stop at the "[DONE]" message
+                if line == b"data: [DONE]" or line == b"[DONE]":
+                    break
+                
+                # Remove the "data: " prefix if present (working on the raw bytes)
+                if line.startswith(b"data: "):
+                    line = line[6:]
+                
+                # Parse the chunk using the custom parser
+                chunk_text = self.stream_parser(line if takes_bytes else line.decode("utf-8"))
+                if chunk_text:
+                    buffer.append(chunk_text)
+                    if len(buffer) >= flush_every:
+                        yield "".join(buffer)
+                        buffer.clear()
+            
+            # Yield the rest of the text
+            if buffer:
+                yield "".join(buffer)
+        finally:
+            response.close()
+    
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """
+        Get the async HTTP client for the running event loop, creating it on first use.
+        
+        The client's pooled connections belong to the loop that opened them, so a
+        new client is created when the provider is used from another loop (e.g.
+        a second asyncio.run); the old loop is already closed, so its client is
+        dropped rather than closed.
+        
+        Returns:
+            An httpx.AsyncClient that multiplexes requests over HTTP/2 when h2 is installed
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            # httpx advertises the compressions it can decode itself
+            headers = {name: value for name, value in self.headers.items() if name.lower() != "accept-encoding"}
+            self._aclient = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                headers=headers,
+                timeout=httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0]),
+                limits=httpx.Limits(max_connections=16)
+            )
+            self._aclient_loop = loop
+        return self._aclient
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Generate text based on the provided prompt without blocking the event loop.
+        
+        Concurrent calls (e.g. with asyncio.gather over file chunks) share one
+        httpx connection pool. Without httpx, generate runs in the default executor.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional parameters
+            
+        Returns:
+            A dictionary containing the generated text and metadata
+        """
+        if not HTTPX_AVAILABLE:
+            return await super().agenerate(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                frequency_penalty=frequency_penalty,
+                presence_penalty=presence_penalty,
+                stop=stop,
+                **kwargs
+            )
+        
+        # Format the request payload
+        payload = self.request_formatter(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            **kwargs
+        )
+        
+        # Make the API request
+        response = await self._get_async_client().post(
+            self.api_endpoint,
+            content=_fastjson.dumps(payload)
+        )
+        
+        # Check for errors
+        self._raise_for_error(response)
+        
+        # Parse the response using the custom parser
+        return self.response_parser(_fastjson.loads(response.content))
+    
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Generate text in a streaming fashion without blocking the event loop.
+        
+        Without httpx, the chunks of generate_stream are read in the default executor.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional parameters; stream_flush_every sets how many parsed
+                chunks are joined into each yielded chunk (default: 8)
             
-            raise Exception(error_msg)
+        Returns:
+            An async iterator yielding generated text chunks
+        """
+        if not HTTPX_AVAILABLE:
+            loop = asyncio.get_running_loop()
+            chunks = self.generate_stream(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                frequency_penalty=frequency_penalty,
+                presence_penalty=presence_penalty,
+                stop=stop,
+                **kwargs
+            )
+            done = object()
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(None, next, chunks, done)
+                    if chunk is done:
+                        break
+                    yield chunk
+            finally:
+                chunks.close()
+            return
+        
+        # Yield the text in small batches rather than one token at a time
+        flush_every = kwargs.pop("stream_flush_every", STREAM_FLUSH_EVERY)
         
-        # Process the streaming response
-        for line in response.iter_lines():
-            if line:
-                line = line.decode("utf-8")
+        # Format the request payload
+        payload = self.request_formatter(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            stream=True,
+            **kwargs
+        )
+        
+        # Make the API request
+        async with self._get_async_client().stream(
+            "POST",
+            self.api_endpoint,
+            content=_fastjson.dumps(payload)
+        ) as response:
+            # Check for errors (the error body has to be read first)
+            if response.status_code != 200:
+                await response.aread()
+                self._raise_for_error(response)
+            
+            # Process the streaming response (httpx decodes the lines, which
+            # both the default and custom stream parsers accept)
+            buffer = []
+            async for line in response.aiter_lines():
+                # Skip empty lines and SSE comments (e.g. ": keepalive")
+                if not line or line[0] == ":":
+                    continue
+                
+                # Stop at the "[DONE]" message
+                if line == "data: [DONE]" or line == "[DONE]":
+                    break
                 
                 # Remove the "data: " prefix if present
                 if line.startswith("data: "):
                     line = line[6:]
                 
-                # Skip the "[DONE]" message
-                if line == "[DONE]":
-                    break
-                
                 # Parse the chunk using the custom parser
                 chunk_text = self.stream_parser(line)
                 if chunk_text:
-                    yield chunk_text
+                    buffer.append(chunk_text)
+                    if len(buffer) >= flush_every:
+                        yield "".join(buffer)
+                        buffer.clear()
+            
+            # Yield the rest of the text
+            if buffer:
+                yield "".join(buffer)
+    
+    async def aclose(self) -> None:
+        """
+        Close the async HTTP client, if it was created.
+        """
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+            self._aclient_loop = None
     
     def count_tokens(self, text: str) -> int:
         """
@@ -347,4 +691,15 @@ class CustomLLM(BaseLLM):
         Returns:
             The number of tokens
         """
-        return self.token_counter(text)
\ No newline at end of file
+        return self.token_counter(text)
+    
+    def warmup(self) -> None:
+        """
+        Open a keep-alive connection to the API with a lightweight request.
+        
+        Errors are ignored, since the first real request will surface them.
+        """
+        try:
+            self.session.head(self.api_endpoint, headers=self.headers, timeout=5)
+        except requests.exceptions.RequestException:
+            pass
\ No newline at end of file
@@ -2,9 +2,16 @@
 OpenAI-compatible LLM provider implementation.
 """
 
-import json
+import os
+import asyncio
+import threading
 import requests
-from typing import Dict, List, Optional, Union, Any, Iterator
+from functools import lru_cache
+from queue import SimpleQueue
+from types import MappingProxyType
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.request import ACCEPT_ENCODING
+from typing import Dict, List, Optional, Union, Any, Iterator, AsyncIterator, Tuple
 
 try:
     import tiktoken
@@ -12,7 +19,35 @@ try:
 except ImportError:
     TIKTOKEN_AVAILABLE = False
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 from llm_research.llm.base import BaseLLM
+from llm_research.http_client import HTTP2_AVAILABLE, get_api_session, post_with_rate_limit
+
+# Serialize request payloads straight to bytes and parse responses from bytes
+from llm_research._fastjson import dumps as _dumps, loads as _loads, JSONDecodeError as _JSONDecodeError
+
+
+@lru_cache(maxsize=32)
+def _get_encoding(model: str) -> Tuple[Any, bool]:
+    """
+    Get the tiktoken encoding for a model, building it only once per model.
+    
+    Args:
+        model: The model name
+        
+    Returns:
+        A tuple of the encoding and whether it is the model's own encoding
+        (False when falling back to cl100k_base for unknown models)
+    """
+    try:
+        return tiktoken.encoding_for_model(model), True
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base"), False
 
 
 class OpenAILLM(BaseLLM):
@@ -27,6 +62,8 @@ class OpenAILLM(BaseLLM):
         model: str,
         base_url: str,
         api_key: str,
+        session: Optional[requests.Session] = None,
+        json_mode: bool = False,
         **kwargs
     ):
         """
@@ -36,9 +73,13 @@ class OpenAILLM(BaseLLM):
             model: The model name to use
             base_url: The base URL for the API (e.g., "https://api.openai.com/v1")
             api_key: The API key for authentication
+            session: HTTP session to send requests through (optional, a new one is created if not provided)
+            json_mode: Whether the API accepts response_format={"type": "json_object"}
+                (default: False, since many compatible servers and older models reject it)
             **kwargs: Additional provider-specific parameters
         """
         super().__init__(model, base_url, api_key, **kwargs)
+        self.supports_json_mode = json_mode
         
         # Ensure base_url doesn't end with a slash
         if self.base_url.endswith("/"):
@@ -47,20 +88,31 @@ class OpenAILLM(BaseLLM):
         # Set up the API endpoint
         self.api_endpoint = f"{self.base_url}/chat/completions"
         
-        # Set up the headers
-        self.headers = {
+        # Set up the headers (built once and read-only, since the same headers
+        # are sent with every request)
+        self.headers = MappingProxyType(CaseInsensitiveDict({
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+            "Authorization": f"Bearer {self.api_key}",
+            # Accept every compression urllib3 can decode (brotli and zstd when installed)
+            "Accept-Encoding": ACCEPT_ENCODING
+        }))
+        
+        # Reuse one HTTP session so connections are kept alive between calls
+        # (and shared with other instances for the same API and key)
+        if session is None:
+            session = get_api_session(self.base_url, self.api_key)
+        self.session = session
+        
+        # Async client for agenerate and agenerate_stream, created on first use
+        # in each event loop (and the loop it belongs to)
+        self._aclient = None
+        self._aclient_loop = None
         
-        # Set up the encoding for token counting
+        # Set up the encoding for token counting (shared by instances for the same model)
         self.encoding = None
+        self._exact_encoding = False
         if TIKTOKEN_AVAILABLE:
-            try:
-                self.encoding = tiktoken.encoding_for_model(self.model)
-            except KeyError:
-                # Fall back to cl100k_base for unknown models
-                self.encoding = tiktoken.get_encoding("cl100k_base")
+            self.encoding, self._exact_encoding = _get_encoding(self.model)
     
     def _create_messages(self, prompt: str) -> List[Dict[str, str]]:
         """
@@ -74,19 +126,20 @@ class OpenAILLM(BaseLLM):
         """
         return [{"role": "user", "content": prompt}]
     
-    def generate(
+    def _create_payload(
         self,
         prompt: str,
-        max_tokens: Optional[int] = None,
-        temperature: float = 0.7,
-        top_p: float = 1.0,
-        frequency_penalty: float = 0.0,
-        presence_penalty: float = 0.0,
-        stop: Optional[Union[str, List[str]]] = None,
+        max_tokens: Optional[int],
+        temperature: float,
+        top_p: float,
+        frequency_penalty: float,
+        presence_penalty: float,
+        stop: Optional[Union[str, List[str]]],
+        stream: bool = False,
         **kwargs
     ) -> Dict[str, Any]:
         """
-        Generate text based on the provided prompt.
+        Create the request payload.
         
         Args:
             prompt: The input prompt
@@ -96,12 +149,12 @@ class OpenAILLM(BaseLLM):
             frequency_penalty: Penalty for token frequency
             presence_penalty: Penalty for token presence
             stop: Stop sequences to end generation
+            stream: Whether to request a streaming response (default: False)
             **kwargs: Additional provider-specific parameters
             
         Returns:
-            A dictionary containing the generated text and metadata
+            The request payload
         """
-        # Create the request payload
         payload = {
             "model": self.model,
             "messages": self._create_messages(prompt),
@@ -111,6 +164,9 @@ class OpenAILLM(BaseLLM):
             "presence_penalty": presence_penalty,
         }
         
+        if stream:
+            payload["stream"] = True
+        
         # Add optional parameters if provided
         if max_tokens is not None:
             payload["max_tokens"] = max_tokens
@@ -122,34 +178,46 @@ class OpenAILLM(BaseLLM):
         for key, value in kwargs.items():
             payload[key] = value
         
-        # Make the API request with timeout
-        try:
-            response = requests.post(
-                self.api_endpoint,
-                headers=self.headers,
-                data=json.dumps(payload),
-                timeout=30*3  # 30 second timeout
-            )
-        except requests.exceptions.Timeout:
-            raise Exception("API request timed out after 30 seconds")
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed: {str(e)}")
+        return payload
+    
+    def _check_response(self, response: Any) -> None:
+        """
+        Raise an error if the API request failed.
         
-        # Check for errors
-        if response.status_code != 200:
-            error_msg = f"API request failed with status code {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_msg += f": {error_data['error']['message']}"
-            except:
-                error_msg += f": {response.text}"
+        Args:
+            response: The API response (a requests or httpx response)
             
-            raise Exception(error_msg)
+        Raises:
+            RuntimeError: If the response status code isn't 200
+        """
+        # Successful responses return before any error formatting
+        if response.status_code == 200:
+            return
         
-        # Parse and validate the response
+        # Rate limits (429) were already retried, honoring Retry-After, before
+        # they got here; other errors aren't retried, since the API may have
+        # processed the request
+        body = response.content
+        message = body[:512].decode("utf-8", "replace")
+        try:
+            message = _loads(body)["error"]["message"]
+        except Exception:
+            pass
+        
+        raise RuntimeError(f"API request failed with status code {response.status_code}: {message}")
+    
+    def _parse_response(self, response: Any) -> Dict[str, Any]:
+        """
+        Parse and validate a chat completion response.
+        
+        Args:
+            response: The API response (a requests or httpx response)
+            
+        Returns:
+            A dictionary containing the generated text and metadata
+        """
         try:
-            result = response.json()
+            result = _loads(response.content)
             
             # Validate response structure
             if not isinstance(result, dict):
@@ -183,13 +251,96 @@ class OpenAILLM(BaseLLM):
                 "raw_response": result
             }
             
-        except json.JSONDecodeError:
+        except _JSONDecodeError:
             raise Exception(f"Failed to parse API response: {response.text}")
         except KeyError as e:
             raise Exception(f"Invalid API response structure: missing {str(e)}")
         except Exception as e:
             raise Exception(f"API response validation failed: {str(e)}")
     
+    def _parse_stream_data(self, data: Union[bytes, str]) -> Optional[str]:
+        """
+        Parse the data of one server-sent event of a streaming response.
+        
+        Args:
+            data: The event data, without the "data: " prefix
+            
+        Returns:
+            The delta content, or None if the event has none
+        """
+        try:
+            # Parse the JSON data
+            chunk = _loads(data)
+        except _JSONDecodeError:
+            # Skip invalid JSON
+            return None
+        
+        # Extract the delta content if available
+        choices = chunk.get("choices") if isinstance(chunk, dict) else None
+        if choices:
+            return choices[0].get("delta", {}).get("content")
+        
+        return None
+    
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Generate text based on the provided prompt.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0-2.0)
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            A dictionary containing the generated text and metadata
+        """
+        # Create the request payload
+        payload = self._create_payload(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            **kwargs
+        )
+        
+        # Make the API request with timeout
+        try:
+            response = post_with_rate_limit(
+                self.session,
+                self.api_endpoint,
+                headers=self.headers,
+                data=_dumps(payload),
+                timeout=30*3  # 30 second timeout
+            )
+        except requests.exceptions.Timeout:
+            raise Exception("API request timed out after 30 seconds")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"API request failed: {str(e)}")
+        
+        # Check for errors
+        self._check_response(response)
+        
+        # Parse and validate the response
+        return self._parse_response(response)
+    
     def generate_stream(
         self,
         prompt: str,
@@ -218,71 +369,276 @@ class OpenAILLM(BaseLLM):
             An iterator yielding generated text chunks
         """
         # Create the request payload
-        payload = {
-            "model": self.model,
-            "messages": self._create_messages(prompt),
-            "temperature": temperature,
-            "top_p": top_p,
-            "frequency_penalty": frequency_penalty,
-            "presence_penalty": presence_penalty,
-            "stream": True
-        }
-        
-        # Add optional parameters if provided
-        if max_tokens is not None:
-            payload["max_tokens"] = max_tokens
-        
-        if stop is not None:
-            payload["stop"] = stop if isinstance(stop, list) else [stop]
-        
-        # Add any additional parameters
-        for key, value in kwargs.items():
-            payload[key] = value
+        payload = self._create_payload(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            stream=True,
+            **kwargs
+        )
         
         # Make the API request
-        response = requests.post(
+        response = post_with_rate_limit(
+            self.session,
             self.api_endpoint,
             headers=self.headers,
-            data=json.dumps(payload),
+            data=_dumps(payload),
             stream=True
         )
         
         # Check for errors
-        if response.status_code != 200:
-            error_msg = f"API request failed with status code {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_msg += f": {error_data['error']['message']}"
-            except:
-                error_msg += f": {response.text}"
-            
-            raise Exception(error_msg)
-        
-        # Process the streaming response
-        for line in response.iter_lines():
-            if line:
-                # Remove the "data: " prefix
-                line = line.decode("utf-8")
-                if line.startswith("data: "):
+        self._check_response(response)
+        
+        # Read and parse the stream in a background thread, so the next chunk is
+        # received while the caller processes the previous one (the connection
+        # is released even if the caller stops consuming the stream early)
+        chunks: "SimpleQueue[Any]" = SimpleQueue()
+        threading.Thread(target=self._read_stream, args=(response, chunks), daemon=True).start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            response.close()
+    
+    def _read_stream(self, response: requests.Response, chunks: "SimpleQueue[Any]") -> None:
+        """
+        Read a streaming response, putting the delta contents in a queue.
+        
+        An error is put in the queue as the exception, and None marks the end
+        of the stream.
+        
+        Args:
+            response: The streaming API response
+            chunks: The queue to put the delta contents in
+        """
+        try:
+            for line in response.iter_lines(decode_unicode=False):
+                # Skip empty lines and SSE comments (e.g. ": keepalive")
+                if not line or line[:1] == b":":
+                    continue
+                
+                # Remove the "data: " prefix (the raw bytes are parsed
+                # directly, without decoding them first)
+                if line.startswith(b"data: "):
                     line = line[6:]
                 
-                # Skip the "[DONE]" message
-                if line == "[DONE]":
+                # Stop at the "[DONE]" message
+                if line == b"[DONE]":
                     break
                 
-                try:
-                    # Parse the JSON data
-                    data = json.loads(line)
+                content = self._parse_stream_data(line)
+                if content is not None:
+                    chunks.put(content)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(None)
+    
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """
+        Get the async HTTP client for the running event loop, creating it on first use.
+        
+        The client's pooled connections belong to the loop that opened them, so a
+        new client is created when the provider is used from another loop (e.g.
+        a second asyncio.run); the old loop is already closed, so its client is
+        dropped rather than closed.
+        
+        Returns:
+            An httpx.AsyncClient that multiplexes concurrent requests over HTTP/2
+            when h2 is installed
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            # httpx advertises the compressions it can decode itself
+            headers = {name: value for name, value in self.headers.items() if name.lower() != "accept-encoding"}
+            self._aclient = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                headers=headers,
+                timeout=httpx.Timeout(60.0),
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+            self._aclient_loop = loop
+        return self._aclient
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Generate text based on the provided prompt without blocking the event loop.
+        
+        Concurrent calls (e.g. with asyncio.gather) share one httpx connection
+        pool. Without httpx, generate runs in the default executor.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0-2.0)
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            A dictionary containing the generated text and metadata
+        """
+        if not HTTPX_AVAILABLE:
+            return await super().agenerate(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                frequency_penalty=frequency_penalty,
+                presence_penalty=presence_penalty,
+                stop=stop,
+                **kwargs
+            )
+        
+        # Create the request payload
+        payload = self._create_payload(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            **kwargs
+        )
+        
+        # Make the API request with timeout
+        try:
+            response = await self._get_async_client().post(
+                self.api_endpoint,
+                content=_dumps(payload)
+            )
+        except httpx.TimeoutException:
+            raise Exception("API request timed out after 60 seconds")
+        except httpx.HTTPError as e:
+            raise Exception(f"API request failed: {str(e)}")
+        
+        # Check for errors
+        self._check_response(response)
+        
+        # Parse and validate the response
+        return self._parse_response(response)
+    
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Generate text in a streaming fashion without blocking the event loop.
+        
+        Without httpx, the chunks of generate_stream are read in the default executor.
+        
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0-2.0)
+            top_p: Nucleus sampling parameter
+            frequency_penalty: Penalty for token frequency
+            presence_penalty: Penalty for token presence
+            stop: Stop sequences to end generation
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            An async iterator yielding generated text chunks
+        """
+        if not HTTPX_AVAILABLE:
+            loop = asyncio.get_running_loop()
+            chunks = self.generate_stream(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                frequency_penalty=frequency_penalty,
+                presence_penalty=presence_penalty,
+                stop=stop,
+                **kwargs
+            )
+            done = object()
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(None, next, chunks, done)
+                    if chunk is done:
+                        break
+                    yield chunk
+            finally:
+                chunks.close()
+            return
+        
+        # Create the request payload
+        payload = self._create_payload(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            stream=True,
+            **kwargs
+        )
+        
+        # Make the API request
+        async with self._get_async_client().stream(
+            "POST",
+            self.api_endpoint,
+            content=_dumps(payload)
+        ) as response:
+            # Check for errors (the error body has to be read first)
+            if response.status_code != 200:
+                await response.aread()
+                self._check_response(response)
+            
+            # Process the streaming response (httpx decodes the lines)
+            async for line in response.aiter_lines():
+                if line:
+                    # Remove the "data: " prefix
+                    if line.startswith("data: "):
+                        line = line[6:]
                     
-                    # Extract the delta content if available
-                    if "choices" in data and len(data["choices"]) > 0:
-                        delta = data["choices"][0].get("delta", {})
-                        if "content" in delta:
-                            yield delta["content"]
-                except json.JSONDecodeError:
-                    # Skip invalid JSON
-                    continue
+                    # Skip the "[DONE]" message
+                    if line == "[DONE]":
+                        break
+                    
+                    content = self._parse_stream_data(line)
+                    if content is not None:
+                        yield content
+    
+    async def aclose(self) -> None:
+        """
+        Close the async HTTP client, if it was created.
+        """
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+            self._aclient_loop = None
     
     def count_tokens(self, text: str) -> int:
         """
@@ -298,4 +654,95 @@ class OpenAILLM(BaseLLM):
             return len(self.encoding.encode(text))
         else:
             # Fallback: rough estimate (not accurate)
-            return len(text) // 4
\ No newline at end of file
+            return len(text) // 4
+    
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        """
+        Encode several texts to token IDs, tokenizing them in parallel.
+        
+        Args:
+            texts: The texts to encode
+            
+        Returns:
+            The token IDs of each text
+            
+        Raises:
+            RuntimeError: If tiktoken isn't installed
+        """
+        if not TIKTOKEN_AVAILABLE or self.encoding is None:
+            raise RuntimeError("tiktoken is required for encoding text. Install it with 'pip install tiktoken'.")
+        
+        # tiktoken tokenizes the texts in a thread pool, releasing the GIL
+        return self.encoding.encode_batch(texts, num_threads=os.cpu_count() or 1)
+    
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count the number of tokens in each of the provided texts.
+        
+        Args:
+            texts: The texts to count tokens for
+            
+        Returns:
+            The number of tokens in each text
+        """
+        if TIKTOKEN_AVAILABLE and self.encoding is not None:
+            return [len(tokens) for tokens in self.encode_batch(texts)]
+        else:
+            # Fallback: rough estimate (not accurate)
+            return [len(text) // 4 for text in texts]
+    
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate text so that it fits within a token budget.
+        
+        Args:
+            text: The text to truncate
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            The truncated text (or the original text if it already fits)
+        """
+        if TIKTOKEN_AVAILABLE and self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) <= max_tokens:
+                return text
+            return self.encoding.decode(tokens[:max_tokens])
+        else:
+            return super().truncate_to_tokens(text, max_tokens)
+    
+    def logit_bias_for(self, words: List[str], bias: int = -100) -> Dict[str, int]:
+        """
+        Build a logit_bias mapping that applies a bias to the given words.
+        
+        Only words that encode to a single token are included, and nothing is
+        returned unless the model's own tokenizer is known, since token IDs from
+        a fallback encoding would bias unrelated tokens.
+        
+        Args:
+            words: The words to bias (including any leading space)
+            bias: The bias to apply, from -100 (ban) to 100 (default: -100)
+            
+        Returns:
+            A dictionary mapping token IDs (as strings) to the bias
+        """
+        if not self._exact_encoding:
+            return {}
+        
+        logit_bias = {}
+        for word in words:
+            tokens = self.encoding.encode(word)
+            if len(tokens) == 1:
+                logit_bias[str(tokens[0])] = bias
+        
+        return logit_bias
+    
+    def warmup(self) -> None:
+        """
+        Open a keep-alive connection to the API with a lightweight request.
+        
+        Errors are ignored, since the first real request will surface them.
+        """
+        try:
+            self.session.head(f"{self.base_url}/models", headers=self.headers, timeout=5)
+        except requests.exceptions.RequestException:
+            pass
@@ -5,13 +5,16 @@ Main entry point for the LLMResearch CLI.
 import os
 import sys
 import click
+import asyncio
 import getpass
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 
 from llm_research.config import Config
 from llm_research.llm.base import BaseLLM
 from llm_research.llm.openai import OpenAILLM
 from llm_research.llm.custom import CustomLLM
+from llm_research.llm.cache import CachingLLM
 from llm_research.file_handler import FileHandler
 from llm_research.conversation import Conversation
 from llm_research.reasoning import Reasoning
@@ -21,6 +24,68 @@ from llm_research.url_extractor import get_url_extractor
 
 from llm_research.llm import get_llm_provider
 
+# Use uvloop's faster event loop when it is installed
+try:
+    import uvloop
+    run_async = uvloop.run
+except ImportError:
+    run_async = asyncio.run
+
+# Use prompt_toolkit for the chat prompt (with history and suggestions) when it is installed
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+    from prompt_toolkit.history import FileHistory
+    PROMPT_TOOLKIT_AVAILABLE = True
+except ImportError:
+    PROMPT_TOOLKIT_AVAILABLE = False
+
+# Chat inputs that end the session (compared case-insensitively)
+_EXIT_COMMANDS = frozenset(["exit", "quit"])
+
+# File the chat prompt history is kept in
+CHAT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".llm_research", "chat_history")
+
+def _read_context(file_paths: List[str]) -> str:
+    """
+    Read files into a single context string, with a header before each file.
+    
+    Files that can't be read are reported and skipped.
+    
+    Args:
+        file_paths: Paths of the files to read
+        
+    Returns:
+        The context (empty if no file could be read)
+    """
+    if not file_paths:
+        return ""
+    
+    file_handler = FileHandler()
+    
+    def read(f: str) -> Any:
+        try:
+            return file_handler.read_file(f)
+        except Exception as e:
+            return e
+    
+    # Read the files concurrently (PDF parsing and disk reads overlap), keeping
+    # the results in the order the files were given
+    with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+        contents = list(executor.map(read, file_paths))
+    
+    # Collect the parts and join them once, rather than growing the context file by file
+    parts = []
+    for f, content in zip(file_paths, contents):
+        if isinstance(content, Exception):
+            click.echo(f"Error reading file {f}: {content}", err=True)
+            continue
+        parts.append(f"\n\n--- {os.path.basename(f)} ---\n\n")
+        parts.append(content)
+    
+    return "".join(parts)
+
+
 @click.group()
 @click.version_option()
 def cli():
@@ -41,6 +106,10 @@ def cli():
 @click.option("--web-search/--no-web-search", default=True, help="Enable/disable web search")
 @click.option("--extract-url/--no-extract-url", default=True, help="Enable/disable URL content extraction")
 @click.option("--bocha-api-key", help="Bocha API key for web search")
+@click.option("--parallel", is_flag=True, help="Solve independent subtasks concurrently")
+@click.option("--cache/--no-cache", default=True, help="Enable/disable caching low-temperature LLM completions on disk")
+@click.option("--cache-decompositions", is_flag=True, help="Reuse the task decomposition of a recent run of the same topic")
+@click.option("--stream", is_flag=True, help="Print each reasoning step as it is generated")
 def reason(
     provider: Optional[str],
     file: List[str],
@@ -51,7 +120,11 @@ def reason(
     max_tokens: Optional[int],
     web_search: bool,
     extract_url: bool,
-    bocha_api_key: Optional[str]
+    bocha_api_key: Optional[str],
+    parallel: bool,
+    cache: bool,
+    cache_decompositions: bool,
+    stream: bool
 ):
     """
     Perform multi-step reasoning on a topic or file.
@@ -62,6 +135,12 @@ def reason(
     # Get the LLM provider
     llm = get_llm_provider(config, provider)
     
+    # Cache near-deterministic completions (validation, URL selection), so rerunning
+    # a task skips those calls; sampled completions aren't cached, since retries of
+    # a subtask resend the same prompt (see --cache-decompositions for decompositions)
+    if cache:
+        llm = CachingLLM(llm, max_temperature=0.2)
+    
     # Initialize web search tool if enabled
     web_search_tool = None
     if web_search:
@@ -94,19 +173,12 @@ def reason(
         except Exception as e:
             click.echo(f"Error initializing web search: {e}", err=True)
     
-    # Create the reasoning manager
-    reasoning = Reasoning(llm, max_steps=steps, temperature=temperature, web_search=web_search_tool, extract_url_content=extract_url, timeout=60.0)
+    # Create the reasoning manager (concurrent subtasks would interleave their
+    # streamed output, so steps are only streamed when run one at a time)
+    reasoning = Reasoning(llm, max_steps=steps, temperature=temperature, web_search=web_search_tool, extract_url_content=extract_url, timeout=60.0, stream=stream and not parallel, cache_decompositions=cache_decompositions)
     
     # Read files if provided
-    context = ""
-    if file:
-        file_handler = FileHandler()
-        for f in file:
-            try:
-                content = file_handler.read_file(f)
-                context += f"\n\n--- {os.path.basename(f)} ---\n\n{content}"
-            except Exception as e:
-                click.echo(f"Error reading file {f}: {e}", err=True)
+    context = _read_context(file)
     
     # Check if we have a topic or files
     if not topic and not file:
@@ -115,14 +187,24 @@ def reason(
     # Perform the reasoning
     if topic:
         click.echo(f"Researching topic: {topic}")
-        result = reasoning.solve_task(
-            task=topic,
-            context=context if context else None,
-            max_tokens=max_tokens,
-            max_retries=retries,
-            web_search_enabled=web_search,
-            extract_url_content=extract_url
-        )
+        if parallel:
+            result = run_async(reasoning.solve_task_async(
+                task=topic,
+                context=context if context else None,
+                max_tokens=max_tokens,
+                max_retries=retries,
+                web_search_enabled=web_search,
+                extract_url_content=extract_url
+            ))
+        else:
+            result = reasoning.solve_task(
+                task=topic,
+                context=context if context else None,
+                max_tokens=max_tokens,
+                max_retries=retries,
+                web_search_enabled=web_search,
+                extract_url_content=extract_url
+            )
     else:
         click.echo("Analyzing files...")
         result = reasoning.chain_of_thought(
@@ -159,15 +241,7 @@ def generate(
     llm = get_llm_provider(config, provider)
     
     # Read files if provided
-    context = ""
-    if file:
-        file_handler = FileHandler()
-        for f in file:
-            try:
-                content = file_handler.read_file(f)
-                context += f"\n\n--- {os.path.basename(f)} ---\n\n{content}"
-            except Exception as e:
-                click.echo(f"Error reading file {f}: {e}", err=True)
+    context = _read_context(file)
     
     # Check if we have a prompt
     if not prompt:
@@ -181,17 +255,17 @@ def generate(
     if context:
         full_prompt = f"{prompt}\n\nContext:\n{context}"
     
-    # Generate the content
+    # Generate the content, printing it as it is streamed
     click.echo("Generating content...")
-    response = llm.generate(
+    click.echo("\nGenerated content:")
+    for chunk in llm.generate_stream(
         prompt=full_prompt,
         max_tokens=max_tokens,
         temperature=temperature
-    )
-    
-    # Print the result
-    click.echo("\nGenerated content:")
-    click.echo(response["text"])
+    ):
+        click.echo(chunk, nl=False)
+        sys.stdout.flush()
+    click.echo()
 
 
 @cli.command()
@@ -228,14 +302,7 @@ def chat(
     
     # Read files if provided
     if file:
-        file_handler = FileHandler()
-        context = ""
-        for f in file:
-            try:
-                content = file_handler.read_file(f)
-                context += f"\n\n--- {os.path.basename(f)} ---\n\n{content}"
-            except Exception as e:
-                click.echo(f"Error reading file {f}: {e}", err=True)
+        context = _read_context(file)
         
         # Add the context as a user message
         if context:
@@ -249,18 +316,35 @@ def chat(
     click.echo("Type 'load <filename>' to load a conversation.")
     click.echo()
     
+    # Create the prompt once, so its line editing state and history are reused
+    if PROMPT_TOOLKIT_AVAILABLE:
+        os.makedirs(os.path.dirname(CHAT_HISTORY_PATH), exist_ok=True)
+        prompt_session = PromptSession(
+            history=FileHistory(CHAT_HISTORY_PATH),
+            auto_suggest=AutoSuggestFromHistory()
+        )
+        read_input = prompt_session.prompt
+    else:
+        read_input = input
+    
     while True:
-        # Get user input
-        user_input = input("> ")
+        # Get user input (Ctrl-D ends the session)
+        try:
+            user_input = read_input("> ")
+        except EOFError:
+            break
         
-        # Check for special commands
-        if user_input.lower() in ["exit", "quit"]:
+        # Check for special commands (only the start of the input is lowercased,
+        # since it's all the commands are matched against)
+        head = user_input[:6].lower()
+        command = head[:5]
+        if head in _EXIT_COMMANDS:
             break
-        elif user_input.lower() == "clear":
+        elif head == "clear":
             conversation.clear_conversation()
             click.echo("Conversation history cleared.")
             continue
-        elif user_input.lower().startswith("save "):
+        elif command == "save ":
             filename = user_input[5:].strip()
             try:
                 conversation.save_conversation(filename)
@@ -268,7 +352,7 @@ def chat(
             except Exception as e:
                 click.echo(f"Error saving conversation: {e}", err=True)
             continue
-        elif user_input.lower().startswith("load "):
+        elif command == "load ":
             filename = user_input[5:].strip()
             try:
                 conversation.load_conversation(filename)
@@ -280,15 +364,21 @@ def chat(
         # Add the user message
         conversation.add_message("user", user_input)
         
-        # Generate the response
-        click.echo("Thinking...")
+        # Drop the messages that no longer fit in the prompt
+        conversation.trim_to()
+        
+        # Generate the response, printing it as it is streamed
+        click.echo("Assistant: ", nl=False)
         try:
-            response = conversation.generate_response(
+            for chunk in conversation.generate_response_stream(
                 max_tokens=max_tokens,
                 temperature=temperature
-            )
-            click.echo(f"Assistant: {response}")
+            ):
+                click.echo(chunk, nl=False)
+                sys.stdout.flush()
+            click.echo()
         except Exception as e:
+            click.echo()
             click.echo(f"Error generating response: {e}", err=True)
 
 
@@ -366,17 +456,20 @@ def config_add(name: str, base_url: str, model: str, type: str, set_default: boo
         "api_key": ""
     }
     
-    # Set the provider configuration
-    config.set_provider_config(name, provider_config)
-    
-    # Set as default if requested
-    if set_default:
-        config.set_default_provider(name)
-    
     # Prompt for the API key
     api_key = getpass.getpass(f"Enter API key for {name} (leave empty to set later): ")
-    if api_key:
-        config.set_api_key(name, api_key)
+    
+    # Save all changes with a single write of the config file
+    with config.batch_update():
+        # Set the provider configuration
+        config.set_provider_config(name, provider_config)
+        
+        # Set as default if requested
+        if set_default:
+            config.set_default_provider(name)
+        
+        if api_key:
+            config.set_api_key(name, api_key)
     
     click.echo(f"Provider {name} added successfully.")
 
@@ -2,15 +2,145 @@
 Multi-step reasoning for complex tasks.
 """
 
+import os
+import re
+import sys
 import time
-from typing import List, Dict, Any, Optional, Union, Callable
+import hashlib
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple
 from dataclasses import dataclass, field
+from contextlib import contextmanager
 
+from llm_research import _fastjson
+from llm_research._sqlite_cache import SQLiteCache
 from llm_research.llm.base import BaseLLM
 from llm_research.conversation import Conversation
 from llm_research.web_search import BochaWebSearch
 from llm_research.url_extractor import get_url_extractor
 
+# Matches the numbers in URL selection responses and dependency annotations
+_NUMBER_RE = re.compile(r"\d+")
+
+# Matches a numbered or bulleted line of a task decomposition, capturing the text
+# after the number/bullet and any following punctuation
+_SUBTASK_LINE_RE = re.compile(r"^[^\S\n]*[\d-][\d.\-) \t]*(.*?)[^\S\n]*$", re.MULTILINE)
+
+# Matches a "(depends on: 1, 2)" annotation at the end of a subtask
+_DEPENDS_ON_RE = re.compile(r"\(\s*depends on:?\s*([^)]*)\)\s*$", re.IGNORECASE)
+
+# Matches the "### N" headers separating the answers of a batched call
+_BATCH_HEADER_RE = re.compile(r"^###\s*(\d+)\s*$", re.MULTILINE)
+
+# Default location of the persistent task decomposition cache
+DEFAULT_DECOMPOSITION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".llm_research", "decomposition_cache.db")
+
+# Default time-to-live for cached task decompositions (in seconds)
+DEFAULT_DECOMPOSITION_CACHE_TTL = 86400
+
+# Number of times a task decomposition with too many subtasks is retried
+DECOMPOSITION_RETRIES = 2
+
+# Number of characters kept from the start and from the end of each earlier
+# subtask result in the "summary" history mode
+SUMMARY_EXCERPT_CHARS = 200
+
+# Maximum number of earlier subtask results excerpted in the "summary" history
+# mode (the most recent ones), so the summary stays bounded for long plans
+SUMMARY_MAX_RESULTS = 8
+
+# Maximum number of web searches from a single step run at the same time
+MAX_PARALLEL_SEARCHES = 4
+
+# Self-reflection filler words that can be suppressed in reasoning models' output
+REFLECTION_WORDS = [" wait", " Wait", " hmm", " Hmm", " alternatively", " Alternatively", " however", " However"]
+
+
+def _parse_json_object(text: str) -> Any:
+    """
+    Parse the JSON object in a response, ignoring any text around it
+    (such as a Markdown code fence).
+    
+    Args:
+        text: The response text
+        
+    Returns:
+        The parsed object, or None if the response doesn't contain valid JSON
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    
+    try:
+        return _fastjson.loads(text[start:end + 1])
+    except _fastjson.JSONDecodeError:
+        return None
+
+
+def _excerpt(text: str, chars: int) -> str:
+    """
+    Shorten a text to its start and end.
+    
+    Args:
+        text: The text to shorten
+        chars: Number of characters to keep from the start and from the end
+        
+    Returns:
+        The text, or its first and last characters joined by an ellipsis if it is longer
+    """
+    if len(text) <= 2 * chars + 5:
+        return text
+    return text[:chars] + " ... " + text[-chars:]
+
+
+def _validation_prompt(subtask: str, response: str) -> str:
+    """
+    Build the prompt asking whether a subtask's response completes it.
+    
+    Args:
+        subtask: The subtask to validate
+        response: The response to validate
+        
+    Returns:
+        The validation prompt
+    """
+    return """Evaluate if the following subtask has been completed successfully based on the response.
+            
+            Instructions:
+            1. Only answer with "Yes" or "No"
+            2. Do not provide any explanation
+            3. Consider the response complete if it addresses the subtask
+            
+            Subtask: {subtask}
+            
+            Response: {response}
+            
+            Answer:""".format(subtask=subtask, response=response)
+
+
+def _is_validated(validation_text: str) -> bool:
+    """
+    Check whether a validation response says the subtask is complete.
+    
+    Args:
+        validation_text: The validation response
+        
+    Returns:
+        True if the response starts with "yes"
+    """
+    # Extract and clean the validation result (taking only the first word)
+    validation_text = validation_text.strip().lower()
+    validation_text = validation_text.split()[0]
+    
+    # Log the validation response for debugging
+    print(f"🔍 验证结果: {validation_text}")
+    
+    return validation_text.startswith("yes")
+
 
 @dataclass
 class ReasoningStep:
@@ -23,6 +153,78 @@ class ReasoningStep:
     timestamp: float = field(default_factory=time.time)
 
 
+class DecompositionCache:
+    """
+    Persistent SQLite cache for task decompositions.
+    
+    Entries are keyed on the model, task, context and decomposition settings and
+    expire after a configurable time-to-live, so solving the same task again soon
+    skips the decomposition LLM calls.
+    """
+    
+    def __init__(self, cache_path: str = DEFAULT_DECOMPOSITION_CACHE_PATH, ttl: int = DEFAULT_DECOMPOSITION_CACHE_TTL):
+        """
+        Initialize the decomposition cache.
+        
+        Args:
+            cache_path: Path to the SQLite database file
+            ttl: Time-to-live for cache entries (in seconds)
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._store = SQLiteCache(cache_path)
+        self._store.prune(ttl)
+    
+    @staticmethod
+    def _make_key(params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a decomposition request.
+        
+        Args:
+            params: The decomposition parameters
+            
+        Returns:
+            The cache key
+        """
+        return hashlib.blake2b(
+            _fastjson.dumps(params, sort_keys=True), digest_size=16
+        ).hexdigest()
+    
+    def get(self, params: Dict[str, Any]) -> Optional[Tuple[List[str], List[Optional[List[int]]]]]:
+        """
+        Get a cached decomposition.
+        
+        Args:
+            params: The decomposition parameters
+            
+        Returns:
+            A tuple of the cached subtasks and their dependencies, or None if there is no fresh entry
+        """
+        body = self._store.get(self._make_key(params), ttl=self.ttl)
+        if body is None:
+            return None
+        
+        decomposition = _fastjson.loads(body)
+        return decomposition["subtasks"], decomposition["dependencies"]
+    
+    def set(
+        self,
+        params: Dict[str, Any],
+        subtasks: List[str],
+        dependencies: List[Optional[List[int]]]
+    ) -> None:
+        """
+        Store a decomposition in the cache.
+        
+        Args:
+            params: The decomposition parameters
+            subtasks: The subtasks
+            dependencies: The dependencies of each subtask
+        """
+        body = _fastjson.dumps({"subtasks": subtasks, "dependencies": dependencies})
+        self._store.set(self._make_key(params), body)
+
+
 class Reasoning:
     """
     Multi-step reasoning for complex tasks.
@@ -39,7 +241,16 @@ class Reasoning:
         web_search: Optional[BochaWebSearch] = None,
         extract_url_content: bool = True,
         ws_handler: Optional[Callable[[str], None]] = None,
-        timeout: Optional[float] = 30.0
+        timeout: Optional[float] = 30.0,
+        cache_url_content: bool = False,
+        selector_llm: Optional[BaseLLM] = None,
+        previous_results_window: Optional[int] = None,
+        suppress_reflection: bool = False,
+        batch_size: int = 1,
+        stream: bool = False,
+        cache_decompositions: bool = False,
+        speculative_decomposition: bool = False,
+        history_mode: Optional[str] = None
     ):
         """
         Initialize the reasoning manager.
@@ -52,16 +263,65 @@ class Reasoning:
             extract_url_content: Whether to extract content from URLs found in search results (default: True)
             ws_handler: WebSocket handler function for sending logs to UI (optional)
             timeout: Maximum time in seconds for each reasoning step (default: 30.0)
+            cache_url_content: Whether to cache extracted URL content on disk (default: False)
+            selector_llm: Cheaper LLM used to select which search result URLs to extract (optional, defaults to llm)
+            previous_results_window: Maximum number of earlier subtask results included in each subtask prompt (optional, defaults to all)
+            suppress_reflection: Whether to suppress self-reflection filler words ("wait", "hmm", ...) in reasoning steps
+                via logit_bias (default: False). Meant for RL-trained reasoning models (distilled models lose
+                accuracy with it). It only has an effect when the provider knows the model's tokenizer, e.g.
+                OpenAILLM with a model tiktoken recognizes; otherwise no bias is sent.
+            batch_size: Maximum number of independent subtasks answered together in a single LLM call
+                (default: 1, no batching)
+            stream: Whether to stream each reasoning step's response to stdout as it is generated
+                (default: False)
+            cache_decompositions: Whether to cache task decompositions on disk (default: False)
+            speculative_decomposition: Whether to run the task decomposition retries concurrently
+                with the first attempt instead of after it fails, at the cost of always sending
+                every attempt (default: False)
+            history_mode: How earlier subtask results are included in each subtask prompt: "full" for
+                the complete results, "window-k" for only the k most recent results, or "summary" for
+                an excerpt of the start and end of each of the SUMMARY_MAX_RESULTS most recent results
+                (optional, defaults to "window-k" if previous_results_window is set, otherwise "full")
         """
         self.llm = llm
+        self.selector_llm = selector_llm
         self.max_steps = max_steps
         self.temperature = temperature
         self.web_search = web_search
         self.extract_url_content = extract_url_content
-        self.url_extractor = get_url_extractor() if extract_url_content else None
+        self.cache_url_content = cache_url_content
+        self.url_extractor = get_url_extractor(use_cache=cache_url_content) if extract_url_content else None
         self.steps: List[ReasoningStep] = []
+        
+        # Number of the most recently started step, reserved when the step starts
+        # so concurrent steps don't share a number before they are recorded
+        self._last_step_num = 0
+        self._step_num_lock = threading.Lock()
         self.ws_handler = ws_handler
         self.timeout = timeout
+        self.batch_size = batch_size
+        self.stream = stream
+        self.decomposition_cache = DecompositionCache() if cache_decompositions else None
+        self.speculative_decomposition = speculative_decomposition
+        
+        if history_mode is None:
+            history_mode = "full" if previous_results_window is None else f"window-{previous_results_window}"
+        if history_mode.startswith("window-") and history_mode[len("window-"):].isdigit():
+            previous_results_window = int(history_mode[len("window-"):])
+        elif history_mode in ("full", "summary"):
+            previous_results_window = None
+        else:
+            raise ValueError(f"Unsupported history mode: {history_mode}")
+        self.history_mode = history_mode
+        self.previous_results_window = previous_results_window
+        
+        self.suppress_reflection = suppress_reflection
+        
+        # Build the token bias once; providers that can't map the words to the
+        # model's token IDs return no bias, so nothing is sent
+        self._reflection_bias: Dict[str, int] = {}
+        if suppress_reflection and hasattr(llm, "logit_bias_for"):
+            self._reflection_bias = llm.logit_bias_for(REFLECTION_WORDS)
 
     def _log(self, message: Union[str, Dict[str, Any]]) -> None:
         """Send log message to UI if ws_handler is available"""
@@ -140,35 +400,171 @@ class Reasoning:
         """
         # Use instance timeout if not specified
         timeout = timeout if timeout is not None else self.timeout
+        step_num = self._start_step(prompt, timeout)
         
-        # Show thinking indicator
-        step_num = len(self.steps) + 1
-        print(f"💭 步骤 {step_num}: 模型思考中... (timeout: {timeout}s)")
+        # Use the provided temperature or the default
+        temp = temperature if temperature is not None else self.temperature
+        kwargs = self._step_kwargs(kwargs)
         
-        # Send step start event
-        self._log({
-            "type": "step_start",
-            "step_num": step_num,
-            "message": f"💭 步骤 {step_num}: 模型思考中... (timeout: {timeout}s)",
-            "prompt": prompt
-        })
+        try:
+            if self.stream:
+                # Print the tokens as they arrive instead of waiting for the
+                # whole response
+                chunks: List[str] = []
+                for chunk in self.llm.generate_stream(
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temp,
+                    timeout=timeout,
+                    **kwargs
+                ):
+                    chunks.append(chunk)
+                    sys.stdout.write(chunk)
+                    sys.stdout.flush()
+                print()
+                
+                response_text = "".join(chunks)
+            else:
+                # Generate the response with timeout
+                response = self.llm.generate(
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temp,
+                    timeout=timeout,
+                    **kwargs
+                )
+                
+                response_text = response["text"]
+            
+        except Exception as e:
+            self._fail_step(step_num, timeout, e)
+            raise
+        
+        # Check if the response contains a search request
+        if self.web_search and "SEARCH:" in response_text:
+            response_text = self._answer_with_searches(prompt, response_text, max_tokens, temp, **kwargs)
+        
+        self._finish_step(step_num, prompt, response_text)
+        
+        return response_text
+    
+    async def aexecute_step(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """
+        Execute a reasoning step asynchronously.
+        
+        The response is awaited with the provider's agenerate; web searches
+        requested by the response run in the default executor. Responses are
+        not streamed, since concurrent steps would interleave their output.
+        
+        Args:
+            prompt: The prompt for this step
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            timeout: Maximum time in seconds for this step (default: instance timeout)
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            The generated response
+            
+        Raises:
+            TimeoutError: If the step exceeds the timeout duration
+        """
+        # Use instance timeout if not specified
+        timeout = timeout if timeout is not None else self.timeout
+        step_num = self._start_step(prompt, timeout)
         
         # Use the provided temperature or the default
         temp = temperature if temperature is not None else self.temperature
+        kwargs = self._step_kwargs(kwargs)
         
         try:
-            # Generate the response with timeout
-            response = self.llm.generate(
+            response = await self.llm.agenerate(
                 prompt=prompt,
                 max_tokens=max_tokens,
                 temperature=temp,
                 timeout=timeout,
                 **kwargs
             )
-            
             response_text = response["text"]
+        except Exception as e:
+            self._fail_step(step_num, timeout, e)
+            raise
+        
+        # Check if the response contains a search request
+        if self.web_search and "SEARCH:" in response_text:
+            response_text = await asyncio.get_running_loop().run_in_executor(None, partial(
+                self._answer_with_searches, prompt, response_text, max_tokens, temp, **kwargs
+            ))
+        
+        self._finish_step(step_num, prompt, response_text)
+        
+        return response_text
+    
+    def _start_step(self, prompt: str, timeout: Optional[float]) -> int:
+        """
+        Announce the start of a reasoning step.
+        
+        Args:
+            prompt: The prompt for this step
+            timeout: Maximum time in seconds for this step
             
-        except TimeoutError:
+        Returns:
+            The 1-based number of the step
+        """
+        # Reserve the step number (steps added with add_step count too)
+        with self._step_num_lock:
+            step_num = max(self._last_step_num, len(self.steps)) + 1
+            self._last_step_num = step_num
+        
+        # Show thinking indicator
+        print(f"💭 步骤 {step_num}: 模型思考中... (timeout: {timeout}s)")
+        
+        # Send step start event
+        self._log({
+            "type": "step_start",
+            "step_num": step_num,
+            "message": f"💭 步骤 {step_num}: 模型思考中... (timeout: {timeout}s)",
+            "prompt": prompt
+        })
+        
+        return step_num
+    
+    def _step_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add the reasoning settings to the LLM parameters of a step.
+        
+        Args:
+            kwargs: The caller's additional parameters for the LLM
+            
+        Returns:
+            The parameters to send
+        """
+        # Suppress self-reflection fillers, keeping any caller-provided biases
+        if self._reflection_bias:
+            kwargs["logit_bias"] = {**self._reflection_bias, **kwargs.get("logit_bias", {})}
+        
+        return kwargs
+    
+    def _fail_step(self, step_num: int, timeout: Optional[float], error: Exception) -> None:
+        """
+        Report a failed reasoning step.
+        
+        Args:
+            step_num: The 1-based number of the step
+            timeout: Maximum time in seconds for the step
+            error: The error raised by the LLM call
+            
+        Raises:
+            TimeoutError: If the step exceeded the timeout duration
+        """
+        if isinstance(error, TimeoutError):
             error_msg = f"❌ 步骤 {step_num} 超时 (超过 {timeout} 秒)"
             print(error_msg)
             self._log({
@@ -178,154 +574,28 @@ class Reasoning:
                 "error": "timeout"
             })
             raise TimeoutError(error_msg)
-            
-        except Exception as e:
-            error_msg = f"❌ 步骤 {step_num} 出错: {str(e)}"
-            print(error_msg)
-            self._log({
-                "type": "step_error",
-                "step_num": step_num,
-                "message": error_msg,
-                "error": str(e)
-            })
-            raise
         
-        # Check if the response contains a search request
-        if self.web_search and "SEARCH:" in response_text:
-            # Extract the search query
-            lines = response_text.split("\n")
-            search_queries = []
-            
-            for i, line in enumerate(lines):
-                if line.strip().startswith("SEARCH:"):
-                    query = line.strip()[len("SEARCH:"):].strip()
-                    search_queries.append((i, query))
-            
-            # If we found search queries, perform the searches and update the response
-            if search_queries:
-                print(f"🔍 检测到搜索请求，执行网络搜索...")
-                
-                for idx, query in search_queries:
-                    print(f"🌐 搜索查询: \"{query}\"")
-                    search_results = self.web_search.search(query=query)
-                    
-                    # Extract content from URLs if enabled
-                    extracted_contents = []
-                    if self.extract_url_content and self.url_extractor:
-                        # Check if search was successful
-                        print(f"🔍 搜索结果: {search_results}")
-                        if search_results["success"] and search_results.get("results"):
-                            urls = []
-                            url_summaries = []
-                            
-                            # Collect URLs and their summaries
-                            print(f"🔍 处理 {len(search_results['results'])} 个搜索结果")
-                            for i, result in enumerate(search_results["results"]):
-                                print(f"🔍 处理结果 {i+1}: {result['name']}")
-                                urls.append(result["url"])
-                                url_summaries.append({
-                                    "url": result["url"],
-                                    "title": result["name"],
-                                    "summary": result["summary"]
-                                })
-                            print(f"✅ 收集到 {len(urls)} 个URL")
-                            
-                            if urls:
-                                print(f"📄 从搜索结果中发现 {len(urls)} 个URL，提取内容...")
-                                
-                                # Create a prompt to ask the LLM which URLs to extract content from
-                                url_selection_prompt = f"Based on the following search results for the query '{query}', which URLs would be most relevant to extract full content from? Select up to 3 URLs that seem most promising based on their summaries.\n\n"
-                                
-                                # Add formatted summaries for the LLM to evaluate
-                                for i, summary in enumerate(url_summaries, start=1):
-                                    url_selection_prompt += f"{i}. {summary['title']}\n   URL: {summary['url']}\n   Summary: {summary['summary']}\n\n"
-                                
-                                url_selection_prompt += "List the numbers of the most relevant URLs (e.g., '1, 3, 5'):"
-                                
-                                # Get the LLM's recommendation on which URLs to extract
-                                url_selection_response = self.llm.generate(
-                                    prompt=url_selection_prompt,
-                                    max_tokens=50,
-                                    temperature=0.3
-                                )
-                                
-                                # Parse the response to get the selected URL indices
-                                selected_indices = []
-                                selection_text = url_selection_response["text"].strip()
-                                print(f"🔍 URL选择响应: {selection_text}")
-                                print(f"🔍 可用URL数量: {len(urls)}")
-                                
-                                # Try to parse numbers from the response
-                                import re
-                                numbers = re.findall(r'\d+', selection_text)
-                                print(f"🔍 解析到的数字: {numbers}")
-                                
-                                # Only accept numbers that could be valid indices (1-N)
-                                max_valid_number = len(urls)
-                                valid_numbers = [num for num in numbers if num.isdigit() and 1 <= int(num) <= max_valid_number]
-                                print(f"🔍 有效数字范围: 1-{max_valid_number}")
-                                print(f"🔍 有效数字: {valid_numbers}")
-                                
-                                for num in valid_numbers:
-                                    try:
-                                        idx = int(num) - 1  # Convert to 0-based index
-                                        print(f"🔍 尝试索引: {idx}")
-                                        if 0 <= idx < len(urls):
-                                            selected_indices.append(idx)
-                                            print(f"✅ 有效索引: {idx}")
-                                        else:
-                                            print(f"❌ 无效索引: {idx} (超出范围)")
-                                    except ValueError as e:
-                                        print(f"❌ 数值转换错误: {e}")
-                                        continue
-                                
-                                # Limit to at most 3 URLs
-                                selected_indices = selected_indices[:3]
-                                
-                                # Extract content from the selected URLs
-                                for url_idx in selected_indices:
-                                    url = urls[url_idx]
-                                    try:
-                                        print(f"📥 提取URL内容: {url}")
-                                        content = self.url_extractor.extract_content(url, output_format="markdown")
-                                        
-                                        # Truncate content if it's too long (to avoid token limits)
-                                        max_content_length = 4000
-                                        if len(content) > max_content_length:
-                                            content = content[:max_content_length] + "...\n[Content truncated due to length]"
-                                        
-                                        extracted_contents.append(f"Extracted content from {url}:\n\n{content}\n\n")
-                                        print(f"✅ 成功提取内容，长度: {len(content)} 字符")
-                                    except Exception as e:
-                                        print(f"❌ 提取内容失败: {str(e)}")
-                    
-                    # Format the search results for inclusion in the prompt
-                    formatted_search_results = self.web_search.format_search_results(search_results)
-                    
-                    # Add the extracted contents to the formatted search results
-                    if extracted_contents:
-                        formatted_search_results += "\n\n" + "\n".join(extracted_contents)
-                    
-                    # Replace the search line with the query and results
-                    lines[idx] = f"SEARCH: {query}\n\nSearch Results:\n{formatted_search_results}\n"
-                
-                # Reconstruct the response with search results
-                updated_prompt = prompt + "\n\n" + "\n".join(lines)
-                
-                # Generate a new response with the search results
-                print(f"💭 使用搜索结果重新生成回答...")
-                new_response = self.llm.generate(
-                    prompt=updated_prompt,
-                    max_tokens=max_tokens,
-                    temperature=temp,
-                    **kwargs
-                )
-                
-                # Update the response text
-                response_text = new_response["text"]
+        error_msg = f"❌ 步骤 {step_num} 出错: {str(error)}"
+        print(error_msg)
+        self._log({
+            "type": "step_error",
+            "step_num": step_num,
+            "message": error_msg,
+            "error": str(error)
+        })
+    
+    def _finish_step(self, step_num: int, prompt: str, response_text: str) -> None:
+        """
+        Record a completed reasoning step.
         
-        # Add the step
-        self.add_step(prompt, response_text)
+        Args:
+            step_num: The 1-based number of the step
+            prompt: The prompt for the step
+            response_text: The response of the step
+        """
+        # Add the step (concurrent steps may finish out of order, so the number
+        # reserved when it started is recorded with it)
+        self.add_step(prompt, response_text, {"step_num": step_num})
         
         # Send step complete event
         self._log({
@@ -334,65 +604,326 @@ class Reasoning:
             "message": f"✅ 步骤 {step_num} 完成",
             "response": response_text
         })
-        
-        return response_text
     
-    def chain_of_thought(
+    def _answer_with_searches(
         self,
-        question: str,
-        context: Optional[str] = None,
-        max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None,
+        prompt: str,
+        response_text: str,
+        max_tokens: Optional[int],
+        temperature: float,
         **kwargs
     ) -> str:
         """
-        Perform chain-of-thought reasoning.
+        Run the web searches requested by a response and answer again with their results.
         
         Args:
-            question: The question to answer
-            context: Additional context (optional)
+            prompt: The prompt of the step
+            response_text: The response containing "SEARCH:" lines
             max_tokens: Maximum number of tokens to generate
             temperature: Sampling temperature
             **kwargs: Additional parameters for the LLM
             
         Returns:
-            The final answer
+            The new response, or the original one if it has no search queries
         """
-        # Construct the prompt
-        prompt = "Let's solve this step-by-step:\n\n"
+        # Extract the search query
+        lines = response_text.split("\n")
+        search_queries = []
         
-        if context:
-            prompt += f"Context:\n{context}\n\n"
+        for i, line in enumerate(lines):
+            if line.strip().startswith("SEARCH:"):
+                query = line.strip()[len("SEARCH:"):].strip()
+                search_queries.append((i, query))
         
-        prompt += f"Question: {question}\n\n"
-        prompt += "Reasoning:"
+        # If we found search queries, perform the searches and update the response
+        if not search_queries:
+            return response_text
         
-        # Execute the reasoning step
-        reasoning = self.execute_step(
-            prompt=prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            **kwargs
-        )
+        print(f"🔍 检测到搜索请求，执行网络搜索...")
         
-        # Extract the answer from the reasoning
-        answer_prompt = f"Based on the following reasoning, provide a concise answer to the question: '{question}'\n\n"
-        answer_prompt += f"Reasoning:\n{reasoning}\n\n"
-        answer_prompt += "Answer:"
+        # Run several searches concurrently, since each one waits on
+        # the network (and on URL extraction)
+        queries = [query for _, query in search_queries]
+        if len(queries) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(queries), MAX_PARALLEL_SEARCHES)) as executor:
+                search_outputs = list(executor.map(self._search_and_extract, queries))
+        else:
+            search_outputs = [self._search_and_extract(queries[0])]
         
-        # Execute the answer step
-        answer = self.execute_step(
-            prompt=answer_prompt,
+        for (idx, query), formatted_search_results in zip(search_queries, search_outputs):
+            # Replace the search line with the query and results
+            lines[idx] = f"SEARCH: {query}\n\nSearch Results:\n{formatted_search_results}\n"
+        
+        # Reconstruct the response with search results
+        updated_prompt = prompt + "\n\n" + "\n".join(lines)
+        
+        # Generate a new response with the search results
+        print(f"💭 使用搜索结果重新生成回答...")
+        new_response = self.llm.generate(
+            prompt=updated_prompt,
             max_tokens=max_tokens,
             temperature=temperature,
             **kwargs
         )
         
-        return answer
+        return new_response["text"]
     
-    def task_decomposition(
-        self,
-        task: str,
+    def _search_and_extract(self, query: str) -> str:
+        """
+        Run a web search and extract content from the most relevant result URLs.
+        
+        Args:
+            query: The search query
+        
+        Returns:
+            The formatted search results, followed by any extracted content
+        """
+        print(f"🌐 搜索查询: \"{query}\"")
+        search_results = self.web_search.search(query=query)
+        
+        # Extract content from URLs if enabled
+        extracted_contents = []
+        if self.extract_url_content and self.url_extractor:
+            # Check if search was successful
+            print(f"🔍 搜索结果: {search_results}")
+            if search_results["success"] and search_results.get("results"):
+                urls = []
+                url_summaries = []
+                
+                # Collect URLs and their summaries
+                print(f"🔍 处理 {len(search_results['results'])} 个搜索结果")
+                for i, result in enumerate(search_results["results"]):
+                    print(f"🔍 处理结果 {i+1}: {result['name']}")
+                    urls.append(result["url"])
+                    url_summaries.append({
+                        "url": result["url"],
+                        "title": result["name"],
+                        "summary": result["summary"]
+                    })
+                print(f"✅ 收集到 {len(urls)} 个URL")
+                
+                if urls:
+                    print(f"📄 从搜索结果中发现 {len(urls)} 个URL，提取内容...")
+                    
+                    # Decide which URLs are worth extracting
+                    selected_indices = self._select_urls(query, url_summaries)
+                    
+                    # Extract content from the selected URLs
+                    for url_idx in selected_indices:
+                        url = urls[url_idx]
+                        try:
+                            print(f"📥 提取URL内容: {url}")
+                            content = self.url_extractor.extract_content(url, output_format="markdown")
+                            
+                            # Truncate content if it's too long (to avoid token limits)
+                            max_content_length = 4000
+                            if len(content) > max_content_length:
+                                content = content[:max_content_length] + "...\n[Content truncated due to length]"
+                            
+                            extracted_contents.append(f"Extracted content from {url}:\n\n{content}\n\n")
+                            print(f"✅ 成功提取内容，长度: {len(content)} 字符")
+                        except Exception as e:
+                            print(f"❌ 提取内容失败: {str(e)}")
+        
+        # Format the search results for inclusion in the prompt
+        formatted_search_results = self.web_search.format_search_results(search_results)
+        
+        # Add the extracted contents to the formatted search results
+        if extracted_contents:
+            formatted_search_results += "\n\n" + "\n".join(extracted_contents)
+        
+        return formatted_search_results
+
+    def _trim_summary(self, summary: str, max_tokens: int) -> str:
+        """
+        Shorten a search result summary for the URL selection prompt.
+        
+        Args:
+            summary: The full summary
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            The summary, truncated and marked with an ellipsis if it was too long
+        """
+        trimmed = self.llm.truncate_to_tokens(summary, max_tokens)
+        if len(trimmed) < len(summary):
+            return trimmed.rstrip() + "…"
+        return summary
+    
+    def _select_urls(
+        self,
+        query: str,
+        url_summaries: List[Dict[str, str]],
+        max_summary_tokens: int = 60
+    ) -> List[int]:
+        """
+        Select the search results whose URLs are worth extracting content from.
+        
+        Args:
+            query: The search query
+            url_summaries: The url, title and summary of each search result
+            max_summary_tokens: Maximum number of tokens of each summary included in the prompt (default: 60)
+            
+        Returns:
+            The 0-based indices of at most 3 selected search results
+        """
+        # With only a few results there is nothing to choose, so skip the LLM
+        if len(url_summaries) <= 3:
+            return list(range(len(url_summaries)))
+        
+        # Create a prompt to ask the LLM which URLs to extract content from
+        parts = [f"Based on the following search results for the query '{query}', which URLs would be most relevant to extract full content from? Select up to 3 URLs that seem most promising based on their summaries.\n\n"]
+        
+        # Add formatted summaries for the LLM to evaluate (joined once at the
+        # end rather than growing the prompt string in the loop)
+        parts.extend(
+            f"{i}. {summary['title']}\n   URL: {summary['url']}\n   Summary: {self._trim_summary(summary['summary'], max_summary_tokens)}\n\n"
+            for i, summary in enumerate(url_summaries, start=1)
+        )
+        
+        parts.append("List the numbers of the most relevant URLs (e.g., '1, 3, 5'):")
+        url_selection_prompt = "".join(parts)
+        
+        # Get the LLM's recommendation on which URLs to extract, preferring the
+        # cheaper selector model and falling back to the main model on errors
+        url_selection_response = None
+        if self.selector_llm is not None:
+            try:
+                url_selection_response = self.selector_llm.generate(
+                    prompt=url_selection_prompt,
+                    max_tokens=50,
+                    temperature=0.3
+                )
+            except Exception as e:
+                print(f"❌ URL选择模型出错，使用主模型: {str(e)}")
+        
+        if url_selection_response is None:
+            url_selection_response = self.llm.generate(
+                prompt=url_selection_prompt,
+                max_tokens=50,
+                temperature=0.3
+            )
+        
+        # Parse the response to get the selected URL indices
+        selected_indices = []
+        selection_text = url_selection_response["text"].strip()
+        print(f"🔍 URL选择响应: {selection_text}")
+        print(f"🔍 可用URL数量: {len(url_summaries)}")
+        
+        # Try to parse numbers from the response
+        numbers = _NUMBER_RE.findall(selection_text)
+        print(f"🔍 解析到的数字: {numbers}")
+        
+        # Only accept numbers that could be valid indices (1-N)
+        max_valid_number = len(url_summaries)
+        valid_numbers = [num for num in numbers if num.isdigit() and 1 <= int(num) <= max_valid_number]
+        print(f"🔍 有效数字范围: 1-{max_valid_number}")
+        print(f"🔍 有效数字: {valid_numbers}")
+        
+        for num in valid_numbers:
+            try:
+                idx = int(num) - 1  # Convert to 0-based index
+                print(f"🔍 尝试索引: {idx}")
+                if 0 <= idx < len(url_summaries):
+                    selected_indices.append(idx)
+                    print(f"✅ 有效索引: {idx}")
+                else:
+                    print(f"❌ 无效索引: {idx} (超出范围)")
+            except ValueError as e:
+                print(f"❌ 数值转换错误: {e}")
+                continue
+        
+        # Limit to at most 3 URLs
+        selected_indices = selected_indices[:3]
+        
+        return selected_indices
+    
+    def chain_of_thought(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """
+        Perform chain-of-thought reasoning.
+        
+        Args:
+            question: The question to answer
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            The final answer
+        """
+        # Construct the prompt, asking for the reasoning and the answer in a
+        # single response so the reasoning isn't sent back for a second call
+        prompt = "Let's solve this step-by-step:\n\n"
+        
+        if context:
+            prompt += f"Context:\n{context}\n\n"
+        
+        prompt += f"Question: {question}\n\n"
+        prompt += 'Respond in JSON as {"reasoning": "...", "answer": "..."}, where "answer" is a concise answer to the question.'
+        
+        # Use the provider's JSON mode if it is enabled for it
+        json_mode = getattr(self.llm, "supports_json_mode", False) and "response_format" not in kwargs
+        
+        # Execute the reasoning step
+        try:
+            response = self.execute_step(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **({**kwargs, "response_format": {"type": "json_object"}} if json_mode else kwargs)
+            )
+        except TimeoutError:
+            raise
+        except Exception:
+            if not json_mode:
+                raise
+            
+            # The API may reject response_format, so ask again without it
+            print("⚠️ JSON模式请求失败，改为普通请求重试...")
+            response = self.execute_step(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+        
+        result = _parse_json_object(response)
+        if isinstance(result, dict) and isinstance(result.get("answer"), str):
+            step = self.steps[-1]
+            step.metadata.update({
+                "kind": "cot_fused",
+                "reasoning": result.get("reasoning", ""),
+                "answer": result["answer"]
+            })
+            return result["answer"]
+        
+        # The response wasn't the requested JSON, so extract the answer from it
+        # with a second call
+        answer_prompt = f"Based on the following reasoning, provide a concise answer to the question: '{question}'\n\n"
+        answer_prompt += f"Reasoning:\n{response}\n\n"
+        answer_prompt += "Answer:"
+        
+        # Execute the answer step
+        answer = self.execute_step(
+            prompt=answer_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+        
+        return answer
+    
+    def task_decomposition(
+        self,
+        task: str,
         context: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
@@ -411,6 +942,40 @@ class Reasoning:
         Returns:
             A list of subtasks
         """
+        subtasks, _ = self._decompose_task(
+            task=task,
+            context=context,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+        
+        return subtasks
+    
+    def _decompose_task(
+        self,
+        task: str,
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        annotate_dependencies: bool = False,
+        **kwargs
+    ) -> Tuple[List[str], List[Optional[List[int]]]]:
+        """
+        Decompose a complex task into subtasks and their dependencies.
+        
+        Args:
+            task: The task to decompose
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            annotate_dependencies: Whether to ask the LLM which earlier subtasks each subtask depends on
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            A tuple of the subtasks and, for each subtask, the 0-based indices of the
+            earlier subtasks it depends on (None if unknown, meaning all earlier subtasks)
+        """
         print(f"\n🔍 分析任务: \"{task}\"")
         print("正在将任务分解为子任务...\n")
         
@@ -421,24 +986,155 @@ class Reasoning:
             "task": task
         })
         
-        max_retries = 2
-        retry_count = 0
+        # Reuse a stored decomposition of the same task
+        cache_params = {
+            "model": self.llm.model,
+            "task": task,
+            "context": context,
+            "max_steps": self.max_steps,
+            "annotate_dependencies": annotate_dependencies
+        }
+        cached = self.decomposition_cache.get(cache_params) if self.decomposition_cache else None
         
-        while True:
-            # Construct the prompt
-            prompt = "Break down the following task into smaller, manageable subtasks:\n\n"
+        if cached is not None:
+            print("♻️ 使用缓存的任务分解")
+            subtasks, dependencies = cached
+        else:
+            decompose = self._decompose_speculatively if self.speculative_decomposition else self._decompose_sequentially
+            subtasks, dependencies = decompose(
+                task=task,
+                context=context,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                annotate_dependencies=annotate_dependencies,
+                **kwargs
+            )
             
-            if context:
-                prompt += f"Context:\n{context}\n\n"
+            # Store the decomposition for the next run of the same task
+            if self.decomposition_cache and subtasks:
+                self.decomposition_cache.set(cache_params, subtasks, dependencies)
+        
+        # Display the subtasks
+        print("\n📋 已将任务分解为以下子任务:")
+        for i, subtask in enumerate(subtasks):
+            print(f"  {i+1}. {subtask}")
+        print()
+        
+        # Send decomposition complete event
+        subtasks_formatted = "\n".join([f"{i+1}. {subtask}" for i, subtask in enumerate(subtasks)])
+        self._log({
+            "type": "decomposition_complete",
+            "message": f"📋 已将任务分解为以下子任务:\n{subtasks_formatted}",
+            "subtasks": subtasks
+        })
+        
+        return subtasks, dependencies
+    
+    def _decomposition_prompt(
+        self,
+        task: str,
+        context: Optional[str] = None,
+        annotate_dependencies: bool = False,
+        limit_subtasks: bool = False,
+        previous_count: Optional[int] = None
+    ) -> str:
+        """
+        Build the prompt for decomposing a task.
+        
+        Args:
+            task: The task to decompose
+            context: Additional context (optional)
+            annotate_dependencies: Whether to ask the LLM which earlier subtasks each subtask depends on
+            limit_subtasks: Whether to insist on at most max_steps subtasks
+            previous_count: The number of subtasks of the rejected previous breakdown (optional)
+            
+        Returns:
+            The decomposition prompt
+        """
+        prompt = "Break down the following task into smaller, manageable subtasks:\n\n"
+        
+        if context:
+            prompt += f"Context:\n{context}\n\n"
+        
+        prompt += f"Task: {task}\n\n"
+        
+        # For a retry, add instructions to limit the number of subtasks
+        if limit_subtasks:
+            prompt += f"Important: Please limit your response to at most {self.max_steps} subtasks."
+            if previous_count is not None:
+                prompt += f" The previous breakdown had too many subtasks ({previous_count})."
+            prompt += "\n\n"
+        
+        # Ask for dependency annotations so independent subtasks can run in parallel
+        if annotate_dependencies:
+            prompt += "End each subtask with the numbers of the earlier subtasks whose results it needs, "
+            prompt += "e.g. '(depends on: 1, 2)', or '(depends on: none)' if it can be done independently.\n\n"
+        
+        prompt += "Subtasks (numbered list):"
+        
+        return prompt
+    
+    @staticmethod
+    def _parse_decomposition(decomposition: str) -> Tuple[List[str], List[Optional[List[int]]]]:
+        """
+        Parse the subtasks and their dependency annotations from a decomposition.
+        
+        Args:
+            decomposition: The decomposition response
             
-            prompt += f"Task: {task}\n\n"
+        Returns:
+            A tuple of the subtasks and their dependencies
+        """
+        subtasks = []
+        dependencies = []
+        for subtask in _SUBTASK_LINE_RE.findall(decomposition):
+            # Split off the dependency annotation if present
+            deps = None
+            match = _DEPENDS_ON_RE.search(subtask)
+            if match:
+                deps = [int(num) - 1 for num in _NUMBER_RE.findall(match.group(1))]
+                subtask = subtask[:match.start()].rstrip()
             
-            # If this is a retry, add instructions to limit the number of subtasks
-            if retry_count > 0:
-                prompt += f"Important: Please limit your response to at most {self.max_steps} subtasks. "
-                prompt += f"The previous breakdown had too many subtasks ({len(subtasks)}).\n\n"
+            if subtask:
+                subtasks.append(subtask)
+                dependencies.append(deps)
+        
+        return subtasks, dependencies
+    
+    def _decompose_sequentially(
+        self,
+        task: str,
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        annotate_dependencies: bool = False,
+        **kwargs
+    ) -> Tuple[List[str], List[Optional[List[int]]]]:
+        """
+        Decompose a task, retrying while the breakdown has too many subtasks.
+        
+        Args:
+            task: The task to decompose
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            annotate_dependencies: Whether to ask the LLM which earlier subtasks each subtask depends on
+            **kwargs: Additional parameters for the LLM
             
-            prompt += "Subtasks (numbered list):"
+        Returns:
+            A tuple of the subtasks and their dependencies
+        """
+        max_retries = DECOMPOSITION_RETRIES
+        retry_count = 0
+        
+        while True:
+            prompt = self._decomposition_prompt(
+                task,
+                context=context,
+                annotate_dependencies=annotate_dependencies,
+                limit_subtasks=retry_count > 0,
+                previous_count=len(subtasks) if retry_count > 0 else None
+            )
             
             # Execute the decomposition step
             decomposition = self.execute_step(
@@ -448,19 +1144,11 @@ class Reasoning:
                 **kwargs
             )
             
-            # Parse the subtasks
-            subtasks = []
-            for line in decomposition.split("\n"):
-                line = line.strip()
-                if line and (line[0].isdigit() or line[0] == "-"):
-                    # Remove the number/bullet and any following punctuation
-                    subtask = line.lstrip("0123456789.-) \t")
-                    if subtask:
-                        subtasks.append(subtask)
+            subtasks, dependencies = self._parse_decomposition(decomposition)
             
             # Check if we have too many subtasks
             if len(subtasks) <= self.max_steps * 1.5 or retry_count >= max_retries:
-                break
+                return subtasks, dependencies
             
             # If we have too many subtasks, retry
             retry_count += 1
@@ -474,172 +1162,686 @@ class Reasoning:
                 "retry_count": retry_count,
                 "max_retries": max_retries
             })
+    
+    def _decompose_speculatively(
+        self,
+        task: str,
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        annotate_dependencies: bool = False,
+        **kwargs
+    ) -> Tuple[List[str], List[Optional[List[int]]]]:
+        """
+        Decompose a task, running the retries concurrently with the first attempt.
+        
+        The retries ask for at most max_steps subtasks at lower temperatures. The
+        first breakdown with few enough subtasks is used; if none qualifies, the one
+        with the fewest subtasks is used. All attempts are sent at once, and HTTP
+        requests already in flight can't be cancelled, so the losing attempts still
+        finish (and are billed) in the background. The attempts are recorded as a
+        single step and aren't streamed.
+        
+        Args:
+            task: The task to decompose
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            annotate_dependencies: Whether to ask the LLM which earlier subtasks each subtask depends on
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            A tuple of the subtasks and their dependencies
+        """
+        temp = temperature if temperature is not None else self.temperature
+        kwargs = self._step_kwargs(kwargs)
+        
+        attempts = [
+            (
+                self._decomposition_prompt(
+                    task,
+                    context=context,
+                    annotate_dependencies=annotate_dependencies,
+                    limit_subtasks=k > 0
+                ),
+                max(0.0, temp - 0.2 * k)
+            )
+            for k in range(DECOMPOSITION_RETRIES + 1)
+        ]
+        
+        def attempt(prompt: str, attempt_temperature: float) -> Tuple[str, str]:
+            response = self.llm.generate(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=attempt_temperature,
+                timeout=self.timeout,
+                **kwargs
+            )
+            return prompt, response["text"]
+        
+        # The attempts are recorded as a single step, with the winning prompt
+        step_num = self._start_step(attempts[0][0], self.timeout)
+        
+        best = None
+        error: Optional[Exception] = None
+        futures = []
+        executor = ThreadPoolExecutor(max_workers=len(attempts))
+        try:
+            futures = [executor.submit(attempt, prompt, attempt_temperature) for prompt, attempt_temperature in attempts]
+            for future in as_completed(futures):
+                try:
+                    prompt, decomposition = future.result()
+                except Exception as e:
+                    print(f"⚠️ 任务分解尝试失败: {str(e)}")
+                    error = e
+                    continue
+                
+                subtasks, dependencies = self._parse_decomposition(decomposition)
+                if best is None or len(subtasks) < len(best[2]):
+                    best = (prompt, decomposition, subtasks, dependencies)
+                if len(subtasks) <= self.max_steps * 1.5:
+                    break
+        finally:
+            # Don't wait for the attempts that are no longer needed; requests that
+            # are already in flight can't be cancelled, so they run to completion
+            # (and are billed) in the background
+            for future in futures:
+                future.cancel()
+            if sys.version_info >= (3, 9):
+                executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                executor.shutdown(wait=False)
+        
+        if best is None:
+            self._fail_step(step_num, self.timeout, error)
+            raise error
+        
+        prompt, decomposition, subtasks, dependencies = best
+        self._finish_step(step_num, prompt, decomposition)
+        
+        return subtasks, dependencies
+    
+    def execute_subtasks(
+        self,
+        subtasks: List[str],
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_retries: int = 3,  # New parameter for maximum retries
+        dependencies: Optional[List[Optional[List[int]]]] = None,
+        **kwargs
+    ) -> List[str]:
+        """
+        Execute a list of subtasks.
+        
+        When batch_size is greater than 1, consecutive subtasks that only depend on
+        already finished subtasks are first answered together in a single LLM call;
+        answers that fail validation are executed again on their own.
+        
+        Args:
+            subtasks: The subtasks to execute
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            max_retries: Maximum number of retry attempts for each subtask (default: 3)
+            dependencies: For each subtask, the 0-based indices of the earlier subtasks
+                it depends on, or None to depend on all earlier subtasks (optional)
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            A list of responses for each subtask
+        """
+        if dependencies is None:
+            dependencies = [None] * len(subtasks)
+        
+        responses: List[str] = []
+        
+        def previous_results_for(j: int) -> List[Tuple[int, str, str]]:
+            # Only earlier subtasks can be dependencies
+            deps = dependencies[j]
+            dep_indices = range(j) if deps is None else sorted(d for d in set(deps) if 0 <= d < j)
+            return [(d, subtasks[d], responses[d]) for d in dep_indices]
+        
+        while len(responses) < len(subtasks):
+            i = len(responses)
+            
+            # Collect the following subtasks that don't depend on any unfinished subtask
+            group = [i]
+            if self.batch_size > 1:
+                while group[-1] + 1 < len(subtasks):
+                    deps = dependencies[group[-1] + 1]
+                    if deps is None or any(d >= i for d in deps):
+                        break
+                    group.append(group[-1] + 1)
+            
+            if len(group) == 1:
+                responses.append(self._execute_subtask(
+                    index=i,
+                    subtask=subtasks[i],
+                    total_subtasks=len(subtasks),
+                    previous_results=previous_results_for(i),
+                    context=context,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    max_retries=max_retries,
+                    **kwargs
+                ))
+                continue
+            
+            # Answer the independent subtasks together first
+            for j in group:
+                self._log({
+                    "type": "subtask_start",
+                    "message": f"\n🔄 执行子任务 {j+1}/{len(subtasks)}: \"{subtasks[j]}\"\n思考中...",
+                    "subtask_index": j,
+                    "subtask": subtasks[j],
+                    "total_subtasks": len(subtasks)
+                })
+            
+            prompts = [
+                self._subtask_prompt(j, subtasks[j], len(subtasks), previous_results_for(j), context)
+                for j in group
+            ]
+            answers = self._batch_call(
+                prompts,
+                k=self.batch_size,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            
+            for j, answer in zip(group, answers):
+                # Web searches can't be run for a batched answer, so those subtasks,
+                # and any whose answer is missing or incomplete, are executed on their own
+                if (
+                    answer is not None
+                    and "SEARCH:" not in answer
+                    and self._validate_subtask_completion(
+                        subtask=subtasks[j],
+                        response=answer,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        **kwargs
+                    )
+                ):
+                    print(f"✅ 子任务 {j+1} 完成")
+                    self._log({
+                        "type": "subtask_complete",
+                        "message": f"✅ 子任务 {j+1}/{len(subtasks)} 完成",
+                        "subtask_index": j,
+                        "subtask": subtasks[j],
+                        "response": answer
+                    })
+                    responses.append(answer)
+                else:
+                    responses.append(self._execute_subtask(
+                        index=j,
+                        subtask=subtasks[j],
+                        total_subtasks=len(subtasks),
+                        previous_results=previous_results_for(j),
+                        context=context,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        max_retries=max_retries,
+                        **kwargs
+                    ))
+        
+        return responses
+    
+    async def execute_subtasks_async(
+        self,
+        subtasks: List[str],
+        dependencies: Optional[List[Optional[List[int]]]] = None,
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_retries: int = 3,
+        max_concurrency: int = 4,
+        **kwargs
+    ) -> List[str]:
+        """
+        Execute a list of subtasks concurrently where their dependencies allow.
+        
+        Each subtask starts as soon as the subtasks it depends on have finished,
+        so independent subtasks run in parallel. The LLM calls are awaited with
+        the provider's agenerate, and web searches run in the default thread pool.
+        
+        Args:
+            subtasks: The subtasks to execute
+            dependencies: For each subtask, the 0-based indices of the earlier subtasks
+                it depends on, or None to depend on all earlier subtasks (optional,
+                defaults to sequential execution)
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            max_retries: Maximum number of retry attempts for each subtask (default: 3)
+            max_concurrency: Maximum number of subtasks executed at the same time (default: 4)
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            A list of responses for each subtask
+        """
+        if dependencies is None:
+            dependencies = [None] * len(subtasks)
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks: List[asyncio.Task] = []
+        
+        async def run_subtask(i: int, subtask: str) -> str:
+            # Only earlier subtasks can be dependencies, so there are no cycles
+            deps = dependencies[i]
+            dep_indices = list(range(i)) if deps is None else sorted(d for d in set(deps) if 0 <= d < i)
+            dep_results = await asyncio.gather(*(tasks[d] for d in dep_indices))
+            
+            previous_results = [
+                (d, subtasks[d], result) for d, result in zip(dep_indices, dep_results)
+            ]
+            
+            async with semaphore:
+                return await self._aexecute_subtask(
+                    index=i,
+                    subtask=subtask,
+                    total_subtasks=len(subtasks),
+                    previous_results=previous_results,
+                    context=context,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    max_retries=max_retries,
+                    **kwargs
+                )
         
-        # Display the subtasks
-        print("\n📋 已将任务分解为以下子任务:")
         for i, subtask in enumerate(subtasks):
-            print(f"  {i+1}. {subtask}")
-        print()
+            tasks.append(asyncio.ensure_future(run_subtask(i, subtask)))
+        
+        return list(await asyncio.gather(*tasks))
+    
+    def _execute_subtask(
+        self,
+        index: int,
+        subtask: str,
+        total_subtasks: int,
+        previous_results: List[Tuple[int, str, str]],
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_retries: int = 3,
+        **kwargs
+    ) -> str:
+        """
+        Execute a single subtask, retrying until it is validated as complete.
+        
+        Args:
+            index: The 0-based index of the subtask
+            subtask: The subtask to execute
+            total_subtasks: The total number of subtasks
+            previous_results: (index, subtask, result) tuples of earlier subtasks to include as context
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            max_retries: Maximum number of retry attempts (default: 3)
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            The response for the subtask
+        """
+        i = index
+        self._log_subtask_start(i, subtask, total_subtasks)
+        
+        # Track retry attempts
+        retry_count = 0
+        
+        # Keep trying until the subtask is completed or max retries is reached
+        while True:
+            if retry_count > 0:
+                self._log_subtask_retry(i, retry_count, max_retries)
+            
+            # Construct the prompt
+            prompt = self._subtask_prompt(i, subtask, total_subtasks, previous_results, context)
+            
+            # Execute the subtask
+            response = self.execute_step(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            
+            self._log_subtask_validation(i, response)
+            subtask_completed = self._validate_subtask_completion(
+                subtask=subtask,
+                response=response,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            
+            if not subtask_completed:
+                retry_count += 1
+            if self._subtask_finished(i, subtask, total_subtasks, response, subtask_completed, retry_count, max_retries):
+                return response
+    
+    async def _aexecute_subtask(
+        self,
+        index: int,
+        subtask: str,
+        total_subtasks: int,
+        previous_results: List[Tuple[int, str, str]],
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_retries: int = 3,
+        **kwargs
+    ) -> str:
+        """
+        Execute a single subtask asynchronously, retrying until it is validated as complete.
+        
+        Args:
+            index: The 0-based index of the subtask
+            subtask: The subtask to execute
+            total_subtasks: The total number of subtasks
+            previous_results: (index, subtask, result) tuples of earlier subtasks to include as context
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            max_retries: Maximum number of retry attempts (default: 3)
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            The response for the subtask
+        """
+        i = index
+        self._log_subtask_start(i, subtask, total_subtasks)
+        
+        retry_count = 0
+        while True:
+            if retry_count > 0:
+                self._log_subtask_retry(i, retry_count, max_retries)
+            
+            prompt = self._subtask_prompt(i, subtask, total_subtasks, previous_results, context)
+            response = await self.aexecute_step(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            
+            self._log_subtask_validation(i, response)
+            subtask_completed = await self._avalidate_subtask_completion(
+                subtask=subtask,
+                response=response,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            
+            if not subtask_completed:
+                retry_count += 1
+            if self._subtask_finished(i, subtask, total_subtasks, response, subtask_completed, retry_count, max_retries):
+                return response
+    
+    def _log_subtask_start(self, i: int, subtask: str, total_subtasks: int) -> None:
+        """
+        Announce the start of a subtask.
+        
+        Args:
+            i: The 0-based index of the subtask
+            subtask: The subtask
+            total_subtasks: The total number of subtasks
+        """
+        # Send subtask start event
+        self._log({
+            "type": "subtask_start",
+            "message": f"\n🔄 执行子任务 {i+1}/{total_subtasks}: \"{subtask}\"\n思考中...",
+            "subtask_index": i,
+            "subtask": subtask,
+            "total_subtasks": total_subtasks
+        })
+    
+    def _log_subtask_retry(self, i: int, retry_count: int, max_retries: int) -> None:
+        """
+        Announce a retry of a subtask.
+        
+        Args:
+            i: The 0-based index of the subtask
+            retry_count: The number of the retry attempt
+            max_retries: Maximum number of retry attempts
+        """
+        print(f"🔁 重试子任务 {i+1} (尝试 {retry_count}/{max_retries})...")
+        
+        # Send retry event
+        self._log({
+            "type": "subtask_retry",
+            "message": f"🔁 重试子任务 {i+1} (尝试 {retry_count}/{max_retries})...",
+            "subtask_index": i,
+            "retry_count": retry_count,
+            "max_retries": max_retries
+        })
+    
+    def _log_subtask_validation(self, i: int, response: str) -> None:
+        """
+        Show a subtask's response and announce its validation.
+        
+        Args:
+            i: The 0-based index of the subtask
+            response: The response for the subtask
+        """
+        # Log the response for debugging
+        result_summary = response[:100] + "..." if len(response) > 100 else response
+        print(f"📝 子任务 {i+1} 结果: {result_summary}")
+        
+        # Validate if the subtask is completed
+        print("🔍 验证子任务是否完成...")
+        
+        # Send validation start event
+        self._log({
+            "type": "subtask_validation_start",
+            "message": f"🔍 验证子任务 {i+1} 是否完成...",
+            "subtask_index": i
+        })
+    
+    def _subtask_finished(
+        self,
+        i: int,
+        subtask: str,
+        total_subtasks: int,
+        response: str,
+        completed: bool,
+        retry_count: int,
+        max_retries: int
+    ) -> bool:
+        """
+        Report the validation result of a subtask attempt.
+        
+        Args:
+            i: The 0-based index of the subtask
+            subtask: The subtask
+            total_subtasks: The total number of subtasks
+            response: The response of the attempt
+            completed: Whether the response was validated as complete
+            retry_count: The number of failed attempts so far
+            max_retries: Maximum number of retry attempts
+            
+        Returns:
+            True if the response should be used, False if the subtask should be retried
+        """
+        if completed:
+            print(f"✅ 子任务 {i+1} 完成")
+            
+            # Send subtask complete event
+            self._log({
+                "type": "subtask_complete",
+                "message": f"✅ 子任务 {i+1}/{total_subtasks} 完成",
+                "subtask_index": i,
+                "subtask": subtask,
+                "response": response
+            })
+            
+            return True
+        
+        print(f"❌ 子任务 {i+1} 未完成")
+        
+        # Send subtask incomplete event
+        self._log({
+            "type": "subtask_incomplete",
+            "message": f"❌ 子任务 {i+1}/{total_subtasks} 未完成",
+            "subtask_index": i,
+            "subtask": subtask,
+            "response": response
+        })
+        
+        if retry_count > max_retries:
+            print(f"⚠️ 达到最大重试次数 ({max_retries})，使用最后一次结果")
+            
+            # Send max retries event
+            self._log({
+                "type": "subtask_max_retries",
+                "message": f"⚠️ 达到最大重试次数 ({max_retries})，使用最后一次结果",
+                "subtask_index": i,
+                "subtask": subtask,
+                "response": response
+            })
+            
+            return True
+        
+        print(f"准备重试子任务 {i+1}...")
+        return False
+    
+    def _subtask_prompt(
+        self,
+        index: int,
+        subtask: str,
+        total_subtasks: int,
+        previous_results: List[Tuple[int, str, str]],
+        context: Optional[str] = None
+    ) -> str:
+        """
+        Build the prompt for executing a subtask.
+        
+        Args:
+            index: The 0-based index of the subtask
+            subtask: The subtask to execute
+            total_subtasks: The total number of subtasks
+            previous_results: (index, subtask, result) tuples of earlier subtasks to include as context
+            context: Additional context (optional)
+            
+        Returns:
+            The prompt
+        """
+        # Keep the prompt small by only including the most recent earlier results
+        if self.previous_results_window is not None:
+            previous_results = previous_results[-self.previous_results_window:] if self.previous_results_window > 0 else []
+        
+        # The parts that are the same for every subtask come first, and earlier
+        # results are only ever appended, so consecutive subtask prompts share a
+        # long common prefix that servers with prefix caching don't prefill again
+        prompt = ""
+        
+        if context:
+            prompt += f"Context:\n{context}\n\n"
         
-        # Send decomposition complete event
-        subtasks_formatted = "\n".join([f"{i+1}. {subtask}" for i, subtask in enumerate(subtasks)])
-        self._log({
-            "type": "decomposition_complete",
-            "message": f"📋 已将任务分解为以下子任务:\n{subtasks_formatted}",
-            "subtasks": subtasks
-        })
+        # Add web search tool instructions if available
+        if self.web_search:
+            prompt += "Tools available:\n"
+            prompt += "1. Web Search Tool - You can search the internet for information by using the following format:\n"
+            prompt += "   SEARCH: your search query\n"
+            prompt += "   This will return search results from the web that you can use to answer the question.\n\n"
         
-        return subtasks
+        # Add previous subtask results as context (joined once)
+        if previous_results and self.history_mode == "summary":
+            prompt += "Summary of prior work:\n"
+            omitted = len(previous_results) - SUMMARY_MAX_RESULTS
+            if omitted > 0:
+                prompt += f"({omitted} earlier subtasks completed)\n\n"
+                previous_results = previous_results[omitted:]
+            prompt += "".join(
+                f"Subtask {j+1}: {prev_task}\nResult: {_excerpt(prev_response, SUMMARY_EXCERPT_CHARS)}\n\n"
+                for j, prev_task, prev_response in previous_results
+            )
+        elif previous_results:
+            prompt += "Previous results:\n"
+            prompt += "".join(
+                f"Subtask {j+1}: {prev_task}\nResult: {prev_response}\n\n"
+                for j, prev_task, prev_response in previous_results
+            )
+        
+        prompt += f"Subtask {index+1}/{total_subtasks}: {subtask}\n\n"
+        prompt += f"Execute subtask: {subtask}\n\n"
+        prompt += "Result:"
+        
+        return prompt
     
-    def execute_subtasks(
+    def _batch_call(
         self,
-        subtasks: List[str],
-        context: Optional[str] = None,
+        subprompts: List[str],
+        k: int = 4,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
-        max_retries: int = 3,  # New parameter for maximum retries
         **kwargs
-    ) -> List[str]:
+    ) -> List[Optional[str]]:
         """
-        Execute a list of subtasks.
+        Answer several independent prompts with one LLM call per group of k prompts.
+        
+        The prompts are numbered with "### N" headers and the response is split
+        on the same headers, trading a longer call for fewer round trips; the
+        calls for the groups are sent concurrently.
         
         Args:
-            subtasks: The subtasks to execute
-            context: Additional context (optional)
-            max_tokens: Maximum number of tokens to generate
+            subprompts: The prompts to answer
+            k: Maximum number of prompts combined into a single call (default: 4)
+            max_tokens: Maximum number of tokens to generate per prompt
             temperature: Sampling temperature
-            max_retries: Maximum number of retry attempts for each subtask (default: 3)
             **kwargs: Additional parameters for the LLM
             
         Returns:
-            A list of responses for each subtask
+            The answer to each prompt, or None where no answer could be parsed
+            (including when the call failed)
         """
-        responses = []
-        total_subtasks = len(subtasks)
+        temp = temperature if temperature is not None else self.temperature
+        answers: List[Optional[str]] = []
         
-        for i, subtask in enumerate(subtasks):
-            # Send subtask start event
-            self._log({
-                "type": "subtask_start",
-                "message": f"\n🔄 执行子任务 {i+1}/{total_subtasks}: \"{subtask}\"\n思考中...",
-                "subtask_index": i,
-                "subtask": subtask,
-                "total_subtasks": total_subtasks
-            })
+        groups = [subprompts[start:start + k] for start in range(0, len(subprompts), k)]
+        prompts = []
+        for group in groups:
+            parts = [
+                f"Answer each of the following {len(group)} prompts independently. ",
+                "Start each answer with the header of its prompt ('### 1', '### 2', ...) on a line of its own.\n\n"
+            ]
+            for n, subprompt in enumerate(group, 1):
+                parts.append(f"### {n}\n{subprompt}\n\n")
+            prompts.append("".join(parts))
+            print(f"📦 合并 {len(group)} 个子任务为一次调用...")
+        
+        # The combined calls are independent of each other, so they are sent together
+        responses = self.llm.generate_batch(
+            prompts,
+            max_tokens=max_tokens * len(groups[0]) if max_tokens is not None else None,
+            temperature=temp,
+            return_exceptions=True,
+            timeout=self.timeout,
+            **kwargs
+        )
+        
+        for group, prompt, response in zip(groups, prompts, responses):
+            if isinstance(response, Exception):
+                print(f"❌ 合并调用失败: {str(response)}")
+                answers.extend([None] * len(group))
+                continue
             
-            # Track retry attempts
-            retry_count = 0
-            subtask_completed = False
+            response_text = response["text"]
+            self.add_step(prompt, response_text, {"batch_size": len(group)})
             
-            # Keep trying until the subtask is completed or max retries is reached
-            while not subtask_completed and retry_count <= max_retries:
-                if retry_count > 0:
-                    print(f"🔁 重试子任务 {i+1} (尝试 {retry_count}/{max_retries})...")
-                    
-                    # Send retry event
-                    self._log({
-                        "type": "subtask_retry",
-                        "message": f"🔁 重试子任务 {i+1} (尝试 {retry_count}/{max_retries})...",
-                        "subtask_index": i,
-                        "retry_count": retry_count,
-                        "max_retries": max_retries
-                    })
-                
-                # Construct the prompt
-                prompt = f"Subtask {i+1}/{len(subtasks)}: {subtask}\n\n"
-                
-                if context:
-                    prompt += f"Context:\n{context}\n\n"
-                
-                # Add previous subtask results as context
-                if responses:
-                    prompt += "Previous results:\n"
-                    for j, (prev_task, prev_response) in enumerate(zip(subtasks[:i], responses)):
-                        prompt += f"Subtask {j+1}: {prev_task}\nResult: {prev_response}\n\n"
-                
-                # Add web search tool instructions if available
-                if self.web_search:
-                    prompt += "Tools available:\n"
-                    prompt += "1. Web Search Tool - You can search the internet for information by using the following format:\n"
-                    prompt += "   SEARCH: your search query\n"
-                    prompt += "   This will return search results from the web that you can use to answer the question.\n\n"
-                
-                prompt += f"Execute subtask: {subtask}\n\n"
-                prompt += "Result:"
-                
-                # Execute the subtask
-                response = self.execute_step(
-                    prompt=prompt,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    **kwargs
-                )
-                
-                # Log the response for debugging
-                result_summary = response[:100] + "..." if len(response) > 100 else response
-                print(f"📝 子任务 {i+1} 结果: {result_summary}")
-                
-                # Validate if the subtask is completed
-                print("🔍 验证子任务是否完成...")
-                
-                # Send validation start event
-                self._log({
-                    "type": "subtask_validation_start",
-                    "message": f"🔍 验证子任务 {i+1} 是否完成...",
-                    "subtask_index": i
-                })
-                subtask_completed = self._validate_subtask_completion(
-                    subtask=subtask,
-                    response=response,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    **kwargs
-                )
-                
-                if subtask_completed:
-                    print(f"✅ 子任务 {i+1} 完成")
-                    
-                    # Send subtask complete event
-                    self._log({
-                        "type": "subtask_complete",
-                        "message": f"✅ 子任务 {i+1}/{total_subtasks} 完成",
-                        "subtask_index": i,
-                        "subtask": subtask,
-                        "response": response
-                    })
-                    
-                    responses.append(response)
-                else:
-                    print(f"❌ 子任务 {i+1} 未完成")
-                    
-                    # Send subtask incomplete event
-                    self._log({
-                        "type": "subtask_incomplete",
-                        "message": f"❌ 子任务 {i+1}/{total_subtasks} 未完成",
-                        "subtask_index": i,
-                        "subtask": subtask,
-                        "response": response
-                    })
-                    
-                    retry_count += 1
-                    
-                    if retry_count > max_retries:
-                        print(f"⚠️ 达到最大重试次数 ({max_retries})，使用最后一次结果")
-                        
-                        # Send max retries event
-                        self._log({
-                            "type": "subtask_max_retries",
-                            "message": f"⚠️ 达到最大重试次数 ({max_retries})，使用最后一次结果",
-                            "subtask_index": i,
-                            "subtask": subtask,
-                            "response": response
-                        })
-                        
-                        responses.append(response)
-                    else:
-                        print(f"准备重试子任务 {i+1}...")
+            # Split the response on the headers, keeping the first answer for each number
+            group_answers: Dict[int, str] = {}
+            headers = list(_BATCH_HEADER_RE.finditer(response_text))
+            for h, header in enumerate(headers):
+                end = headers[h + 1].start() if h + 1 < len(headers) else len(response_text)
+                answer = response_text[header.end():end].strip()
+                if answer:
+                    group_answers.setdefault(int(header.group(1)), answer)
+            
+            answers.extend(group_answers.get(n) for n in range(1, len(group) + 1))
         
-        return responses
+        return answers
     
     def _validate_subtask_completion(
         self,
@@ -665,43 +1867,58 @@ class Reasoning:
             True if the subtask is completed, False otherwise
         """
         try:
-            # Construct the validation prompt
-            validation_prompt = """Evaluate if the following subtask has been completed successfully based on the response.
-            
-            Instructions:
-            1. Only answer with "Yes" or "No"
-            2. Do not provide any explanation
-            3. Consider the response complete if it addresses the subtask
-            
-            Subtask: {subtask}
-            
-            Response: {response}
-            
-            Answer:""".format(subtask=subtask, response=response)
-            
             # Execute the validation step with timeout
             print("💭 验证中...")
             validation_response = self.llm.generate(
-                prompt=validation_prompt,
+                prompt=_validation_prompt(subtask, response),
                 max_tokens=10,  # Strict limit for yes/no response
                 temperature=0.1,  # Very low temperature for deterministic response
                 timeout=timeout or self.timeout,
                 **kwargs
             )
+            return _is_validated(validation_response["text"])
             
-            # Extract and clean the validation result
-            validation_text = validation_response["text"].strip().lower()
-            validation_text = validation_text.split()[0]  # Take only first word
-            
-            # Log the validation response for debugging
-            print(f"🔍 验证结果: {validation_text}")
+        except Exception as e:
+            print(f"❌ 验证错误: {str(e)}")
+            # If validation fails, assume the subtask is incomplete
+            return False
+    
+    async def _avalidate_subtask_completion(
+        self,
+        subtask: str,
+        response: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> bool:
+        """
+        Validate asynchronously if a subtask is completed successfully.
+        
+        Args:
+            subtask: The subtask to validate
+            response: The response to validate
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            timeout: Maximum time in seconds for validation
+            **kwargs: Additional parameters for the LLM
             
-            # Check if the validation response indicates completion
-            return validation_text.startswith("yes")
+        Returns:
+            True if the subtask is completed, False otherwise
+        """
+        try:
+            print("💭 验证中...")
+            validation_response = await self.llm.agenerate(
+                prompt=_validation_prompt(subtask, response),
+                max_tokens=10,
+                temperature=0.1,
+                timeout=timeout or self.timeout,
+                **kwargs
+            )
+            return _is_validated(validation_response["text"])
             
         except Exception as e:
             print(f"❌ 验证错误: {str(e)}")
-            # If validation fails, assume the subtask is incomplete
             return False
     
     def aggregate_results(
@@ -741,9 +1958,10 @@ class Reasoning:
         # Construct the prompt
         prompt = f"Original task: {task}\n\n"
         prompt += "Subtasks and results:\n"
-        
-        for i, (subtask, result) in enumerate(zip(subtasks, results)):
-            prompt += f"Subtask {i+1}: {subtask}\nResult: {result}\n\n"
+        prompt += "".join(
+            f"Subtask {i+1}: {subtask}\nResult: {result}\n\n"
+            for i, (subtask, result) in enumerate(zip(subtasks, results))
+        )
         
         prompt += "Aggregate the results of the subtasks to provide a comprehensive response to the original task.\n\n"
         prompt += "Final result:"
@@ -767,6 +1985,46 @@ class Reasoning:
         
         return aggregation
     
+    @contextmanager
+    def _task_settings(self, web_search_enabled: bool, extract_url_content: Optional[bool]):
+        """
+        Temporarily apply per-task web search and URL extraction settings.
+        
+        Args:
+            web_search_enabled: Whether to enable web search for this task
+            extract_url_content: Whether to extract content from URLs found in search results
+                (None keeps the instance setting)
+        """
+        # Store the original settings
+        original_web_search = self.web_search
+        original_extract_url_content = self.extract_url_content
+        original_url_extractor = self.url_extractor
+        
+        # Temporarily disable web search if requested
+        if not web_search_enabled:
+            self.web_search = None
+            print("🔍 网络搜索功能已禁用")
+        elif self.web_search:
+            print("🔍 网络搜索功能已启用")
+        
+        # Temporarily modify URL extraction setting if specified
+        if extract_url_content is not None:
+            self.extract_url_content = extract_url_content
+            self.url_extractor = get_url_extractor(use_cache=self.cache_url_content) if extract_url_content else None
+            
+            if extract_url_content:
+                print("📄 URL内容提取功能已启用")
+            else:
+                print("📄 URL内容提取功能已禁用")
+        
+        try:
+            yield
+        finally:
+            # Restore the original settings
+            self.web_search = original_web_search
+            self.extract_url_content = original_extract_url_content
+            self.url_extractor = original_url_extractor
+    
     def solve_task(
         self,
         task: str,
@@ -799,14 +2057,26 @@ class Reasoning:
         self._log(f"最大步骤数: {self.max_steps}")
         self._log("=======================\n")
         
-        # Decompose the task into subtasks
-        subtasks = self.task_decomposition(
-            task=task,
-            context=context,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            **kwargs
-        )
+        # Decompose the task into subtasks (with their dependencies when
+        # independent subtasks can be batched)
+        dependencies = None
+        if self.batch_size > 1:
+            subtasks, dependencies = self._decompose_task(
+                task=task,
+                context=context,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                annotate_dependencies=True,
+                **kwargs
+            )
+        else:
+            subtasks = self.task_decomposition(
+                task=task,
+                context=context,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
         
         # Limit the number of subtasks to max_steps
         # Note: If the model generates fewer subtasks than max_steps,
@@ -815,30 +2085,10 @@ class Reasoning:
             print(f"\n⚠️ 执行的子任务数量将限制为最大步骤数 ({self.max_steps})")
             print(f"只执行前 {self.max_steps} 个子任务\n")
             subtasks = subtasks[:self.max_steps]
+            if dependencies is not None:
+                dependencies = dependencies[:self.max_steps]
         
-        # Store the original settings
-        original_web_search = self.web_search
-        original_extract_url_content = self.extract_url_content
-        original_url_extractor = self.url_extractor
-        
-        # Temporarily disable web search if requested
-        if not web_search_enabled:
-            self.web_search = None
-            print("🔍 网络搜索功能已禁用")
-        elif self.web_search:
-            print("🔍 网络搜索功能已启用")
-        
-        # Temporarily modify URL extraction setting if specified
-        if extract_url_content is not None:
-            self.extract_url_content = extract_url_content
-            self.url_extractor = get_url_extractor() if extract_url_content else None
-            
-            if extract_url_content:
-                print("📄 URL内容提取功能已启用")
-            else:
-                print("📄 URL内容提取功能已禁用")
-        
-        try:
+        with self._task_settings(web_search_enabled, extract_url_content):
             # Execute the subtasks
             results = self.execute_subtasks(
                 subtasks=subtasks,
@@ -846,13 +2096,9 @@ class Reasoning:
                 max_tokens=max_tokens,
                 temperature=temperature,
                 max_retries=max_retries,  # Pass the max_retries parameter
+                dependencies=dependencies,
                 **kwargs
             )
-        finally:
-            # Restore the original settings
-            self.web_search = original_web_search
-            self.extract_url_content = original_extract_url_content
-            self.url_extractor = original_url_extractor
         
         # Aggregate the results
         final_result = self.aggregate_results(
@@ -866,4 +2112,89 @@ class Reasoning:
         
         print("\n==== 推理过程完成 ====\n")
         
-        return final_result
\ No newline at end of file
+        return final_result
+    
+    async def solve_task_async(
+        self,
+        task: str,
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_retries: int = 3,
+        web_search_enabled: bool = True,
+        extract_url_content: Optional[bool] = None,
+        max_concurrency: int = 4,
+        **kwargs
+    ) -> str:
+        """
+        Solve a complex task using multi-step reasoning, running independent subtasks concurrently.
+        
+        The task decomposition asks the LLM which earlier subtasks each subtask
+        depends on; subtasks without unfinished dependencies are executed in parallel.
+        
+        Args:
+            task: The task to solve
+            context: Additional context (optional)
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            max_retries: Maximum number of retry attempts for each subtask (default: 3)
+            web_search_enabled: Whether to enable web search for this task (default: True)
+            extract_url_content: Whether to extract content from URLs found in search results (default: None, uses the instance setting)
+            max_concurrency: Maximum number of subtasks executed at the same time (default: 4)
+            **kwargs: Additional parameters for the LLM
+            
+        Returns:
+            The final result
+        """
+        loop = asyncio.get_running_loop()
+        
+        self._log("\n==== 开始多步骤推理 ====")
+        self._log(f"任务: \"{task}\"")
+        self._log(f"最大步骤数: {self.max_steps}")
+        self._log("=======================\n")
+        
+        # Decompose the task into subtasks and their dependencies
+        subtasks, dependencies = await loop.run_in_executor(None, partial(
+            self._decompose_task,
+            task=task,
+            context=context,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            annotate_dependencies=True,
+            **kwargs
+        ))
+        
+        # Limit the number of subtasks to max_steps
+        if len(subtasks) > self.max_steps:
+            print(f"\n⚠️ 执行的子任务数量将限制为最大步骤数 ({self.max_steps})")
+            print(f"只执行前 {self.max_steps} 个子任务\n")
+            subtasks = subtasks[:self.max_steps]
+            dependencies = dependencies[:self.max_steps]
+        
+        with self._task_settings(web_search_enabled, extract_url_content):
+            # Execute the subtasks
+            results = await self.execute_subtasks_async(
+                subtasks=subtasks,
+                dependencies=dependencies,
+                context=context,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                max_retries=max_retries,
+                max_concurrency=max_concurrency,
+                **kwargs
+            )
+        
+        # Aggregate the results
+        final_result = await loop.run_in_executor(None, partial(
+            self.aggregate_results,
+            task=task,
+            subtasks=subtasks,
+            results=results,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        ))
+        
+        print("\n==== 推理过程完成 ====\n")
+        
+        return final_result
@@ -6,14 +6,91 @@ various formats for LLM processing.
 """
 
 import os
+import io
+import hashlib
 from typing import Optional, Dict, Any, Union
+from urllib.parse import urlsplit
+
+from llm_research._sqlite_cache import SQLiteCache
 
 try:
     from docling.document_converter import DocumentConverter
+    from docling.datamodel.base_models import DocumentStream
 except ImportError:
     raise ImportError("docling is required for URL content extraction. Install it with 'pip install docling'.")
 
 
+# Default location of the persistent URL content cache
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".llm_research", "url_cache.db")
+
+# Default time-to-live for cached URL content (in seconds)
+DEFAULT_CACHE_TTL = 86400
+
+# File extensions docling can detect the input format from
+DOCUMENT_EXTENSIONS = [".html", ".htm", ".pdf", ".md", ".docx", ".pptx", ".xlsx", ".csv"]
+
+
+class URLCache:
+    """
+    Persistent SQLite cache for extracted URL content.
+    
+    Entries are keyed on the URL and output format and expire after a
+    configurable time-to-live.
+    """
+    
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, ttl: int = DEFAULT_CACHE_TTL):
+        """
+        Initialize the URL cache.
+        
+        Args:
+            cache_path: Path to the SQLite database file
+            ttl: Time-to-live for cache entries (in seconds)
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._store = SQLiteCache(cache_path)
+        self._store.prune(ttl)
+    
+    @staticmethod
+    def _make_key(url: str, output_format: str) -> str:
+        """
+        Build the cache key for a URL and output format.
+        
+        Args:
+            url: The URL
+            output_format: The output format
+            
+        Returns:
+            The cache key
+        """
+        return hashlib.blake2b(f"{output_format.lower()}\n{url}".encode("utf-8")).hexdigest()
+    
+    def get(self, url: str, output_format: str) -> Optional[str]:
+        """
+        Get cached content for a URL.
+        
+        Args:
+            url: The URL
+            output_format: The output format
+            
+        Returns:
+            The cached content, or None if there is no fresh entry
+        """
+        body = self._store.get(self._make_key(url, output_format), ttl=self.ttl)
+        return body.decode("utf-8") if body is not None else None
+    
+    def set(self, url: str, output_format: str, content: str) -> None:
+        """
+        Store content for a URL in the cache.
+        
+        Args:
+            url: The URL
+            output_format: The output format
+            content: The extracted content
+        """
+        self._store.set(self._make_key(url, output_format), content.encode("utf-8"))
+
+
 class URLExtractor:
     """
     URL content extractor using the docling library.
@@ -22,16 +99,50 @@ class URLExtractor:
     it to various formats for LLM processing.
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[URLCache] = None, client: Optional[Any] = None):
         """
         Initialize the URL extractor.
+        
+        Args:
+            cache: Persistent cache for extracted content (optional)
+            client: HTTP client used to fetch URLs, e.g. a shared HTTP/2 client from
+                get_http_client (optional, docling fetches URLs itself if not provided)
         """
         self.converter = DocumentConverter()
+        self.cache = cache
+        self.client = client
     
     def extract_content(self, url: str, output_format: str = "markdown") -> str:
         """
         Extract content from a URL.
         
+        Args:
+            url: The URL to extract content from
+            output_format: The output format (markdown, text, html)
+            
+        Returns:
+            The extracted content as a string
+            
+        Raises:
+            ValueError: If the URL is invalid or the content cannot be extracted
+        """
+        # Serve the content from the cache if possible
+        if self.cache is not None:
+            content = self.cache.get(url, output_format)
+            if content is not None:
+                return content
+        
+        content = self._convert(url, output_format)
+        
+        if self.cache is not None:
+            self.cache.set(url, output_format, content)
+        
+        return content
+    
+    def _convert(self, url: str, output_format: str) -> str:
+        """
+        Convert a URL to the requested format using docling.
+        
         Args:
             url: The URL to extract content from
             output_format: The output format (markdown, text, html)
@@ -44,7 +155,8 @@ class URLExtractor:
         """
         try:
             # Convert the URL to a document
-            result = self.converter.convert(url)
+            source = self._fetch(url) if self.client is not None else url
+            result = self.converter.convert(source)
             
             # Return the content in the requested format
             if output_format.lower() == "markdown":
@@ -57,13 +169,44 @@ class URLExtractor:
                 raise ValueError(f"Unsupported output format: {output_format}")
         except Exception as e:
             raise ValueError(f"Failed to extract content from URL: {url}. Error: {str(e)}")
+    
+    def _fetch(self, url: str) -> DocumentStream:
+        """
+        Download a URL with the shared HTTP client.
+        
+        Args:
+            url: The URL to download
+            
+        Returns:
+            A document stream docling can convert
+        """
+        response = self.client.get(url, timeout=30)
+        response.raise_for_status()
+        
+        # docling detects the input format from the file name
+        name = os.path.basename(urlsplit(url).path) or "index"
+        if os.path.splitext(name)[1].lower() not in DOCUMENT_EXTENSIONS:
+            content_type = response.headers.get("content-type", "")
+            name += ".pdf" if "pdf" in content_type else ".html"
+        
+        return DocumentStream(name=name, stream=io.BytesIO(response.content))
 
 
-def get_url_extractor() -> URLExtractor:
+def get_url_extractor(
+    use_cache: bool = False,
+    cache_path: Optional[str] = None,
+    client: Optional[Any] = None
+) -> URLExtractor:
     """
     Get a URL extractor instance.
     
+    Args:
+        use_cache: Whether to cache extracted content on disk (default: False)
+        cache_path: Path to the cache database (optional, defaults to ~/.llm_research/url_cache.db)
+        client: HTTP client used to fetch URLs (optional)
+        
     Returns:
         A URL extractor instance
     """
-    return URLExtractor()
\ No newline at end of file
+    cache = URLCache(cache_path or DEFAULT_CACHE_PATH) if use_cache else None
+    return URLExtractor(cache=cache, client=client)
\ No newline at end of file
@@ -5,27 +5,107 @@ This module provides tools for searching the web using various search APIs.
 """
 
 import os
+import hashlib
 import requests
 from typing import Dict, List, Optional, Any, Union
 
+from llm_research import _fastjson
+from llm_research._sqlite_cache import SQLiteCache
+
+# Default location of the persistent web search cache
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".llm_research", "search_cache.db")
+
+# Default time-to-live for cached search results (in seconds)
+DEFAULT_CACHE_TTL = 3600
+
+
+class SearchCache:
+    """
+    Persistent SQLite cache for web search results.
+    
+    Entries are keyed on the query and search parameters and expire after a
+    configurable time-to-live, so retries of the same search are answered locally.
+    """
+    
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, ttl: int = DEFAULT_CACHE_TTL):
+        """
+        Initialize the search cache.
+        
+        Args:
+            cache_path: Path to the SQLite database file
+            ttl: Time-to-live for cache entries (in seconds)
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._store = SQLiteCache(cache_path)
+        self._store.prune(ttl)
+    
+    @staticmethod
+    def _make_key(params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a search request.
+        
+        Args:
+            params: The search request parameters
+            
+        Returns:
+            The cache key
+        """
+        return hashlib.blake2b(
+            _fastjson.dumps(params, sort_keys=True), digest_size=16
+        ).hexdigest()
+    
+    def get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get cached results for a search request.
+        
+        Args:
+            params: The search request parameters
+            
+        Returns:
+            The cached search results, or None if there is no fresh entry
+        """
+        body = self._store.get(self._make_key(params), ttl=self.ttl)
+        return _fastjson.loads(body) if body is not None else None
+    
+    def set(self, params: Dict[str, Any], results: Dict[str, Any]) -> None:
+        """
+        Store the results of a search request in the cache.
+        
+        Args:
+            params: The search request parameters
+            results: The search results
+        """
+        self._store.set(self._make_key(params), _fastjson.dumps(results))
+
 
 class BochaWebSearch:
     """
     Web search using the Bocha API.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        session: Optional[Any] = None,
+        cache: Optional[SearchCache] = None
+    ):
         """
         Initialize the Bocha web search.
         
         Args:
             api_key: The Bocha API key (optional, can be set via environment variable)
+            session: HTTP session to send requests through, e.g. a requests.Session shared with the
+                LLM provider or a client from get_http_client (optional)
+            cache: Persistent cache for search results (optional)
         """
         self.api_key = api_key or os.environ.get("BOCHA_API_KEY")
         if not self.api_key:
             raise ValueError("Bocha API key is required. Set it via the constructor or BOCHA_API_KEY environment variable.")
         
         self.base_url = "https://api.bochaai.com/v1/web-search"
+        self.session = session or requests.Session()
+        self.cache = cache
     
     def search(
         self,
@@ -46,11 +126,6 @@ class BochaWebSearch:
         Returns:
             Dictionary containing search results with structured data
         """
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
-        }
-        
         data = {
             "query": query,
             "freshness": freshness,
@@ -58,8 +133,37 @@ class BochaWebSearch:
             "count": count
         }
         
+        if self.cache is not None:
+            cached = self.cache.get(data)
+            if cached is not None:
+                return cached
+        
+        results = self._search(data)
+        
+        # Failed searches are retried next time rather than cached
+        if self.cache is not None and results["success"]:
+            self.cache.set(data, results)
+        
+        return results
+    
+    def _search(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a search request to the Bocha Web Search API.
+        
+        Args:
+            data: The request parameters
+            
+        Returns:
+            Dictionary containing search results with structured data
+        """
+        query = data["query"]
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        
         try:
-            response = requests.post(self.base_url, headers=headers, json=data)
+            response = self.session.post(self.base_url, headers=headers, json=data)
             
             if response.status_code == 200:
                 json_response = response.json()
@@ -112,9 +216,8 @@ class BochaWebSearch:
         if not search_results.get("results", []):
             return "未找到相关结果。"
         
-        formatted_results = ""
-        for idx, page in enumerate(search_results["results"], start=1):
-            formatted_results += (
+        formatted_results = "".join(
+            (
                 f"引用: {idx}\n"
                 f"标题: {page['name']}\n"
                 f"URL: {page['url']}\n"
@@ -123,19 +226,27 @@ class BochaWebSearch:
                 f"网站图标: {page.get('siteIcon', 'N/A')}\n"
                 f"发布时间: {page.get('dateLastCrawled', 'N/A')}\n\n"
             )
+            for idx, page in enumerate(search_results["results"], start=1)
+        )
         
         print('成功返回搜索结果：' , formatted_results)
         return formatted_results.strip()
 
 
-def get_web_search_tool(api_key: Optional[str] = None) -> BochaWebSearch:
+def get_web_search_tool(
+    api_key: Optional[str] = None,
+    session: Optional[Any] = None,
+    use_cache: bool = False
+) -> BochaWebSearch:
     """
     Get a web search tool instance.
     
     Args:
         api_key: The API key for the search provider (optional)
+        session: HTTP session to send requests through (optional)
+        use_cache: Whether to cache search results on disk (default: False)
         
     Returns:
         A web search tool instance
     """
-    return BochaWebSearch(api_key=api_key)
\ No newline at end of file
+    return BochaWebSearch(api_key=api_key, session=session, cache=SearchCache() if use_cache else None)
\ No newline at end of file
@@ -23,6 +23,18 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        # Faster JSON encoding/decoding and brotli-compressed API responses
+        "fast": ["orjson>=3.9.0", "brotli>=1.0.9"],
+        # HTTP/2 multiplexing, a faster event loop and non-blocking file writes
+        "async": [
+            "httpx[http2]>=0.24.0",
+            "uvloop>=0.18.0; sys_platform != 'win32'",
+            "aiofiles>=23.1.0",
+        ],
+        # Chat prompt history and suggestions
+        "cli": ["prompt_toolkit>=3.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "llm-research=llm_research.main:main",
@@ -4,19 +4,24 @@ Basic tests for the LLMResearch package.
 
 import os
 import sys
+import asyncio
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add the parent directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from llm_research.config import Config
-from llm_research.file_handler import FileHandler
+from llm_research.file_handler import FileHandler, _read_file_cached
 from llm_research.conversation import Conversation, Message
-from llm_research.reasoning import Reasoning
+from llm_research.reasoning import Reasoning, DecompositionCache, SUMMARY_MAX_RESULTS
 from llm_research.llm.base import BaseLLM
 from llm_research.llm.openai import OpenAILLM
 from llm_research.llm.custom import CustomLLM
+from llm_research.llm.cache import CachingLLM
+from llm_research.url_extractor import URLCache
+from llm_research.web_search import BochaWebSearch, SearchCache
+from llm_research.http_client import RATE_LIMIT_RETRIES
 
 
 class MockLLM(BaseLLM):
@@ -59,10 +64,36 @@ class TestConfig(unittest.TestCase):
         self.config = Config(self.config_path)
     
     def tearDown(self):
-        # Remove the temporary config file
-        if os.path.exists(self.config_path):
-            os.remove(self.config_path)
+        # Remove the temporary config file and its JSON cache
+        for path in (self.config_path, self.config.cache_path):
+            if os.path.exists(path):
+                os.remove(path)
     
+    def test_yaml_cache(self):
+        """Test loading a YAML config from its JSON cache."""
+        self.assertTrue(os.path.exists(self.config.cache_path))
+        self.assertEqual(Config(self.config_path)._load_cache(), self.config._load_config())
+        
+        # Editing the YAML file invalidates the cache
+        with open(self.config_path, "a", encoding="utf-8") as f:
+            f.write("extra: 1\n")
+        self.assertIsNone(self.config._load_cache())
+        self.assertEqual(Config(self.config_path).config["extra"], 1)
+    
+    def test_batch_update(self):
+        """Test saving several changes with a single write."""
+        with self.config.batch_update():
+            self.config.set_provider_config("test", {"base_url": "https://test-api.com", "model": "test-model"})
+            self.config.set_api_key("test", "test-api-key")
+            self.config.set_default_provider("test")
+
+            # Nothing is written until the block exits
+            self.assertNotIn("test", Config(self.config_path).list_providers())
+
+        config = Config(self.config_path)
+        self.assertEqual(config.config["default_provider"], "test")
+        self.assertEqual(config.get_provider_config("test")["api_key"], "test-api-key")
+
     def test_get_provider_config(self):
         """Test getting a provider configuration."""
         # The default provider should exist
@@ -111,6 +142,48 @@ class TestFileHandler(unittest.TestCase):
         content = self.file_handler.read_file(self.test_file_path)
         self.assertIn("This is a test file.", content)
     
+    def test_read_file_cache(self):
+        """Test that cached file content is refreshed when the file changes."""
+        self.file_handler.read_file(self.test_file_path)
+        with open(self.test_file_path, "w", encoding="utf-8") as f:
+            f.write("Changed.")
+        self.assertEqual(self.file_handler.read_file(self.test_file_path), "Changed.")
+    
+    @patch("llm_research.file_handler.MAX_CACHED_FILE_SIZE", 10)
+    def test_read_file_cache_skips_large_files(self):
+        """Test that files above the size limit aren't kept in the cache."""
+        _read_file_cached.cache_clear()
+        self.assertIn("This is a test file.", self.file_handler.read_file(self.test_file_path))
+        self.assertEqual(_read_file_cached.cache_info().currsize, 0)
+    
+    def test_read_files(self):
+        """Test reading several files, skipping files that fail."""
+        contents = self.file_handler.read_files([self.test_file_path, "missing.txt", self.test_file_path])
+        self.assertEqual(list(contents), [self.test_file_path])
+    
+    def test_read_file_window(self):
+        """Test reading a window of a file."""
+        content, size = self.file_handler.read_file_window(self.test_file_path, 20)
+        self.assertEqual(content, "This is a test file.")
+        self.assertEqual(size, len("This is a test file.\n") * 10)
+        
+        # Other formats are measured in bytes too
+        pdf_path = "test_file.pdf"
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF" + b"0" * 96)
+        try:
+            with patch.object(self.file_handler, "read_file", return_value="\u00e9" * 30):
+                content, size = self.file_handler.read_file_window(pdf_path, 20)
+        finally:
+            os.remove(pdf_path)
+        self.assertEqual(content, "\u00e9" * 10)
+        self.assertEqual(size, 100)
+
+    def test_write_file_async(self):
+        """Test writing a file asynchronously."""
+        asyncio.run(self.file_handler.write_file_async(self.test_file_path, "Written."))
+        self.assertEqual(self.file_handler.read_file(self.test_file_path), "Written.")
+
     def test_chunk_text(self):
         """Test chunking text."""
         # Create a file handler with a smaller chunk size for testing
@@ -119,6 +192,25 @@ class TestFileHandler(unittest.TestCase):
         chunks = small_chunk_handler.chunk_text(text)
         self.assertGreater(len(chunks), 1)
 
+    def test_chunk_text_sizes(self):
+        """Test that chunks fit the chunk size and keep all the words in order."""
+        handler = FileHandler(chunk_size=50, chunk_overlap=0)
+        text = "\n\n".join(["Short paragraph.", "A much longer sentence. " * 5, "x" * 60, "End."])
+        chunks = handler.chunk_text(text)
+        self.assertTrue(all(len(chunk) <= 50 for chunk in chunks if chunk != "x" * 60))
+        self.assertEqual(" ".join(chunks).split(), text.split())
+
+    def test_chunk_text_overlap(self):
+        """Test that each chunk starts with the end of the previous chunk."""
+        handler = FileHandler(chunk_size=20, chunk_overlap=5)
+        chunks = handler.chunk_text("First paragraph.\n\nSecond paragraph.")
+        self.assertEqual(chunks, ["First paragraph.", "raph.\n\nSecond paragraph."])
+
+    def test_iter_chunks(self):
+        """Test that iterating over a file's chunks matches processing the file."""
+        handler = FileHandler(chunk_size=50, chunk_overlap=10)
+        self.assertEqual(list(handler.iter_chunks(self.test_file_path)), handler.process_file(self.test_file_path))
+
 
 class TestConversation(unittest.TestCase):
     """
@@ -144,6 +236,221 @@ class TestConversation(unittest.TestCase):
         response = self.conversation.generate_response()
         self.assertEqual(response, "This is a mock response.")  # Using default response
 
+    def test_save_and_load_conversation(self):
+        """Test saving and loading a conversation."""
+        file_path = "test_conversation.json"
+        self.conversation.add_message("user", "Hello!", metadata={"source": "test"})
+        try:
+            self.conversation.save_conversation(file_path)
+            loaded = Conversation(self.llm)
+            loaded.load_conversation(file_path)
+        finally:
+            os.remove(file_path)
+        self.assertEqual(loaded.get_messages(), self.conversation.get_messages())
+        self.assertEqual(loaded.get_formatted_messages()[1], {"role": "user", "content": "Hello!"})
+        self.assertEqual(loaded._system_message.content, "You are a helpful assistant.")
+
+    def test_clear_conversation(self):
+        """Test that clearing the conversation keeps only the system message."""
+        self.conversation.add_message("user", "Hello!")
+        self.conversation.clear_conversation()
+        messages = self.conversation.get_messages()
+        self.assertEqual([msg.role for msg in messages], ["system"])
+
+    def test_token_counts_are_cached(self):
+        """Test that each message is only tokenized once."""
+        self.conversation.add_message("user", "Hello!")
+        self.llm.count_tokens = MagicMock(return_value=5)
+        self.conversation._get_token_counts()
+        # The system message was already counted when it was added
+        self.assertEqual(self.conversation._get_token_counts(), [7, 5])
+        self.assertEqual(self.llm.count_tokens.call_count, 1)
+
+    def test_trim_messages_to_token_limit(self):
+        """Test truncating the oldest message that doesn't fit."""
+        self.conversation.token_limit = 60
+        self.conversation.add_message("user", "word " * 100)
+        self.conversation.add_message("assistant", "Hi!")
+        messages = self.conversation._trim_messages_to_token_limit(
+            self.conversation.get_formatted_messages(),
+            self.conversation._get_token_counts()
+        )
+        self.assertEqual([msg["role"] for msg in messages], ["system", "user", "assistant"])
+        self.assertTrue(messages[1]["content"].endswith("..."))
+        self.assertLess(len(messages[1]["content"]), 500)
+
+    def test_trim_to(self):
+        """Test dropping messages older than the one that partly fits."""
+        for content in ["word " * 100, "word " * 100, "Hi!"]:
+            self.conversation.add_message("user", content)
+        self.assertEqual(self.conversation.trim_to(60), 1)
+        self.assertEqual([msg.content for msg in self.conversation.messages][1:], ["word " * 100, "Hi!"])
+        self.assertEqual(self.conversation.messages[0].role, "system")
+        self.assertEqual(self.conversation.trim_to(60), 0)
+
+
+class TestBaseLLM(unittest.TestCase):
+    """
+    Tests for the shared BaseLLM helpers.
+    """
+    
+    def setUp(self):
+        self.llm = MockLLM()
+    
+    def test_truncate_to_tokens(self):
+        """Test truncating text to a token budget."""
+        text = "word " * 1000
+        truncated = self.llm.truncate_to_tokens(text, 100)
+        self.assertLessEqual(self.llm.count_tokens(truncated), 100)
+        self.assertTrue(text.startswith(truncated))
+        self.assertEqual(self.llm.truncate_to_tokens("short", 100), "short")
+    
+    def test_agenerate(self):
+        """Test generating text from a coroutine."""
+        result = asyncio.run(self.llm.agenerate("What is 2+2?"))
+        self.assertEqual(result["text"], self.llm.generate("What is 2+2?")["text"])
+    
+    def test_generate_batch(self):
+        """Test generating text for several prompts, keeping their order."""
+        self.llm.set_response("A", {"text": "1", "raw_response": {}})
+        self.llm.set_response("B", {"text": "2", "raw_response": {}})
+        results = self.llm.generate_batch(["A", "B", "A"])
+        self.assertEqual([result["text"] for result in results], ["1", "2", "1"])
+        
+        # Errors can be returned in place of the results of the failed prompts
+        self.llm.generate = MagicMock(side_effect=[{"text": "1", "raw_response": {}}, RuntimeError("down")])
+        results = self.llm.generate_batch(["A", "B"], return_exceptions=True)
+        self.assertEqual(results[0]["text"], "1")
+        self.assertIsInstance(results[1], RuntimeError)
+
+
+
+class TestOpenAILLM(unittest.TestCase):
+    """
+    Tests for the OpenAILLM class.
+    """
+    
+    def setUp(self):
+        self.session = MagicMock()
+        self.llm = OpenAILLM("gpt-4o", "https://mock-api.com/v1", "mock-api-key", session=self.session)
+    
+    @patch("llm_research.http_client.time.sleep")
+    def test_generate_error(self, sleep):
+        """Test that rate-limited requests are resent before raising the API's error message."""
+        response = self.session.post.return_value
+        response.status_code = 429
+        response.headers = {"Retry-After": "2"}
+        response.content = b'{"error": {"message": "Rate limit reached"}}'
+        with self.assertRaisesRegex(RuntimeError, "status code 429: Rate limit reached"):
+            self.llm.generate("Hi")
+        self.assertEqual(self.session.post.call_count, 1 + RATE_LIMIT_RETRIES)
+        sleep.assert_called_with(2.0)
+        
+        # Other errors may have been processed, so they are never resent
+        self.session.post.reset_mock()
+        response.status_code = 503
+        with self.assertRaises(RuntimeError):
+            self.llm.generate("Hi")
+        self.assertEqual(self.session.post.call_count, 1)
+    
+    @patch("llm_research.llm.openai.HTTPX_AVAILABLE", False)
+    def test_agenerate_without_httpx(self):
+        """Test that the async methods fall back to the session in an executor."""
+        response = self.session.post.return_value
+        response.status_code = 200
+        response.content = b'{"choices": [{"message": {"content": "Hello"}}]}'
+        response.iter_lines.return_value = [
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            b'data: {"choices": [{"delta": {"content": "Hello"}}]}',
+            b"data: [DONE]",
+        ]
+        
+        async def run():
+            result = await self.llm.agenerate("Hi")
+            chunks = [chunk async for chunk in self.llm.agenerate_stream("Hi")]
+            return result["text"], chunks
+        
+        self.assertEqual(asyncio.run(run()), ("Hello", ["Hello"]))
+    
+    @patch("llm_research.llm.openai.HTTPX_AVAILABLE", True)
+    @patch("llm_research.llm.openai.httpx", create=True)
+    def test_async_client_per_event_loop(self, httpx):
+        """Test that each event loop gets its own async client."""
+        response = MagicMock(status_code=200, content=b'{"choices": [{"message": {"content": "Hello"}}]}')
+        httpx.AsyncClient.side_effect = lambda **kwargs: MagicMock(post=AsyncMock(return_value=response))
+        
+        async def run():
+            return [(await self.llm.agenerate("Hi"))["text"] for _ in range(2)]
+        
+        self.assertEqual(asyncio.run(run()), ["Hello", "Hello"])
+        self.assertEqual(asyncio.run(run()), ["Hello", "Hello"])
+        self.assertEqual(httpx.AsyncClient.call_count, 2)
+
+
+class TestCustomLLM(unittest.TestCase):
+    """
+    Tests for the CustomLLM class.
+    """
+    
+    def setUp(self):
+        self.session = MagicMock()
+        self.llm = CustomLLM("custom-model", "https://mock-api.com", "mock-api-key", session=self.session)
+    
+    def test_generate_stream(self):
+        """Test parsing a server-sent event stream."""
+        response = self.session.post.return_value
+        response.status_code = 200
+        response.iter_lines.return_value = [
+            b'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+            b"",
+            b": keepalive",
+            b'data: {"choices": [{"delta": {"content": "lo"}}]}',
+            b"data: [DONE]",
+        ]
+        self.assertEqual(list(self.llm.generate_stream("Hi")), ["Hello"])
+        self.assertEqual(list(self.llm.generate_stream("Hi", stream_flush_every=1)), ["Hel", "lo"])
+        self.assertEqual(response.close.call_count, 2)
+    
+    def test_generate_error(self):
+        """Test that failed requests raise the API's error message."""
+        response = self.session.post.return_value
+        response.status_code = 500
+        response.content = b'{"error": {"message": "overloaded"}}'
+        with self.assertRaisesRegex(RuntimeError, "status code 500: overloaded"):
+            self.llm.generate("Hi")
+        
+        response.content = b"Bad Gateway"
+        with self.assertRaisesRegex(RuntimeError, "status code 500: Bad Gateway"):
+            self.llm.generate("Hi")
+    
+    @patch("llm_research.llm.custom.HTTPX_AVAILABLE", False)
+    def test_agenerate_without_httpx(self):
+        """Test that the async methods fall back to the session in an executor."""
+        response = self.session.post.return_value
+        response.status_code = 200
+        response.content = b'{"choices": [{"text": "Hello"}]}'
+        response.iter_lines.return_value = [b'data: {"choices": [{"text": "Hello"}]}']
+        
+        async def run():
+            result = await self.llm.agenerate("Hi")
+            chunks = [chunk async for chunk in self.llm.agenerate_stream("Hi")]
+            return result["text"], chunks
+        
+        self.assertEqual(asyncio.run(run()), ("Hello", ["Hello"]))
+    
+    @patch("llm_research.llm.custom.HTTPX_AVAILABLE", True)
+    @patch("llm_research.llm.custom.httpx", create=True)
+    def test_async_client_per_event_loop(self, httpx):
+        """Test that each event loop gets its own async client."""
+        response = MagicMock(status_code=200, content=b'{"choices": [{"text": "Hello"}]}')
+        httpx.AsyncClient.side_effect = lambda **kwargs: MagicMock(post=AsyncMock(return_value=response))
+        
+        async def run():
+            return [(await self.llm.agenerate("Hi"))["text"] for _ in range(2)]
+        
+        self.assertEqual(asyncio.run(run()), ["Hello", "Hello"])
+        self.assertEqual(asyncio.run(run()), ["Hello", "Hello"])
+        self.assertEqual(httpx.AsyncClient.call_count, 2)
 
 class TestReasoning(unittest.TestCase):
     """
@@ -171,6 +478,319 @@ class TestReasoning(unittest.TestCase):
         response = self.reasoning.execute_step("What is 2+2?")
         self.assertEqual(response, "2+2=4")
 
+    def test_execute_step_stream(self):
+        """Test executing a reasoning step with a streamed response."""
+        self.llm.generate_stream = MagicMock(return_value=iter(["2+2", "=4"]))
+        reasoning = Reasoning(self.llm, stream=True)
+        with patch("sys.stdout"):
+            response = reasoning.execute_step("What is 2+2?")
+        self.assertEqual(response, "2+2=4")
+        self.assertEqual(reasoning.get_last_step().response, "2+2=4")
+
+    def test_chain_of_thought(self):
+        """Test getting the reasoning and the answer from a single call."""
+        self.llm.generate = MagicMock(return_value={
+            "text": '```json\n{"reasoning": "2 plus 2 is 4.", "answer": "4"}\n```',
+            "raw_response": {}
+        })
+        self.assertEqual(self.reasoning.chain_of_thought("What is 2+2?"), "4")
+        self.assertEqual(self.llm.generate.call_count, 1)
+        self.assertEqual(self.reasoning.get_last_step().metadata["kind"], "cot_fused")
+
+    def test_chain_of_thought_json_mode_rejected(self):
+        """Test asking again without response_format when the API rejects it."""
+        def generate(prompt, **kwargs):
+            if "response_format" in kwargs:
+                raise RuntimeError("API request failed with status code 400: response_format is not supported")
+            return {"text": '{"reasoning": "2 plus 2 is 4.", "answer": "4"}', "raw_response": {}}
+
+        self.llm.supports_json_mode = True
+        self.llm.generate = MagicMock(side_effect=generate)
+        self.assertEqual(self.reasoning.chain_of_thought("What is 2+2?"), "4")
+        self.assertEqual(self.llm.generate.call_count, 2)
+
+    def test_chain_of_thought_without_json(self):
+        """Test extracting the answer with a second call when the response isn't JSON."""
+        self.llm.generate = MagicMock(side_effect=[
+            {"text": "2 plus 2 is 4.", "raw_response": {}},
+            {"text": "4", "raw_response": {}}
+        ])
+        self.assertEqual(self.reasoning.chain_of_thought("What is 2+2?"), "4")
+        self.assertEqual(self.llm.generate.call_count, 2)
+
+    def test_decompose_task_dependencies(self):
+        """Test parsing subtask dependency annotations."""
+        self.llm.generate = MagicMock(return_value={
+            "text": "1. Find A (depends on: none)\n2. Find B\n3. Compare A and B (depends on: 1, 2)",
+            "raw_response": {}
+        })
+        subtasks, dependencies = self.reasoning._decompose_task("Compare A and B", annotate_dependencies=True)
+        self.assertEqual(subtasks, ["Find A", "Find B", "Compare A and B"])
+        self.assertEqual(dependencies, [[], None, [0, 1]])
+    
+    def test_decompose_task_speculatively(self):
+        """Test using a concurrent retry when the first breakdown has too many subtasks."""
+        def generate(prompt, **kwargs):
+            if "Important:" in prompt:
+                return {"text": "1. Find A\n2. Find B", "raw_response": {}}
+            return {"text": "\n".join(f"{i}. Step {i}" for i in range(1, 20)), "raw_response": {}}
+
+        self.llm.generate = MagicMock(side_effect=generate)
+        events = []
+        reasoning = Reasoning(self.llm, max_steps=2, speculative_decomposition=True, ws_handler=events.append)
+        subtasks, _ = reasoning._decompose_task("Compare A and B")
+        self.assertEqual(subtasks, ["Find A", "Find B"])
+        self.assertEqual(len(reasoning.get_steps()), 1)
+        self.assertIn("Important:", reasoning.get_last_step().prompt)
+        self.assertEqual([e["type"] for e in events if e["type"].startswith("step_")], ["step_start", "step_complete"])
+
+    def test_decomposition_cache(self):
+        """Test that decomposing the same task again hits the cache."""
+        cache_path = "test_decomposition_cache.db"
+        self.reasoning.decomposition_cache = DecompositionCache(cache_path)
+        self.llm.generate = MagicMock(return_value={
+            "text": "1. Find A (depends on: none)\n2. Compare A and B (depends on: 1)",
+            "raw_response": {}
+        })
+        try:
+            first = self.reasoning._decompose_task("Compare A and B", annotate_dependencies=True)
+            second = self.reasoning._decompose_task("Compare A and B", annotate_dependencies=True)
+            self.assertEqual(first, second)
+            self.assertEqual(self.llm.generate.call_count, 1)
+            
+            # Expired decompositions are generated again
+            self.reasoning.decomposition_cache.ttl = -1
+            self.reasoning._decompose_task("Compare A and B", annotate_dependencies=True)
+            self.assertEqual(self.llm.generate.call_count, 2)
+        finally:
+            # Remove the temporary cache database and its WAL files
+            self.reasoning.decomposition_cache._store.close()
+            for suffix in ["", "-wal", "-shm"]:
+                if os.path.exists(cache_path + suffix):
+                    os.remove(cache_path + suffix)
+    
+    def test_execute_subtasks_async(self):
+        """Test executing subtasks concurrently."""
+        self.llm.generate = MagicMock(side_effect=AssertionError("generate called from the event loop"))
+        self.llm.agenerate = AsyncMock(return_value={"text": "Yes", "raw_response": {}})
+        results = asyncio.run(self.reasoning.execute_subtasks_async(
+            subtasks=["Find A", "Find B", "Compare A and B"],
+            dependencies=[[], [], [0, 1]],
+            max_retries=0
+        ))
+        self.assertEqual(len(results), 3)
+        self.assertIn("Previous results:", self.reasoning.get_steps()[-1].prompt)
+        
+        # Each subtask is answered and validated with agenerate
+        self.assertEqual(self.llm.agenerate.await_count, 6)
+
+    def test_concurrent_step_numbers(self):
+        """Test that concurrent steps get distinct numbers in their start and complete events."""
+        events = []
+        self.reasoning.ws_handler = events.append
+        
+        async def agenerate(prompt, **kwargs):
+            await asyncio.sleep(0)
+            return {"text": "Yes", "raw_response": {}}
+        
+        self.llm.agenerate = agenerate
+        asyncio.run(self.reasoning.execute_subtasks_async(
+            subtasks=["Find A", "Find B", "Find C"],
+            max_retries=0
+        ))
+        started = [e["step_num"] for e in events if e["type"] == "step_start"]
+        completed = [e["step_num"] for e in events if e["type"] == "step_complete"]
+        self.assertEqual(sorted(started), [1, 2, 3])
+        self.assertEqual(sorted(completed), [1, 2, 3])
+        self.assertEqual(sorted(step.metadata["step_num"] for step in self.reasoning.get_steps()), [1, 2, 3])
+
+    def test_previous_results_window(self):
+        """Test limiting the earlier results included in subtask prompts."""
+        self.reasoning.previous_results_window = 1
+        self.reasoning.execute_subtasks(["Find A", "Find B", "Compare A and B"], max_retries=0)
+        prompt = self.reasoning.get_steps()[-1].prompt
+        self.assertIn("Subtask 2: Find B", prompt)
+        self.assertNotIn("Subtask 1: Find A", prompt)
+
+    def test_summary_history_mode(self):
+        """Test including only excerpts of the earlier results in subtask prompts."""
+        self.llm.set_response("default", {"text": "a" * 300 + "b" * 300, "raw_response": {}})
+        reasoning = Reasoning(self.llm, history_mode="summary")
+        reasoning.execute_subtasks(["Find A", "Find B"], max_retries=0)
+        prompt = reasoning.get_steps()[-1].prompt
+        self.assertIn("Summary of prior work:", prompt)
+        self.assertIn("a" * 200 + " ... " + "b" * 200 + "\n", prompt)
+        self.assertNotIn("a" * 201, prompt)
+
+        # Only the most recent results are excerpted
+        subtasks = [f"Find {i}" for i in range(SUMMARY_MAX_RESULTS + 3)]
+        reasoning.execute_subtasks(subtasks, max_retries=0)
+        prompt = reasoning.get_steps()[-1].prompt
+        self.assertIn("(2 earlier subtasks completed)", prompt)
+        self.assertNotIn("Subtask 2: Find 1\n", prompt)
+        self.assertIn("Subtask 3: Find 2\n", prompt)
+
+        with self.assertRaises(ValueError):
+            Reasoning(self.llm, history_mode="everything")
+
+    def test_suppress_reflection(self):
+        """Test passing a reflection logit bias only when it is enabled."""
+        self.llm.logit_bias_for = MagicMock(return_value={"42": -100})
+        self.llm.generate = MagicMock(return_value={"text": "4", "raw_response": {}})
+        Reasoning(self.llm).execute_step("What is 2+2?")
+        self.assertNotIn("logit_bias", self.llm.generate.call_args.kwargs)
+
+        reasoning = Reasoning(self.llm, suppress_reflection=True)
+        reasoning.execute_step("What is 2+2?")
+        self.assertEqual(self.llm.generate.call_args.kwargs["logit_bias"], {"42": -100})
+
+    def test_select_urls(self):
+        """Test URL selection with a selector model and fallback."""
+        summaries = [{"url": f"https://example.com/{i}", "title": str(i), "summary": ""} for i in range(5)]
+
+        # A few results are all selected without calling an LLM
+        self.llm.generate = MagicMock()
+        self.assertEqual(self.reasoning._select_urls("query", summaries[:3]), [0, 1, 2])
+        self.llm.generate.assert_not_called()
+
+        # A failing selector falls back to the primary LLM
+        self.reasoning.selector_llm = MockLLM()
+        self.reasoning.selector_llm.generate = MagicMock(side_effect=RuntimeError("down"))
+        self.llm.generate = MagicMock(return_value={"text": "2, 5", "raw_response": {}})
+        self.assertEqual(self.reasoning._select_urls("query", summaries), [1, 4])
+
+    def test_batch_call(self):
+        """Test answering several prompts with one call and parsing the answers."""
+        self.llm.generate = MagicMock(return_value={"text": "### 1\nA\n\n### 3\nC", "raw_response": {}})
+        answers = self.reasoning._batch_call(["a", "b", "c"], k=4)
+        self.assertEqual(answers, ["A", None, "C"])
+        self.assertEqual(self.llm.generate.call_count, 1)
+
+    def test_execute_subtasks_batched(self):
+        """Test batching the first attempt of independent subtasks."""
+        self.reasoning.batch_size = 4
+        self.llm.generate = MagicMock(side_effect=[
+            {"text": "### 1\nA is 1\n### 2\nB is 2", "raw_response": {}},
+            {"text": "Yes", "raw_response": {}},
+            {"text": "Yes", "raw_response": {}},
+            {"text": "A < B", "raw_response": {}},
+            {"text": "Yes", "raw_response": {}},
+        ])
+        results = self.reasoning.execute_subtasks(
+            ["Find A", "Find B", "Compare A and B"],
+            dependencies=[[], [], [0, 1]],
+            max_retries=0
+        )
+        self.assertEqual(results, ["A is 1", "B is 2", "A < B"])
+        self.assertEqual(self.llm.generate.call_count, 5)
+
+
+
+class TestCachingLLM(unittest.TestCase):
+    """
+    Tests for the CachingLLM class.
+    """
+    
+    def setUp(self):
+        self.cache_path = "test_llm_cache.db"
+        self.llm = MockLLM()
+        self.llm.generate = MagicMock(return_value={"text": "cached", "raw_response": {}})
+        self.cached_llm = CachingLLM(self.llm, cache_path=self.cache_path)
+    
+    def tearDown(self):
+        # Remove the temporary cache database and its WAL files
+        self.cached_llm._store.close()
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(self.cache_path + suffix):
+                os.remove(self.cache_path + suffix)
+    
+    def test_low_temperature_is_cached(self):
+        """Test that repeated low-temperature calls hit the cache."""
+        self.cached_llm.generate("Hello!", temperature=0.3)
+        response = self.cached_llm.generate("Hello!", temperature=0.3)
+        self.assertEqual(response["text"], "cached")
+        self.assertEqual(self.llm.generate.call_count, 1)
+    
+    def test_high_temperature_is_not_cached(self):
+        """Test that high-temperature calls bypass the cache."""
+        self.cached_llm.generate("Hello!", temperature=1.0)
+        self.cached_llm.generate("Hello!", temperature=1.0)
+        self.assertEqual(self.llm.generate.call_count, 2)
+
+    def test_expired_completion_is_not_used(self):
+        """Test that completions older than the time-to-live are generated again."""
+        self.cached_llm.ttl = -1
+        self.cached_llm.generate("Hello!", temperature=0.3)
+        self.cached_llm.generate("Hello!", temperature=0.3)
+        self.assertEqual(self.llm.generate.call_count, 2)
+
+    def test_cached_completion_is_a_copy(self):
+        """Test that changing a returned completion doesn't change the cached one."""
+        self.cached_llm.generate("Hello!", temperature=0.3)["text"] = "changed"
+        self.assertEqual(self.cached_llm.generate("Hello!", temperature=0.3)["text"], "cached")
+
+
+class TestURLCache(unittest.TestCase):
+    """
+    Tests for the URLCache class.
+    """
+    
+    def setUp(self):
+        self.cache_path = "test_url_cache.db"
+        self.cache = URLCache(self.cache_path)
+    
+    def tearDown(self):
+        # Remove the temporary cache database and its WAL files
+        self.cache._store.close()
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(self.cache_path + suffix):
+                os.remove(self.cache_path + suffix)
+    
+    def test_get_set(self):
+        """Test storing and retrieving cached content."""
+        self.assertIsNone(self.cache.get("https://example.com", "markdown"))
+        self.cache.set("https://example.com", "markdown", "# Example")
+        self.assertEqual(self.cache.get("https://example.com", "markdown"), "# Example")
+        self.assertIsNone(self.cache.get("https://example.com", "text"))
+    
+    def test_expired_entry(self):
+        """Test that expired entries are not returned."""
+        self.cache.ttl = -1
+        self.cache.set("https://example.com", "markdown", "# Example")
+        self.assertIsNone(self.cache.get("https://example.com", "markdown"))
+
+
+
+class TestSearchCache(unittest.TestCase):
+    """
+    Tests for caching web search results.
+    """
+    
+    def setUp(self):
+        self.cache_path = "test_search_cache.db"
+        self.search = BochaWebSearch(api_key="mock-api-key", cache=SearchCache(self.cache_path))
+        self.search._search = MagicMock(return_value={"success": True, "query": "q", "results": []})
+    
+    def tearDown(self):
+        # Remove the temporary cache database and its WAL files
+        self.search.cache._store.close()
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(self.cache_path + suffix):
+                os.remove(self.cache_path + suffix)
+    
+    def test_repeated_search_is_cached(self):
+        """Test that repeating a search hits the cache."""
+        self.search.search("q")
+        self.assertEqual(self.search.search("q")["query"], "q")
+        self.search.search("q", count=5)
+        self.assertEqual(self.search._search.call_count, 2)
+    
+    def test_failed_search_is_not_cached(self):
+        """Test that failed searches are sent again."""
+        self.search._search.return_value = {"success": False, "error": "down"}
+        self.search.search("q")
+        self.search.search("q")
+        self.assertEqual(self.search._search.call_count, 2)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file